@@ -1,9 +1,12 @@
 from discord.ext import commands
 import discord
+from settings.memory import format_bytes, snapshot_diff
+import tracemalloc
 
 class Owner(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot: commands.Bot = bot
+        self.memory_snapshot = None
 
     @commands.command(name="sync-tree", description="Sync application commands.")
     @commands.is_owner()
@@ -13,12 +16,20 @@ class Owner(commands.Cog):
         print("Tree loaded successfully")
         await ctx.send("✅ Command tree synced.")
 
+    def handoff_note(self, extension: str) -> str:
+        """Describe the state adopted by the cogs of a freshly loaded extension, if any."""
+        notes = [
+            cog.handoff_summary for cog in self.bot.cogs.values()
+            if cog.__module__ == extension and getattr(cog, "handoff_summary", None)
+        ]
+        return f" (adopted {'; '.join(notes)})" if notes else ""
+
     @commands.command(name="load", description="Load a cog.")
     @commands.is_owner()
     async def load_cog(self, ctx: commands.Context, cog: str):
         try:
             await self.bot.load_extension(f"cogs.{cog}")
-            await ctx.send(f"✅ Loaded cog: `{cog}`")
+            await ctx.send(f"✅ Loaded cog: `{cog}`{self.handoff_note(f'cogs.{cog}')}")
         except Exception as e:
             await ctx.send(f"❌ Failed to load cog `{cog}`: `{e}`")
 
@@ -36,9 +47,87 @@ class Owner(commands.Cog):
     async def reload_cog(self, ctx: commands.Context, cog: str):
         try:
             await self.bot.reload_extension(f"cogs.{cog}")
-            await ctx.send(f"🔄 Reloaded cog: `{cog}`")
+            await ctx.send(f"🔄 Reloaded cog: `{cog}`{self.handoff_note(f'cogs.{cog}')}")
         except Exception as e:
             await ctx.send(f"❌ Failed to reload cog `{cog}`: `{e}`")
 
+    @commands.command(name="trace", description="Start or stop recording a guild's voice traffic for replay.")
+    @commands.is_owner()
+    async def trace(self, ctx: commands.Context, action: str, guild_id: int = None):
+        queueing = self.bot.get_cog("QueueingCog")
+        if not queueing:
+            await ctx.send("❌ The queueing cog is not loaded.")
+            return
+        guild_id = guild_id or ctx.guild.id
+        if action == "start":
+            guild_settings = await queueing.settings_cache.get(guild_id)
+            if not guild_settings:
+                await ctx.send(f"❌ Guild `{guild_id}` has no queueing system set up.")
+                return
+            path = queueing.tracer.start(guild_id, guild_settings["queue_channel_id"], guild_settings["amount_to_queue"])
+            await ctx.send(f"⏺️ Tracing guild `{guild_id}` to `{path}`")
+        elif action == "stop":
+            path = queueing.tracer.stop(guild_id)
+            if path:
+                await ctx.send(f"⏹️ Trace saved to `{path}`. Replay it with `python -m settings.trace replay {path}`")
+            else:
+                await ctx.send(f"❌ Guild `{guild_id}` is not being traced.")
+        else:
+            await ctx.send("❌ Action must be `start` or `stop`.")
+
+    @commands.command(name="memory", description="Memory diagnostics: start, snapshot, diff, guilds or stop.")
+    @commands.is_owner()
+    async def memory(self, ctx: commands.Context, action: str = "guilds"):
+        if action == "start":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            await ctx.send("✅ Tracing allocations. Baseline snapshot taken.")
+        elif action == "snapshot":
+            if not tracemalloc.is_tracing():
+                await ctx.send("❌ Allocation tracing is off. Use `memory start` first.")
+                return
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            await ctx.send(f"📸 Baseline snapshot taken. Traced: {format_bytes(current)} (peak {format_bytes(peak)})")
+        elif action == "diff":
+            if not tracemalloc.is_tracing() or not self.memory_snapshot:
+                await ctx.send("❌ No baseline snapshot. Use `memory start` first.")
+                return
+            lines = snapshot_diff(self.memory_snapshot, tracemalloc.take_snapshot())
+            await ctx.send("Top allocation growth since the baseline:\n```\n" + "\n".join(lines)[:1900] + "\n```")
+        elif action == "stop":
+            tracemalloc.stop()
+            self.memory_snapshot = None
+            await ctx.send("⏹️ Allocation tracing stopped.")
+        elif action == "guilds":
+            queueing = self.bot.get_cog("QueueingCog")
+            if not queueing:
+                await ctx.send("❌ The queueing cog is not loaded.")
+                return
+            usage = sorted(queueing.memory_usage().items(), key=lambda item: -sum(item[1].values()))
+            lines = [f"{'guild':<20} {'queue':>10} {'sessions':>10} {'tasks':>10}"]
+            for guild_id, sizes in usage[:15]:
+                lines.append(
+                    f"{str(guild_id):<20} {format_bytes(sizes['queue']):>10} "
+                    f"{format_bytes(sizes['sessions']):>10} {format_bytes(sizes['tasks']):>10}"
+                )
+            total = sum(sum(sizes.values()) for _, sizes in usage)
+            lines.append(f"{len(usage)} guilds, {format_bytes(total)} total, {queueing.evicted_sessions} stale sessions evicted")
+            await ctx.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+        else:
+            await ctx.send("❌ Action must be `start`, `snapshot`, `diff`, `guilds` or `stop`.")
+
+    @commands.command(name="admission", description="Show event loop load and the work shed to keep up.")
+    @commands.is_owner()
+    async def admission(self, ctx: commands.Context):
+        queueing = self.bot.get_cog("QueueingCog")
+        if not queueing:
+            await ctx.send("❌ The queueing cog is not loaded.")
+            return
+        lines = queueing.admission.report()
+        lines.append(f"Undeliverable DMs dropped: {queueing.notifier.dropped}")
+        await ctx.send("```\n" + "\n".join(lines)[:1900] + "\n```")
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(Owner(bot))
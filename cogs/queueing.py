@@ -5,11 +5,33 @@ from settings import bot as settings
 from settings import utils
 from discord import app_commands
 import random
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import asyncio
 from discord.ext import tasks
-import json
 import os
+import tempfile
+import time
+import contextlib
+import secrets
+from settings.bulk import BulkOperation
+from settings.notifications import Notifier
+from settings.inbox import GuildInbox, VoiceUpdate
+from settings.position import QueueIndex, EtaEstimator, format_eta
+from settings.timers import TimerWheel
+from settings.scheduler import QueueScheduler, Autoscaler, parse_days, parse_time
+from settings.supervisor import GuildSupervisor
+from settings.audit import AuditLog, EVENT_KINDS
+from settings.trace import TraceRecorder
+from settings.memory import deep_sizeof
+from settings.federation import FederatedPool
+from settings import export
+from settings import migrations
+from settings.admission import AdmissionControl
+from settings.guild_settings import GuildSettings, SettingsCache
+from settings.ready_check import ReadyCheck, ReadyCheckView, NON_RESPONDER_ACTIONS, PENDING, STARTED, CANCELLED
+
+# Seconds the state of an unloaded instance waits to be adopted by a new one before its services are shut down
+HANDOFF_TTL = 30
 
 
 class QueueingCog(commands.Cog):
@@ -17,9 +39,337 @@ class QueueingCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.guild_loops = {}
-        self.bot.loop.create_task(self.start_all_guild_loops())
+        self.supervisor = GuildSupervisor(self.tick_guild)
         self.session_info = {}
+        self.queue = {}
+        self.notifier = Notifier()
+        self.audit = AuditLog(retention_days=settings.AUDIT_RETENTION_DAYS)
+        self.tracer = TraceRecorder()
+        self.inbox = GuildInbox(self.process_voice_updates)
+        self.admission = AdmissionControl(
+            self.inbox.backlog, lag_threshold=settings.LAG_THRESHOLD_MS / 1000, backlog_threshold=settings.BACKLOG_THRESHOLD
+        )
+        self.positions = {}
+        self.eta = {}
+        self.status_messages = {}
+        self.status_dirty = set()
+        self.timers = TimerWheel()
+        self.settings_cache = SettingsCache()
+        self.scheduler = QueueScheduler(self.timers, self.apply_schedule)
+        self.autoscale = {}
+        self.arrivals = {}
+        self.evicted_sessions = 0
+        self.unsaved_queues = set()
+        self.queue_writer = None
+        self.federation_pools = {}
+        self.guild_pools = {}
+        self.state_versions = {}
+        self.state_version = 0
+        self.state_epoch = secrets.token_hex(4)
+        self.timeouts = {}
+        self.session_channels = {}
+        self.idle_timers = {}
+        self.possibly_empty = {}
+        self.max_timers = {}
+        self.expiry_timers = {}
+        self.ready_check_settings = {}
+        self.ready_checks = {}
+
+        # Pick up where the previous instance left off if this is a reload. The handoff is only removed once
+        # cog_load succeeds, so a failed load leaves it for the next attempt
+        if not hasattr(self.bot, 'cog_handoff'):
+            self.bot.cog_handoff = {}
+        self.handoff = self.bot.cog_handoff.get(self.qualified_name)
+        self.handoff_summary = None
+        if self.handoff:
+            self.handoff['expiry'].cancel()
+            self.import_state(self.handoff)
+        else:
+            self.bot.loop.create_task(self.start_all_guild_loops())
+        self.inbox.throttle = self.admission.throttle
+        self.notifier.admit = self.admit_dm
+
+    async def cog_load(self):
+        try:
+            await self.start_cog()
+        except Exception:
+            if self.handoff:
+                # Give another load the chance to adopt the state, and shut it down if none does
+                self.handoff['expiry'] = asyncio.create_task(self.expire_handoff(self.handoff))
+            raise
+        if self.handoff:
+            self.bot.cog_handoff.pop(self.qualified_name, None)
+            self.handoff = None
+
+    async def start_cog(self):
+        if not self.handoff:
+            await self.notifier.start()
+            self.audit.start()
+            self.admission.start()
+        self.supervisor.start()
+        self.status_messages = await utils.get_status_messages()
+        self.status_dirty.update(self.status_messages)
+        self.update_status_messages.start()
+        self.evict_stale_sessions.start()
+        self.timers.start()
+        self.autoscale = await utils.get_autoscale_settings()
+        self.timeouts = await utils.get_timeout_settings()
+        self.ready_check_settings = await utils.get_ready_check_settings()
+        for guild_id in {*self.queue, *(session['guild_id'] for session in self.session_info.values())}:
+            self.arm_timeouts(guild_id)
+        await self.scheduler.start()
+        await self.load_federations()
+        if self.handoff:
+            for guild_id in self.handoff['guilds']:
+                guild = self.bot.get_guild(guild_id)
+                if guild:
+                    await self.adopt_guild_loop(guild)
+
+    async def cog_unload(self):
+        await self.timers.stop()
+        self.update_status_messages.cancel()
+        self.evict_stale_sessions.cancel()
+        await self.supervisor.stop()
+        if self.queue_writer:
+            await self.queue_writer
+        # Pending ready checks are dropped, their members are still queued and get a new check from the next instance
+        for check in {check for checks in self.ready_checks.values() for check in checks.values()}:
+            self.finish_ready_check(check, CANCELLED)
+        # Traces stay open for the next instance, but nothing buffered is lost if the bot shuts down first
+        self.tracer.flush_all()
+        # The notifier, audit log, admission control and inbox keep running to be adopted by the next instance of
+        # this cog. After a reload that happens right away; after a plain unload they are shut down once it expires.
+        state = self.export_state()
+        state['expiry'] = asyncio.create_task(self.expire_handoff(state))
+        self.bot.cog_handoff[self.qualified_name] = state
+
+    async def expire_handoff(self, state: dict):
+        """Shut down the services of a handoff that no instance adopted in time, so a much later load starts fresh."""
+        await asyncio.sleep(HANDOFF_TTL)
+        if self.bot.cog_handoff.get(self.qualified_name) is not state:
+            return
+        del self.bot.cog_handoff[self.qualified_name]
+        state['tracer'].stop_all()
+        await state['inbox'].stop()
+        await state['notifier'].stop()
+        await state['audit'].stop()
+        await state['admission'].stop()
+        print(f"{self.qualified_name} was not loaded again within {HANDOFF_TTL}s, its background services were stopped")
+
+    def export_state(self) -> dict:
+        """Snapshot the in-memory state so a reloaded instance of this cog can adopt it."""
+        return {
+            'queue': self.queue,
+            'positions': self.positions,
+            'eta': self.eta,
+            'arrivals': self.arrivals,
+            'session_info': self.session_info,
+            'status_dirty': self.status_dirty,
+            'state_versions': self.state_versions,
+            'state_version': self.state_version,
+            'state_epoch': self.state_epoch,
+            'notifier': self.notifier,
+            'audit': self.audit,
+            'tracer': self.tracer,
+            'inbox': self.inbox,
+            'admission': self.admission,
+            'settings_cache': self.settings_cache,
+            'possibly_empty': self.possibly_empty,
+            'guilds': self.supervisor.guilds,
+        }
+
+    def import_state(self, state: dict):
+        """Adopt the state exported by the previous instance of this cog."""
+        self.queue = state['queue']
+        self.positions = state['positions']
+        self.eta = state['eta']
+        self.arrivals = state['arrivals']
+        self.session_info = state['session_info']
+        self.status_dirty = state['status_dirty']
+        self.state_versions = state['state_versions']
+        self.state_version = state['state_version']
+        self.state_epoch = state['state_epoch']
+        self.notifier = state['notifier']
+        self.audit = state['audit']
+        self.tracer = state['tracer']
+        self.inbox = state['inbox']
+        self.inbox.handler = self.process_voice_updates
+        self.admission = state['admission']
+        self.admission.backlog = self.inbox.backlog
+        self.settings_cache = state['settings_cache']
+        self.possibly_empty = state['possibly_empty']
+        self.session_channels = {session['channel_id']: code for code, session in self.session_info.items()}
+        self.handoff_summary = (
+            f"{sum(len(queue) for queue in self.queue.values())} queued members, "
+            f"{len(self.session_info)} sessions, {len(state['guilds'])} guild loops"
+        )
+
+    def mark_changed(self, guild_id: int):
+        """Flag that a guild's queue, sessions or settings changed, for the status messages and the status API."""
+        self.status_dirty.add(guild_id)
+        self.state_version += 1
+        self.state_versions[guild_id] = self.state_version
+
+    def enqueue(self, guild_id: int, member: discord.Member, joined_at: datetime = None) -> bool:
+        """
+        Add a member to the back of a guild's queue. Returns False if they were already queued.
+
+        ``joined_at`` is only passed when restoring a stored queue entry, which does not count as an arrival.
+        """
+        queue = self.queue.setdefault(guild_id, {})
+        if member.id in queue:
+            return False
+        queue[member.id] = {
+            'member': member,
+            'joined_at': joined_at or discord.utils.utcnow()
+        }
+        self.positions.setdefault(guild_id, QueueIndex()).add(member.id)
+        if joined_at is None:
+            self.arrivals.setdefault(guild_id, Autoscaler()).record_arrival()
+        self.arm_queue_expiry(guild_id, member.id, queue[member.id]['joined_at'])
+        if guild_id in self.guild_pools:
+            self.guild_pools[guild_id].add(guild_id, member.id)
+        self.mark_changed(guild_id)
+        return True
+
+    def dequeue(self, guild_id: int, member_id: int) -> bool:
+        """Remove a member from a guild's queue. Returns False if they were not queued."""
+        if self.queue.get(guild_id, {}).pop(member_id, None) is None:
+            return False
+        self.positions[guild_id].remove(member_id)
+        self.timers.cancel(self.expiry_timers.pop((guild_id, member_id), None))
+        if guild_id in self.guild_pools:
+            self.guild_pools[guild_id].remove(guild_id, member_id)
+        check = self.ready_checks.get(guild_id, {}).pop(member_id, None)
+        if check:
+            # Replace them once whoever removed them from the queue releases the queue lock
+            check.remove(member_id, exclude=False)
+            asyncio.ensure_future(self.advance_ready_check(check))
+        self.mark_changed(guild_id)
+        return True
+
+    def effective_amount(self, guild_id: int, amount_to_queue: int) -> int:
+        """Get the session size to use right now, taking automatic session sizing into account."""
+        autoscale = self.autoscale.get(guild_id)
+        if not autoscale:
+            return amount_to_queue
+        target_wait, min_size, max_size = autoscale
+        return self.arrivals.setdefault(guild_id, Autoscaler()).session_size(target_wait, min_size, max_size)
+
+    def admit_dm(self, member: discord.abc.User) -> bool:
+        return self.admission.admit('dm', member.guild.id if isinstance(member, discord.Member) else None)
+
+    def get_timeouts(self, guild_id: int) -> tuple[int, int, int]:
+        """Get a guild's ``(idle_seconds, max_session_seconds, queue_expiry_seconds)``. 0 means disabled."""
+        return self.timeouts.get(guild_id, (0, 0, 0))
+
+    def arm_timeouts(self, guild_id: int):
+        """(Re)schedule the queue expiry and maximum session length timers of a guild, e.g. after its settings changed."""
+        for member_id, entry in self.queue.get(guild_id, {}).items():
+            self.arm_queue_expiry(guild_id, member_id, entry['joined_at'])
+        for session in self.session_info.values():
+            if session.get('guild_id') == guild_id:
+                self.arm_session_limit(guild_id, session['channel_id'], session['started_at'])
+
+    def arm_queue_expiry(self, guild_id: int, member_id: int, joined_at: datetime):
+        self.timers.cancel(self.expiry_timers.pop((guild_id, member_id), None))
+        expiry = self.get_timeouts(guild_id)[2]
+        if expiry:
+            remaining = expiry - (discord.utils.utcnow() - joined_at).total_seconds()
+            self.expiry_timers[(guild_id, member_id)] = self.timers.schedule(remaining, self.expire_queue_entry, guild_id, member_id)
+
+    def arm_session_limit(self, guild_id: int, channel_id: int, started_at: datetime):
+        self.timers.cancel(self.max_timers.pop(channel_id, None))
+        max_length = self.get_timeouts(guild_id)[1]
+        if max_length:
+            remaining = max_length - (discord.utils.utcnow() - started_at).total_seconds()
+            self.max_timers[channel_id] = self.timers.schedule(remaining, self.end_long_session, guild_id, channel_id)
+
+    def arm_idle_timer(self, guild_id: int, channel_id: int, grace: float = 0):
+        """End a session call once it has been empty for the guild's idle timeout, unless someone joins first."""
+        if channel_id not in self.idle_timers:
+            delay = max(self.get_timeouts(guild_id)[0], grace)
+            self.idle_timers[channel_id] = self.timers.schedule(delay, self.end_idle_session, guild_id, channel_id)
+
+    def sweep_session_calls(self, guild: discord.Guild):
+        """Arm the idle timer of every session call that members left since the last sweep, if it is still empty."""
+        channel_ids = self.possibly_empty.pop(guild.id, None)
+        if not channel_ids:
+            return
+        for channel_id in channel_ids:
+            channel = guild.get_channel(channel_id)
+            if channel and not channel.members:
+                self.arm_idle_timer(guild.id, channel_id)
+
+    def forget_session(self, code: str) -> dict | None:
+        """Drop a session from memory along with its timers."""
+        session = self.session_info.pop(code, None)
+        if session:
+            self.session_channels.pop(session['channel_id'], None)
+            self.timers.cancel(self.idle_timers.pop(session['channel_id'], None))
+            self.timers.cancel(self.max_timers.pop(session['channel_id'], None))
+            self.mark_changed(session['guild_id'])
+        return session
+
+    async def expire_queue_entry(self, guild_id: int, member_id: int):
+        """Remove a member who has been queued for longer than the guild's queue expiry."""
+        self.expiry_timers.pop((guild_id, member_id), None)
+        guild = self.bot.get_guild(guild_id)
+        async with self.inbox.lock(guild_id):
+            entry = self.queue.get(guild_id, {}).get(member_id)
+            if not guild or not entry:
+                return
+            self.dequeue(guild_id, member_id)
+            self.save_queue(guild_id)
+
+        member = entry['member']
+        minutes = round((discord.utils.utcnow() - entry['joined_at']).total_seconds() / 60)
+        log_message = f"[Queue Expired] {member.name}#{member.discriminator} ({member.id}) was removed from the queue after {minutes} minutes."
+        self.audit.record(guild_id, 'leave', log_message, member_id)
+        try:
+            await member.move_to(None, reason="Queue entry expired")
+        except discord.HTTPException:
+            pass
+        self.notifier.notify(member, f"You were removed from the queue in **{guild.name}** after waiting {minutes} minutes. Join the queue channel again to requeue.")
+        guild_settings = await self.settings_cache.get(guild_id)
+        log_channel = guild_settings.handles(guild).log_channel if guild_settings else None
+        if log_channel and self.admission.admit('log', guild_id):
+            await log_channel.send(log_message)
+
+    async def end_idle_session(self, guild_id: int, channel_id: int):
+        self.idle_timers.pop(channel_id, None)
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel and not channel.members:
+            await self.end_session(guild, channel, "empty")
+
+    async def end_long_session(self, guild_id: int, channel_id: int):
+        self.max_timers.pop(channel_id, None)
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel:
+            await self.end_session(guild, channel, "maximum length reached")
+
+    async def apply_schedule(self, guild_id: int, open_now: bool | None):
+        """Open or close a guild's queue when one of its windows starts or ends."""
+        if open_now is None:
+            return
+        guild = self.bot.get_guild(guild_id)
+        guild_settings = await self.settings_cache.get(guild_id)
+        if not guild or not guild_settings or open_now == (not guild_settings.get('paused')):
+            return
+
+        await utils.set_paused_status(guild_id, not open_now)
+        self.settings_cache.invalidate(guild_id)
+        self.mark_changed(guild_id)
+        self.audit.record(guild_id, 'settings_change', f"Queueing system {'opened' if open_now else 'closed'} by queue window.")
+        log_channel = guild_settings.handles(guild).log_channel
+        if log_channel:
+            await log_channel.send(f"[Schedule] Queueing system {'opened' if open_now else 'closed'} by queue window.")
+        if open_now:
+            await self.start_guild_loop(guild)
+        else:
+            await self.evict_queue(guild, guild_settings)
 
     @commands.hybrid_command(name='setup', description='Setup the queueing system.')
     @commands.has_permissions(administrator=True)
@@ -32,7 +382,7 @@ class QueueingCog(commands.Cog):
         """Setup the queueing system."""
         await ctx.defer()
 
-        if await utils.get_queueing_settings(ctx.guild.id):
+        if await self.settings_cache.get(ctx.guild.id):
             await ctx.send("Queueing system is already set up.")
             return
 
@@ -90,6 +440,7 @@ class QueueingCog(commands.Cog):
         await utils.set_queueing_settings(
             ctx.guild.id, settings
         )
+        self.settings_cache.invalidate(ctx.guild.id)
         await ctx.send(
             f"Queueing system setup complete!"
         )
@@ -106,6 +457,8 @@ class QueueingCog(commands.Cog):
             f"Log Channel: {log_channel.mention} ({log_channel.id})\n"
             f"Sessions Channel: {sessions_channel.mention} ({sessions_channel.id})"
         )
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', log_message, ctx.author.id)
         await log_channel.send(log_message)
 
         # Start the guild loop after setup
@@ -117,12 +470,18 @@ class QueueingCog(commands.Cog):
     async def reset_settings(self, ctx: commands.Context, delete_channels: bool = False):
         """Reset the queueing system settings."""
         await ctx.defer()
-        guild_settings = await utils.get_queueing_settings(ctx.guild.id)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
         if not guild_settings:
             await ctx.send("Queueing system is not set up.")
             return
 
-        log_channel = ctx.guild.get_channel(guild_settings['log_channel_id'])
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(
+            ctx.guild.id, 'settings_change',
+            f"Queueing system reset by {ctx.author.mention} ({ctx.author.id}). Delete channels: {delete_channels}",
+            ctx.author.id
+        )
+        log_channel = guild_settings.handles(ctx.guild).log_channel
         if not delete_channels and log_channel:
             log_message = (
                 f"Queueing system reset by {ctx.author.mention} ({ctx.author.id})\n"
@@ -131,27 +490,40 @@ class QueueingCog(commands.Cog):
             await log_channel.send(log_message)
 
         if delete_channels:
-            queue_category = ctx.guild.get_channel(guild_settings['queue_category_id'])
-            if queue_category:
-                await queue_category.delete(reason='Queueing system reset')
-            queue_channel = ctx.guild.get_channel(guild_settings['queue_channel_id'])
-            if queue_channel:
-                await queue_channel.delete(reason='Queueing system reset')
-            session_calls_category = ctx.guild.get_channel(guild_settings['session_calls_category_id'])
+            progress = await ctx.send("Resetting queueing system...")
+
+            # Session calls go first so their category is empty by the time it is deleted
+            session_calls_category = guild_settings.handles(ctx.guild).session_calls_category
+            teardown = BulkOperation("Deleting session calls")
             if session_calls_category:
-                # Delete all voice channels under the Session Calls category
                 for channel in session_calls_category.channels:
                     if isinstance(channel, discord.VoiceChannel):
-                        await channel.delete(reason='Queueing system reset (Session Calls cleanup)')
-                await session_calls_category.delete(reason='Queueing system reset')
-            if log_channel:
-                await log_channel.delete(reason='Queueing system reset')
-            sessions_channel = ctx.guild.get_channel(guild_settings['sessions_channel_id'])
-            if sessions_channel:
-                await sessions_channel.delete(reason='Queueing system reset')
+                        teardown.add(channel.name, lambda c=channel: c.delete(reason='Queueing system reset (Session Calls cleanup)'))
+            failures = await teardown.run(progress)
+
+            teardown = BulkOperation("Deleting queueing channels")
+            status_channel_id = self.status_messages.get(ctx.guild.id, (None, None))[0]
+            channel_ids = [status_channel_id] + [guild_settings[key] for key in (
+                'queue_channel_id', 'log_channel_id', 'sessions_channel_id', 'queue_category_id', 'session_calls_category_id'
+            )]
+            for channel_id in channel_ids:
+                channel = ctx.guild.get_channel(channel_id) if channel_id else None
+                if channel:
+                    teardown.add(channel.name, lambda c=channel: c.delete(reason='Queueing system reset'))
+            failures += await teardown.run(progress)
+
+            # Keep the settings so running the command again resumes the teardown
+            if failures:
+                failed = ', '.join(f"`{label}` ({e})" for label, e in failures)
+                await ctx.send(f"Some channels could not be deleted: {failed}\nRun the command again to retry.")
+                return
         await utils.delete_queueing_settings(ctx.guild.id)
+        await utils.delete_guild_data(ctx.guild.id)
+        self.settings_cache.invalidate(ctx.guild.id)
+        await self.forget_guild(ctx.guild.id)
         try:
-            self.session_info.pop(ctx.guild.id, None)
+            for code in [code for code, session in self.session_info.items() if session.get('guild_id') == ctx.guild.id]:
+                self.forget_session(code)
             await ctx.send("Queueing system settings have been reset.")
         except:
             pass
@@ -159,12 +531,31 @@ class QueueingCog(commands.Cog):
         # Stop the guild loop after reset
         await self.stop_guild_loop(ctx.guild)
 
+    async def forget_guild(self, guild_id: int):
+        """Drop everything kept in memory for a guild whose settings were reset, after ``utils.delete_guild_data``."""
+        for check in set(self.ready_checks.get(guild_id, {}).values()):
+            await self.close_ready_check(check, CANCELLED, "Ready check cancelled, the queueing system was reset.")
+        self.ready_checks.pop(guild_id, None)
+        self.ready_check_settings.pop(guild_id, None)
+        async with self.inbox.lock(guild_id):
+            for member_id in list(self.queue.get(guild_id, {})):
+                self.dequeue(guild_id, member_id)
+        self.unsaved_queues.discard(guild_id)
+        self.scheduler.set_windows(guild_id, [])
+        self.autoscale.pop(guild_id, None)
+        self.arrivals.pop(guild_id, None)
+        self.timeouts.pop(guild_id, None)
+        self.possibly_empty.pop(guild_id, None)
+        self.status_messages.pop(guild_id, None)
+        self.status_dirty.discard(guild_id)
+        await self.load_federations()
+
     @commands.hybrid_command(name='pause', description='Pause the queueing system.')
     @commands.has_permissions(administrator=True)
     async def pause(self, ctx: commands.Context):
         """Pause the queueing system."""
         await ctx.defer()
-        guild_settings = await utils.get_queueing_settings(ctx.guild.id)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
         if not guild_settings:
             await ctx.send("Queueing system is not set up.")
             return
@@ -172,33 +563,45 @@ class QueueingCog(commands.Cog):
             await ctx.send("Queueing system is already paused.")
             return
         await utils.set_paused_status(ctx.guild.id, True)
+        self.settings_cache.invalidate(ctx.guild.id)
         await ctx.send("Queueing system has been paused.")
 
         # Logging
-        log_channel = ctx.guild.get_channel(guild_settings['log_channel_id'])
+        log_message = (
+            f"Queueing system paused by {ctx.author.mention} ({ctx.author.id})"
+        )
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', log_message, ctx.author.id)
+        log_channel = guild_settings.handles(ctx.guild).log_channel
         if log_channel:
-            log_message = (
-                f"Queueing system paused by {ctx.author.mention} ({ctx.author.id})"
-            )
             await log_channel.send(log_message)
 
         # Get every member in the queue channel and move them out
-        queue_channel = ctx.guild.get_channel(guild_settings['queue_channel_id'])
-        if queue_channel:
-            for member in queue_channel.members:
-                try:
-                    await member.move_to(None, reason="Queueing system paused.")
-                    await member.send("The queueing system has been paused.")
-                except Exception as e:
-                    if log_channel:
-                        await log_channel.send(f"Error moving {member.mention} out of queue channel: {str(e)}")
+        queue_channel = guild_settings.handles(ctx.guild).queue_channel
+        if queue_channel and queue_channel.members:
+            await self.evict_queue(ctx.guild, guild_settings, await ctx.send("Moving members out of the queue..."))
+
+    async def evict_queue(self, guild: discord.Guild, guild_settings: GuildSettings, progress: discord.Message = None):
+        """Move every member out of the queue channel and let them know the queue is paused."""
+        queue_channel = guild_settings.handles(guild).queue_channel
+        if not queue_channel:
+            return
+        evictions = BulkOperation("Moving members out of the queue")
+        for member in queue_channel.members:
+            evictions.add(member.mention, lambda m=member: m.move_to(None, reason="Queueing system paused."))
+            self.notifier.notify(member, "The queueing system has been paused.")
+        failures = await evictions.run(progress)
+        log_channel = guild_settings.handles(guild).log_channel
+        if log_channel:
+            for label, e in failures:
+                await log_channel.send(f"Error moving {label} out of queue channel: {str(e)}")
 
     @commands.hybrid_command(name='resume', description='Resume the queueing system.')
     @commands.has_permissions(administrator=True)
     async def resume(self, ctx: commands.Context):
         """Resume the queueing system."""
         await ctx.defer()
-        guild_settings = await utils.get_queueing_settings(ctx.guild.id)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
         if not guild_settings:
             await ctx.send("Queueing system is not set up.")
             return
@@ -206,21 +609,24 @@ class QueueingCog(commands.Cog):
             await ctx.send("Queueing system is not paused.")
             return
         await utils.set_paused_status(ctx.guild.id, False)
+        self.settings_cache.invalidate(ctx.guild.id)
         await ctx.send("Queueing system has been resumed.")
 
         # Logging
-        log_channel = ctx.guild.get_channel(guild_settings['log_channel_id'])
+        log_message = (
+            f"Queueing system resumed by {ctx.author.mention} ({ctx.author.id})"
+        )
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', log_message, ctx.author.id)
+        log_channel = guild_settings.handles(ctx.guild).log_channel
         if log_channel:
-            log_message = (
-                f"Queueing system resumed by {ctx.author.mention} ({ctx.author.id})"
-            )
             await log_channel.send(log_message)
 
     @commands.hybrid_command(name='queue-info', description='Get information about the queueing system.')
     async def queue_info(self, ctx: commands.Context):
         """Get information about the queueing system."""
         await ctx.defer()
-        guild_settings = await utils.get_queueing_settings(ctx.guild.id)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
         if not guild_settings:
             await ctx.send("Queueing system is not set up.")
             return
@@ -229,27 +635,588 @@ class QueueingCog(commands.Cog):
             title="Queueing System Information",
             color=random.randint(0, 0xFFFFFF)
         )
+        handles = guild_settings.handles(ctx.guild)
+
+        def mention(handle):
+            return handle.mention if handle else "Deleted"
+
         if ctx.author.guild_permissions.administrator:
-            info_embed.add_field(name="Admin Role", value=f"<@&{guild_settings['admin_role_id']}>", inline=True)
-            info_embed.add_field(name="Queue Category", value=ctx.guild.get_channel(guild_settings['queue_category_id']).mention, inline=True)
-            info_embed.add_field(name="Queue Channel", value=ctx.guild.get_channel(guild_settings['queue_channel_id']).mention, inline=True)
-            info_embed.add_field(name="Session Calls Category", value=ctx.guild.get_channel(guild_settings['session_calls_category_id']).mention, inline=True)
-            info_embed.add_field(name="Log Channel", value=ctx.guild.get_channel(guild_settings['log_channel_id']).mention, inline=True)
-            info_embed.add_field(name="Sessions Channel", value=ctx.guild.get_channel(guild_settings['sessions_channel_id']).mention, inline=True)
+            info_embed.add_field(name="Admin Role", value=mention(handles.admin_role), inline=True)
+            info_embed.add_field(name="Queue Category", value=mention(handles.queue_category), inline=True)
+            info_embed.add_field(name="Queue Channel", value=mention(handles.queue_channel), inline=True)
+            info_embed.add_field(name="Session Calls Category", value=mention(handles.session_calls_category), inline=True)
+            info_embed.add_field(name="Log Channel", value=mention(handles.log_channel), inline=True)
+            info_embed.add_field(name="Sessions Channel", value=mention(handles.sessions_channel), inline=True)
             info_embed.add_field(name="Amount to Queue", value=str(guild_settings.get('amount_to_queue')), inline=True)
             info_embed.add_field(name="Paused", value="Yes" if str(guild_settings.get('paused')) == "1" else "No", inline=True)
+            health = self.supervisor.health.get(ctx.guild.id)
+            info_embed.add_field(name="Loop Health", value=health.describe() if health else "Not running", inline=False)
         else:
-            info_embed.add_field(name="Admin Role", value=f"<@&{guild_settings['admin_role_id']}>", inline=True)
-            info_embed.add_field(name="Queue Category", value=ctx.guild.get_channel(guild_settings['queue_category_id']).mention, inline=True)
-            info_embed.add_field(name="Queue Channel", value=ctx.guild.get_channel(guild_settings['queue_channel_id']).mention, inline=True)
-            info_embed.add_field(name="Session Calls Category", value=ctx.guild.get_channel(guild_settings['session_calls_category_id']).mention, inline=True)
-            info_embed.add_field(name="Sessions Channel", value=ctx.guild.get_channel(guild_settings['sessions_channel_id']).mention, inline=True)
+            info_embed.add_field(name="Admin Role", value=mention(handles.admin_role), inline=True)
+            info_embed.add_field(name="Queue Category", value=mention(handles.queue_category), inline=True)
+            info_embed.add_field(name="Queue Channel", value=mention(handles.queue_channel), inline=True)
+            info_embed.add_field(name="Session Calls Category", value=mention(handles.session_calls_category), inline=True)
+            info_embed.add_field(name="Sessions Channel", value=mention(handles.sessions_channel), inline=True)
             info_embed.add_field(name="Amount to Queue", value=str(guild_settings.get('amount_to_queue')), inline=True)
             info_embed.add_field(name="Paused", value="Yes" if str(guild_settings.get('paused')) == "1" else "No", inline=True)
         
 
         await ctx.send(embed=info_embed)
 
+    @commands.hybrid_command(name='queue-dms', description='Choose whether the queueing system may send you direct messages.')
+    @app_commands.describe(enabled="Whether you want to receive direct messages from the queueing system.")
+    async def queue_dms(self, ctx: commands.Context, enabled: bool):
+        """Choose whether the queueing system may send you direct messages."""
+        await ctx.defer(ephemeral=True)
+        await self.notifier.set_opt_out(ctx.author.id, not enabled)
+        if enabled:
+            await ctx.send("You will now receive direct messages from the queueing system.", ephemeral=True)
+        else:
+            await ctx.send("You will no longer receive direct messages from the queueing system.", ephemeral=True)
+
+    @commands.hybrid_command(name='queue-position', description='See your position in the queue.')
+    async def queue_position(self, ctx: commands.Context):
+        """See your position in the queue."""
+        await ctx.defer(ephemeral=True)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.", ephemeral=True)
+            return
+
+        index = self.positions.get(ctx.guild.id)
+        position = index.position(ctx.author.id) if index else None
+        if position is None:
+            await ctx.send("You are not in the queue.", ephemeral=True)
+            return
+
+        estimator = self.eta.get(ctx.guild.id)
+        eta = estimator.eta(position, self.effective_amount(ctx.guild.id, guild_settings['amount_to_queue'])) if estimator else None
+        await ctx.send(
+            f"You are #{position} of {len(index)} in the queue.\n"
+            f"Estimated wait: {format_eta(eta)}",
+            ephemeral=True
+        )
+
+    @commands.hybrid_command(name='queue-status-message', description='Enable or disable the live queue status message.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(enabled="Whether a live queue status message should be kept in the queue category.")
+    async def queue_status_message(self, ctx: commands.Context, enabled: bool):
+        """Enable or disable the live queue status message."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+
+        existing = self.status_messages.pop(ctx.guild.id, None)
+        if existing:
+            channel = ctx.guild.get_channel(existing[0])
+            if channel:
+                try:
+                    await channel.delete(reason='Queue status message disabled')
+                except discord.NotFound:
+                    pass
+            await utils.delete_status_message(ctx.guild.id)
+
+        if not enabled:
+            await ctx.send("Live queue status message disabled.")
+            return
+
+        overwrites = {
+            ctx.guild.default_role: discord.PermissionOverwrite(read_messages=True, send_messages=False),
+            ctx.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        channel = await ctx.guild.create_text_channel(
+            'queue-status',
+            category=guild_settings.handles(ctx.guild).queue_category,
+            overwrites=overwrites,
+            reason='Queue status message enabled'
+        )
+        message = await channel.send(embed=self.build_status_embed(ctx.guild, guild_settings))
+        await utils.set_status_message(ctx.guild.id, channel.id, message.id)
+        self.status_messages[ctx.guild.id] = (channel.id, message.id)
+        await ctx.send(f"Live queue status message enabled in {channel.mention}.")
+
+    def build_status_embed(self, guild: discord.Guild, guild_settings: GuildSettings) -> discord.Embed:
+        """Build the live queue status embed for a guild."""
+        amount_to_queue = self.effective_amount(guild.id, guild_settings['amount_to_queue'])
+        in_queue = len(self.queue.get(guild.id, {}))
+        estimator = self.eta.get(guild.id)
+        next_session = estimator.eta(amount_to_queue, amount_to_queue) if estimator else None
+
+        status_embed = discord.Embed(title="Queue Status", color=0x5865F2, timestamp=discord.utils.utcnow())
+        status_embed.add_field(name="In Queue", value=str(in_queue), inline=True)
+        status_embed.add_field(name="Amount to Queue", value=str(amount_to_queue), inline=True)
+        status_embed.add_field(name="Paused", value="Yes" if guild_settings.get('paused') else "No", inline=True)
+        status_embed.add_field(name="Next Session", value=format_eta(next_session), inline=True)
+        status_embed.set_footer(text="Use /queue-position to see your place in the queue.")
+        return status_embed
+
+    @tasks.loop(seconds=15)
+    async def update_status_messages(self):
+        """Edit the status message of every guild whose queue changed since the last run."""
+        dirty = self.status_dirty & self.status_messages.keys()
+        self.status_dirty.clear()
+        for guild_id in dirty:
+            if not self.admission.admit('embed', guild_id):
+                self.status_dirty.add(guild_id)  # Try again next time
+                continue
+            guild = self.bot.get_guild(guild_id)
+            guild_settings = await self.settings_cache.get(guild_id)
+            if not guild or not guild_settings:
+                continue
+            channel_id, message_id = self.status_messages[guild_id]
+            channel = guild.get_channel(channel_id)
+            if not channel:
+                continue
+            try:
+                await channel.get_partial_message(message_id).edit(embed=self.build_status_embed(guild, guild_settings))
+            except discord.HTTPException:
+                pass
+
+    @update_status_messages.before_loop
+    async def before_update_status_messages(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(minutes=10)
+    async def evict_stale_sessions(self):
+        """Forget sessions whose channel is gone or that are older than the configured maximum age."""
+        cutoff = discord.utils.utcnow() - timedelta(hours=settings.SESSION_INFO_MAX_AGE_HOURS)
+        for code, session in list(self.session_info.items()):
+            guild = self.bot.get_guild(session.get('guild_id'))
+            channel_gone = guild is not None and guild.get_channel(session['channel_id']) is None
+            if channel_gone or session['started_at'] < cutoff:
+                self.forget_session(code)
+                self.evicted_sessions += 1
+                if session.get('guild_id') is None:
+                    continue
+                self.audit.record(
+                    session['guild_id'], 'session_end',
+                    f"Session {code} evicted ({'channel deleted' if channel_gone else 'too old'}): channel {session['channel_id']}. "
+                    f"Started: {session['started_at'].isoformat()}"
+                )
+
+    @evict_stale_sessions.before_loop
+    async def before_evict_stale_sessions(self):
+        await self.bot.wait_until_ready()
+
+    def memory_usage(self) -> dict[int, dict[str, int]]:
+        """Approximate the bytes of queue, session and task state held for each guild."""
+        usage = {}
+
+        def add(guild_id, kind, obj):
+            usage.setdefault(guild_id, {'queue': 0, 'sessions': 0, 'tasks': 0})[kind] += deep_sizeof(obj)
+
+        for guild_id, queue in self.queue.items():
+            add(guild_id, 'queue', queue)
+        for guild_id, index in self.positions.items():
+            add(guild_id, 'queue', index)
+        for guild_id, pending in self.inbox.pending.items():
+            add(guild_id, 'queue', pending)
+        for session in self.session_info.values():
+            add(session.get('guild_id'), 'sessions', session)
+        for guild_id, estimator in self.eta.items():
+            add(guild_id, 'sessions', estimator)
+        for guild_id, arrivals in self.arrivals.items():
+            add(guild_id, 'tasks', arrivals)
+        for guild_id, health in self.supervisor.health.items():
+            add(guild_id, 'tasks', health)
+        # Timers reference their wheel bucket and callback, so only count what they hold per guild
+        for timer in [*self.scheduler.pending.values(), *self.expiry_timers.values(), *self.idle_timers.values(), *self.max_timers.values()]:
+            add(timer.args[0], 'tasks', timer.args)
+        return usage
+
+    @commands.hybrid_command(name='queue-window-add', description='Add a recurring window during which the queue is open.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        days="Days the window opens on, e.g. mon-fri, sat,sun or * for every day",
+        start="Time the queue opens, HH:MM in UTC",
+        end="Time the queue closes, HH:MM in UTC"
+    )
+    async def queue_window_add(self, ctx: commands.Context, days: str, start: str, end: str):
+        """Add a recurring window during which the queue is open."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+        try:
+            days = parse_days(days)
+            start_minute = parse_time(start)
+            end_minute = parse_time(end)
+        except ValueError:
+            await ctx.send("Invalid window. Use days like `mon-fri` or `*` and times like `18:00`.")
+            return
+
+        window_id = await utils.add_queue_window(ctx.guild.id, days, start_minute, end_minute)
+        await self.scheduler.reload(ctx.guild.id)
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"Queue window {window_id} ({days} {start}-{end} UTC) added by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(f"Queue window {window_id} added: {days} {start}-{end} UTC.")
+
+        # Logging
+        log_channel = guild_settings.handles(ctx.guild).log_channel
+        if log_channel:
+            await log_channel.send(
+                f"Queue window {window_id} ({days} {start}-{end} UTC) added by {ctx.author.mention} ({ctx.author.id})"
+            )
+
+        # Bring the queue in line with the schedule straight away
+        await self.apply_schedule(ctx.guild.id, self.scheduler.is_open(ctx.guild.id))
+
+    @commands.hybrid_command(name='queue-window-remove', description='Remove a queue window.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(window_id="The ID of the window to remove, as shown by /queue-windows")
+    @app_commands.rename(window_id="window-id")
+    async def queue_window_remove(self, ctx: commands.Context, window_id: int):
+        """Remove a queue window."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+        if not await utils.delete_queue_window(ctx.guild.id, window_id):
+            await ctx.send(f"There is no queue window with ID {window_id}.")
+            return
+        await self.scheduler.reload(ctx.guild.id)
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"Queue window {window_id} removed by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(f"Queue window {window_id} removed.")
+
+        # Logging
+        log_channel = guild_settings.handles(ctx.guild).log_channel
+        if log_channel:
+            await log_channel.send(f"Queue window {window_id} removed by {ctx.author.mention} ({ctx.author.id})")
+
+        # Bring the queue in line with the schedule straight away
+        await self.apply_schedule(ctx.guild.id, self.scheduler.is_open(ctx.guild.id))
+
+    @commands.hybrid_command(name='queue-windows', description='List the queue windows.')
+    async def queue_windows(self, ctx: commands.Context):
+        """List the queue windows."""
+        await ctx.defer()
+        windows = await utils.get_queue_windows(ctx.guild.id)
+        if not windows:
+            await ctx.send("No queue windows are set. The queue is only paused and resumed manually.")
+            return
+        lines = [
+            f"`{window_id}`: {days} {start // 60:02}:{start % 60:02}-{end // 60:02}:{end % 60:02} UTC"
+            for window_id, _, days, start, end in windows
+        ]
+        await ctx.send("Queue windows:\n" + "\n".join(lines))
+
+    @commands.hybrid_command(name='queue-autoscale', description='Size sessions automatically from how fast members join.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        enabled="Whether sessions should be sized automatically",
+        target_wait="The longest, in minutes, a member should wait for a session to fill",
+        min_size="The smallest session size to use",
+        max_size="The largest session size to use"
+    )
+    @app_commands.rename(target_wait="target-wait", min_size="min-size", max_size="max-size")
+    async def queue_autoscale(self, ctx: commands.Context, enabled: bool, target_wait: int = 5, min_size: int = 2, max_size: int = 10):
+        """Size sessions automatically from how fast members join."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+
+        if enabled:
+            if target_wait < 1 or min_size < 1 or max_size < min_size:
+                await ctx.send("The target wait must be at least 1 minute and the sizes must satisfy 1 <= min-size <= max-size.")
+                return
+            await utils.set_autoscale_settings(ctx.guild.id, target_wait * 60, min_size, max_size)
+            self.autoscale[ctx.guild.id] = (target_wait * 60, min_size, max_size)
+            message = f"Automatic session sizing enabled: {min_size}-{max_size} members, target wait {target_wait} minutes."
+        else:
+            await utils.delete_autoscale_settings(ctx.guild.id)
+            self.autoscale.pop(ctx.guild.id, None)
+            message = f"Automatic session sizing disabled. Sessions use the amount to queue ({guild_settings['amount_to_queue']})."
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"{message} Changed by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(message)
+
+        # Logging
+        log_channel = guild_settings.handles(ctx.guild).log_channel
+        if log_channel:
+            await log_channel.send(f"{message} Changed by {ctx.author.mention} ({ctx.author.id})")
+
+    @commands.hybrid_command(name='queue-timeouts', description='Set when idle sessions, long sessions and stale queue entries end.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        idle_minutes="How long a session call may stay empty before it is deleted (0 deletes it right away)",
+        max_session_minutes="How long a session may last before it is ended (0 for no limit)",
+        queue_expiry_minutes="How long a member may wait in the queue before they are removed (0 for no limit)"
+    )
+    @app_commands.rename(idle_minutes="idle-minutes", max_session_minutes="max-session-minutes", queue_expiry_minutes="queue-expiry-minutes")
+    async def queue_timeouts(self, ctx: commands.Context, idle_minutes: int = 0, max_session_minutes: int = 0, queue_expiry_minutes: int = 0):
+        """Set when idle sessions, long sessions and stale queue entries end."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+        if min(idle_minutes, max_session_minutes, queue_expiry_minutes) < 0:
+            await ctx.send("Timeouts cannot be negative.")
+            return
+
+        if idle_minutes or max_session_minutes or queue_expiry_minutes:
+            timeouts = (idle_minutes * 60, max_session_minutes * 60, queue_expiry_minutes * 60)
+            await utils.set_timeout_settings(ctx.guild.id, *timeouts)
+            self.timeouts[ctx.guild.id] = timeouts
+        else:
+            await utils.delete_timeout_settings(ctx.guild.id)
+            self.timeouts.pop(ctx.guild.id, None)
+        self.arm_timeouts(ctx.guild.id)
+
+        message = (
+            f"Timeouts updated. Idle session calls are deleted {f'after {idle_minutes} minutes' if idle_minutes else 'right away'}, "
+            f"sessions {f'end after {max_session_minutes} minutes' if max_session_minutes else 'have no length limit'} and "
+            f"queued members {f'are removed after {queue_expiry_minutes} minutes' if queue_expiry_minutes else 'can wait indefinitely'}."
+        )
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"{message} Changed by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(message)
+
+        # Logging
+        log_channel = guild_settings.handles(ctx.guild).log_channel
+        if log_channel:
+            await log_channel.send(f"{message} Changed by {ctx.author.mention} ({ctx.author.id})")
+
+    @commands.hybrid_command(name='queue-ready-check', description='Ask members to confirm they are ready before a session is created.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        timeout_seconds="How long members have to press Ready, between 10 and 600 seconds (0 turns ready checks off)",
+        non_responders="What happens to members who do not confirm in time or press Not now"
+    )
+    @app_commands.rename(timeout_seconds="timeout-seconds", non_responders="non-responders")
+    @app_commands.choices(non_responders=[app_commands.Choice(name=action, value=action) for action in NON_RESPONDER_ACTIONS])
+    async def queue_ready_check(self, ctx: commands.Context, timeout_seconds: int = 0, non_responders: str = 'requeue'):
+        """Ask members to confirm they are ready before a session is created."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+        if non_responders not in NON_RESPONDER_ACTIONS:
+            await ctx.send(f"Non-responders must be one of: {', '.join(NON_RESPONDER_ACTIONS)}")
+            return
+        if timeout_seconds and not 10 <= timeout_seconds <= 600:
+            await ctx.send("The timeout must be between 10 and 600 seconds, or 0 to turn ready checks off.")
+            return
+
+        if timeout_seconds:
+            await utils.set_ready_check_settings(ctx.guild.id, timeout_seconds, non_responders)
+            self.ready_check_settings[ctx.guild.id] = (timeout_seconds, non_responders)
+            message = (
+                f"Ready checks enabled. Members picked for a session have {timeout_seconds} seconds to confirm, and members who do not are "
+                f"{'moved to the back of the queue' if non_responders == 'requeue' else 'removed from the queue'}."
+            )
+        else:
+            await utils.delete_ready_check_settings(ctx.guild.id)
+            self.ready_check_settings.pop(ctx.guild.id, None)
+            message = "Ready checks disabled. Sessions are created as soon as enough members are queued."
+
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"{message} Changed by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(message)
+
+        # Logging
+        log_channel = guild_settings.handles(ctx.guild).log_channel
+        if log_channel:
+            await log_channel.send(f"{message} Changed by {ctx.author.mention} ({ctx.author.id})")
+
+    @commands.hybrid_command(name='queue-audit', description='Search the queueing system audit log.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        query="Words to search for in event details",
+        kind="Only show events of this kind",
+        member="Only show events about this member",
+        page="The page of results to show"
+    )
+    @app_commands.choices(kind=[app_commands.Choice(name=kind, value=kind) for kind in EVENT_KINDS])
+    async def queue_audit(self, ctx: commands.Context, query: str = None, kind: str = None, member: discord.Member = None, page: int = 1):
+        """Search the queueing system audit log."""
+        await ctx.defer(ephemeral=True)
+        if kind is not None and kind not in EVENT_KINDS:
+            await ctx.send(f"Unknown event kind. Use one of: {', '.join(EVENT_KINDS)}", ephemeral=True)
+            return
+
+        # Make sure events recorded moments ago are searchable
+        await self.audit.flush()
+        per_page = 10
+        page = max(page, 1)
+        events = await utils.search_audit_events(
+            ctx.guild.id, query=query, kind=kind, member_id=member.id if member else None,
+            limit=per_page + 1, offset=(page - 1) * per_page
+        )
+        if not events:
+            await ctx.send("No matching audit events.", ephemeral=True)
+            return
+
+        audit_embed = discord.Embed(title="Audit Log", color=random.randint(0, 0xFFFFFF))
+        lines = []
+        for event_id, created_at, event_kind, member_id, details in events[:per_page]:
+            details = details.replace("\n", " ")
+            if len(details) > 150:
+                details = details[:147] + "..."
+            lines.append(f"`#{event_id}` <t:{int(created_at)}:f> **{event_kind}** {details}")
+        audit_embed.description = "\n".join(lines)[:4096]
+        audit_embed.set_footer(text=f"Page {page}" + (" - more results on the next page" if len(events) > per_page else ""))
+        await ctx.send(embed=audit_embed, ephemeral=True)
+
+    @commands.hybrid_command(name='queue-export', description='Export session and queue history as a file.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        dataset="The history to export",
+        file_format="The file format",
+        compress="Gzip the file",
+        incremental="Only export what was added since the last incremental export"
+    )
+    @app_commands.rename(file_format="format")
+    @app_commands.choices(
+        dataset=[app_commands.Choice(name=dataset, value=dataset) for dataset in export.DATASETS],
+        file_format=[app_commands.Choice(name=fmt, value=fmt) for fmt in export.FORMATS]
+    )
+    async def queue_export(self, ctx: commands.Context, dataset: str, file_format: str = 'csv', compress: bool = False, incremental: bool = False):
+        """Export session and queue history as a file."""
+        await ctx.defer(ephemeral=True)
+        if dataset not in export.DATASETS or file_format not in export.FORMATS:
+            await ctx.send(f"Use one of {', '.join(export.DATASETS)} as the dataset and {', '.join(export.FORMATS)} as the format.", ephemeral=True)
+            return
+        if dataset == 'queue_events':
+            await self.audit.flush()
+
+        checkpoint = f"guild-{ctx.guild.id}"
+        after_id = await utils.get_export_checkpoint(checkpoint, dataset) if incremental else 0
+        filename = f"{dataset}_{ctx.guild.id}_{int(time.time())}.{file_format}" + (".gz" if compress else "")
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, filename)
+            count, last_id = await asyncio.to_thread(export.export_to_file, path, dataset, file_format, compress, ctx.guild.id, after_id)
+            if not count:
+                await ctx.send("Nothing to export" + (" since the last incremental export." if incremental else "."), ephemeral=True)
+                return
+            if os.path.getsize(path) > ctx.guild.filesize_limit:
+                await ctx.send(
+                    f"The export is too large to upload ({os.path.getsize(path) // 1024} KiB). "
+                    f"Try `compress`, or run `python -m settings.export {dataset} --guild {ctx.guild.id}` on the bot's host.",
+                    ephemeral=True
+                )
+                return
+            await ctx.send(f"Exported {count} rows.", file=discord.File(path, filename=filename), ephemeral=True)
+        # Only advance the checkpoint once the file has been delivered
+        if incremental:
+            await utils.set_export_checkpoint(checkpoint, dataset, last_id, time.time())
+
+    @commands.hybrid_command(name='federation-create', description='Create a federation that shares its queue with other servers.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        name="A name for the federation",
+        contribution_limit="The most members this server contributes to one session"
+    )
+    @app_commands.rename(contribution_limit="contribution-limit")
+    async def federation_create(self, ctx: commands.Context, name: str, contribution_limit: int = 2):
+        """Create a federation that shares its queue with other servers."""
+        await ctx.defer(ephemeral=True)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.", ephemeral=True)
+            return
+        if ctx.guild.id in self.guild_pools:
+            await ctx.send("This server is already part of a federation. Use /federation-leave first.", ephemeral=True)
+            return
+        if contribution_limit < 1:
+            await ctx.send("The contribution limit must be at least 1.", ephemeral=True)
+            return
+
+        join_code = secrets.token_hex(4)
+        await utils.create_federation(name, join_code, ctx.guild.id, contribution_limit)
+        await self.load_federations()
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"Federation {name} created by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(
+            f"Federation **{name}** created. Sessions will be hosted in this server.\n"
+            f"Other servers can join with `/federation-join {join_code}`",
+            ephemeral=True
+        )
+
+    @commands.hybrid_command(name='federation-join', description='Join a federation and share this server\'s queue with it.')
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        join_code="The code given by the federation's host server",
+        contribution_limit="The most members this server contributes to one session"
+    )
+    @app_commands.rename(join_code="join-code", contribution_limit="contribution-limit")
+    async def federation_join(self, ctx: commands.Context, join_code: str, contribution_limit: int = 2):
+        """Join a federation and share this server's queue with it."""
+        await ctx.defer()
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
+        if not guild_settings:
+            await ctx.send("Queueing system is not set up.")
+            return
+        if ctx.guild.id in self.guild_pools:
+            await ctx.send("This server is already part of a federation. Use /federation-leave first.")
+            return
+        if contribution_limit < 1:
+            await ctx.send("The contribution limit must be at least 1.")
+            return
+        federation = await utils.get_federation_by_code(join_code)
+        if not federation:
+            await ctx.send("There is no federation with that join code.")
+            return
+
+        federation_id, name, _, host_guild_id = federation
+        await utils.set_federation_member(ctx.guild.id, federation_id, contribution_limit)
+        await self.load_federations()
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"Joined federation {name} by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        host = self.bot.get_guild(host_guild_id)
+        await ctx.send(
+            f"Joined federation **{name}**. Up to {contribution_limit} members from this server can be invited "
+            f"to each session hosted in **{host.name if host else host_guild_id}** when queues are quiet."
+        )
+
+    @commands.hybrid_command(name='federation-leave', description='Stop sharing this server\'s queue with its federation.')
+    @commands.has_permissions(administrator=True)
+    async def federation_leave(self, ctx: commands.Context):
+        """Stop sharing this server's queue with its federation."""
+        await ctx.defer()
+        pool = self.guild_pools.get(ctx.guild.id)
+        if pool is None:
+            await ctx.send("This server is not part of a federation.")
+            return
+        if pool.host_guild_id == ctx.guild.id:
+            await utils.delete_federation(pool.federation_id)
+            message = f"Federation **{pool.name}** has been disbanded."
+        else:
+            await utils.delete_federation_member(ctx.guild.id)
+            message = f"This server has left federation **{pool.name}**."
+        await self.load_federations()
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', f"{message} Changed by {ctx.author.mention} ({ctx.author.id})", ctx.author.id)
+        await ctx.send(message)
+
+    @commands.hybrid_command(name='federation-info', description='Show the federation this server is part of.')
+    async def federation_info(self, ctx: commands.Context):
+        """Show the federation this server is part of."""
+        await ctx.defer()
+        pool = self.guild_pools.get(ctx.guild.id)
+        if pool is None:
+            await ctx.send("This server is not part of a federation.")
+            return
+        host = self.bot.get_guild(pool.host_guild_id)
+        info_embed = discord.Embed(title=f"Federation: {pool.name}", color=random.randint(0, 0xFFFFFF))
+        info_embed.add_field(name="Host", value=host.name if host else str(pool.host_guild_id), inline=True)
+        info_embed.add_field(name="Queued Across Servers", value=str(len(pool)), inline=True)
+        info_embed.add_field(name="Contributing Servers", value=str(pool.contributing_guilds()), inline=True)
+        servers = []
+        for guild_id, limit in pool.limits.items():
+            guild = self.bot.get_guild(guild_id)
+            servers.append(f"{guild.name if guild else guild_id}: {pool.counts.get(guild_id, 0)} queued, limit {limit}")
+        info_embed.add_field(name="Servers", value="\n".join(servers)[:1024], inline=False)
+        await ctx.send(embed=info_embed)
+
     @commands.hybrid_command(name='change-q-amount', description='Change the amount of users to queue before a session is created.')
     @commands.has_permissions(administrator=True)
     @app_commands.describe(amount_to_queue="The new amount of users to queue before a session is created.")
@@ -258,20 +1225,23 @@ class QueueingCog(commands.Cog):
         """Change the amount of users to queue before a session is created."""
         self.changing = True
         await ctx.defer()
-        guild_settings = await utils.get_queueing_settings(ctx.guild.id)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
         if not guild_settings:
             await ctx.send("Queueing system is not set up.")
             return
 
         # Update the amount to queue
         await utils.set_amount_to_queue(ctx.guild.id, amount_to_queue)
+        self.settings_cache.invalidate(ctx.guild.id)
         await ctx.send(f"Amount to queue has been changed to {amount_to_queue}.")
         # Logging
-        log_channel = ctx.guild.get_channel(guild_settings['log_channel_id'])
+        log_message = (
+            f"Amount to queue changed by {ctx.author.mention} ({ctx.author.id}) to {amount_to_queue}."
+        )
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', log_message, ctx.author.id)
+        log_channel = guild_settings.handles(ctx.guild).log_channel
         if log_channel:
-            log_message = (
-                f"Amount to queue changed by {ctx.author.mention} ({ctx.author.id}) to {amount_to_queue}."
-            )
             await log_channel.send(log_message)
 
     @commands.hybrid_command(name='edit-settings', description='Edit any queueing system setting. All parameters are optional.')
@@ -300,13 +1270,13 @@ class QueueingCog(commands.Cog):
     ):
         """Edit any queueing system setting. All parameters are optional."""
         await ctx.defer()
-        guild_settings = await utils.get_queueing_settings(ctx.guild.id)
+        guild_settings = await self.settings_cache.get(ctx.guild.id)
         if not guild_settings:
             await ctx.send("Queueing system is not set up.")
             return
 
         # Build new settings dict, using provided values or existing ones
-        new_settings = guild_settings.copy()
+        new_settings = guild_settings.as_dict()
         if admin_role is not None:
             new_settings['admin_role_id'] = admin_role.id
         if queue_category is not None:
@@ -325,316 +1295,677 @@ class QueueingCog(commands.Cog):
             new_settings['paused'] = paused
 
         await utils.set_queueing_settings(ctx.guild.id, new_settings)
+        self.settings_cache.invalidate(ctx.guild.id)
 
         # Logging
+        log_message = (
+            f"Queueing system settings updated by {ctx.author.mention} ({ctx.author.id}):\n"
+            f"admin_role_id: {new_settings['admin_role_id']}\n"
+            f"queue_category_id: {new_settings['queue_category_id']}\n"
+            f"queue_channel_id: {new_settings['queue_channel_id']}\n"
+            f"session_calls_category_id: {new_settings['session_calls_category_id']}\n"
+            f"log_channel_id: {new_settings['log_channel_id']}\n"
+            f"sessions_channel_id: {new_settings['sessions_channel_id']}\n"
+            f"amount_to_queue: {new_settings['amount_to_queue']}\n"
+            f"paused: {new_settings['paused']}"
+        )
+        self.mark_changed(ctx.guild.id)
+        self.audit.record(ctx.guild.id, 'settings_change', log_message, ctx.author.id)
         log_channel = ctx.guild.get_channel(new_settings['log_channel_id'])
         if log_channel:
-            log_message = (
-                f"Queueing system settings updated by {ctx.author.mention} ({ctx.author.id}):\n"
-                f"admin_role_id: {new_settings['admin_role_id']}\n"
-                f"queue_category_id: {new_settings['queue_category_id']}\n"
-                f"queue_channel_id: {new_settings['queue_channel_id']}\n"
-                f"session_calls_category_id: {new_settings['session_calls_category_id']}\n"
-                f"log_channel_id: {new_settings['log_channel_id']}\n"
-                f"sessions_channel_id: {new_settings['sessions_channel_id']}\n"
-                f"amount_to_queue: {new_settings['amount_to_queue']}\n"
-                f"paused: {new_settings['paused']}"
-            )
             await log_channel.send(log_message)
 
         await ctx.send("Queueing system settings updated.")
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        guild_settings = await utils.get_queueing_settings(member.guild.id)
+        if before.channel == after.channel:
+            return
+        self.tracer.record(member, before, after)
+        self.admission.record_event(member.guild.id)
+        self.inbox.put(member, before, after)
 
+    async def process_voice_updates(self, guild_id: int, updates: list[VoiceUpdate]):
+        """Apply a batch of coalesced voice updates to a guild's queue. Runs under the guild's inbox lock."""
+        guild_settings = await self.settings_cache.get(guild_id)
         if not guild_settings:
             return
 
-        # Check if the member has joined a voice channel
-        if (before.channel is None and after.channel is not None) or (after.channel and after.channel.id == guild_settings['queue_channel_id']):
+        queue_channel_id = guild_settings['queue_channel_id']
+        log_lines = []
+        changed = False
+
+        for update in updates:
+            member = update.member
+
+            # Session calls end once they have stayed empty for the idle timeout. Calls members left are checked
+            # on the next tick, which also covers calls this instance did not create, e.g. from before a restart.
+            if update.after_id in self.idle_timers:
+                self.timers.cancel(self.idle_timers.pop(update.after_id))
+            if update.before_id in self.session_channels or (
+                update.before_id and getattr(member.guild.get_channel(update.before_id), 'category_id', None) == guild_settings.session_calls_category_id
+            ):
+                self.possibly_empty.setdefault(guild_id, set()).add(update.before_id)
+
+            # The member has joined the queue channel
+            if update.joined(queue_channel_id):
+                queue_channel = member.guild.get_channel(queue_channel_id)
+
+                # If the queueing system is paused, do not allow joining
+                # and move the member out of the queue channel
+                if guild_settings.get('paused'):
+                    try:
+                        await member.move_to(None, reason="Queueing system is paused.")
+                    except discord.HTTPException:
+                        pass
+                    self.notifier.notify(member, "The queueing system is currently paused. You cannot join the queue channel.")
+                    continue
+
+                # Add member to queue dictionary
+                if self.enqueue(guild_id, member):
+                    changed = True
+                    log_lines.append(
+                        f"[Queue Join] {member.name}#{member.discriminator} ({member.id}) "
+                        f"joined the queue: {queue_channel.mention if queue_channel else queue_channel_id}."
+                    )
+                    self.audit.record(guild_id, 'join', log_lines[-1], member.id)
+
+            # The member has left the queue channel
+            elif update.left(queue_channel_id):
+                queue_channel = member.guild.get_channel(queue_channel_id)
+
+                # Remove member from queue dictionary. Members moved into a session or removed by a ready check
+                # or an expiry were already dequeued, so their leaving is not logged again
+                if self.dequeue(guild_id, member.id):
+                    changed = True
+                    log_lines.append(
+                        f"[Queue Left] {member.name}#{member.discriminator} ({member.id}) "
+                        f"left the queue: {queue_channel.mention if queue_channel else queue_channel_id}."
+                    )
+                    self.audit.record(guild_id, 'leave', log_lines[-1], member.id)
+
+        if changed:
+            self.save_queue(guild_id)
+
+        guild = self.bot.get_guild(guild_id)
+        logging_channel = guild_settings.handles(guild).log_channel if guild else None
+        if logging_channel and log_lines and self.admission.admit('log', guild_id):
+            # Send the whole batch at once, split to stay under Discord's message limit
+            message = ""
+            for line in log_lines:
+                if len(message) + len(line) + 1 > 2000:
+                    await logging_channel.send(message)
+                    message = ""
+                message += line + "\n"
+            await logging_channel.send(message)
+
+    def save_queue(self, guild_id: int):
+        """Save a guild's queue to the database in the background. Saves requested while one is running are coalesced."""
+        self.unsaved_queues.add(guild_id)
+        if self.queue_writer is None or self.queue_writer.done():
+            self.queue_writer = asyncio.create_task(self.write_queues())
+
+    async def write_queues(self):
+        while self.unsaved_queues:
+            guild_id = self.unsaved_queues.pop()
+            entries = [(member_id, entry['joined_at'].timestamp()) for member_id, entry in self.queue.get(guild_id, {}).items()]
+            try:
+                await utils.replace_queue_entries(guild_id, entries)
+            except Exception as e:
+                print(f"Failed to save the queue of guild {guild_id}: {e}")
 
-            # The member has joined a voice channel
-            queue_channel = member.guild.get_channel(guild_settings['queue_channel_id']) if guild_settings else None
+    async def start_all_guild_loops(self):
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            settings = await self.settings_cache.get(guild.id)
+            if settings and not settings.get("paused"):
+                await self.start_guild_loop(guild)
 
-            if not queue_channel or after.channel.id != queue_channel.id:
-                # If the member is not joining the queue channel, do nothing
-                return
+    async def start_guild_loop(self, guild: discord.Guild):
+        if guild.id in self.supervisor:
+            return
+        guild_settings = await self.settings_cache.get(guild.id)
+        handles = guild_settings.handles(guild) if guild_settings else None
+        if handles and handles.session_calls_category:
+            # Calls may have emptied while nothing was watching them, e.g. while the bot was offline or reloading
+            self.possibly_empty.setdefault(guild.id, set()).update(vc.id for vc in handles.session_calls_category.voice_channels)
+        if handles and handles.queue_channel:
+            await self.load_queue(guild, handles.queue_channel)
+        print(f"Loop running for {guild.name}")
+        self.supervisor.add(guild)
+
+    async def load_queue(self, guild: discord.Guild, queue_channel: discord.VoiceChannel):
+        """
+        Rebuild a guild's queue from the database and its queue channel, e.g. after a restart.
+
+        Stored members still in the queue channel get their place back, members who joined the channel while
+        the bot was not watching go to the back, and stored members who left in the meantime are dropped.
+        Members already queued in memory, e.g. adopted from a reload, are kept as they are.
+        """
+        async with self.inbox.lock(guild.id):
+            # The legacy file's join order has to be in the database before the loaded queue is saved over it
+            await migrations.import_legacy_queue(guild.id)
+            stored = await utils.get_queue_entries(guild.id)
+            in_channel = {member.id: member for member in queue_channel.members}
+            changed = False
+            for member_id, joined_at in stored:
+                if member_id in in_channel:
+                    changed |= self.enqueue(guild.id, in_channel[member_id], datetime.fromtimestamp(joined_at, timezone.utc))
+            for member in in_channel.values():
+                changed |= self.enqueue(guild.id, member)
+            if changed or len(stored) != len(self.queue.get(guild.id, {})):
+                self.save_queue(guild.id)
+
+    async def adopt_guild_loop(self, guild: discord.Guild):
+        """
+        Resume the loop of a guild whose queue was adopted from the previous instance of this cog.
+
+        The adopted queue and settings are current, so nothing is read again. Only voice updates missed while the
+        cog was reloading are caught up on: queued members who left the queue channel are dropped, and session
+        calls that emptied are checked by the next tick.
+        """
+        guild_settings = await self.settings_cache.get(guild.id)
+        handles = guild_settings.handles(guild) if guild_settings else None
+        if handles and handles.queue_channel:
+            async with self.inbox.lock(guild.id):
+                in_channel = {member.id for member in handles.queue_channel.members}
+                departed = [member_id for member_id in self.queue.get(guild.id, {}) if member_id not in in_channel]
+                for member_id in departed:
+                    self.dequeue(guild.id, member_id)
+                if departed:
+                    self.save_queue(guild.id)
+                    self.mark_changed(guild.id)
+        for channel_id, code in self.session_channels.items():
+            if self.session_info[code].get('guild_id') == guild.id:
+                channel = guild.get_channel(channel_id)
+                if channel and not channel.members:
+                    self.possibly_empty.setdefault(guild.id, set()).add(channel_id)
+        self.supervisor.add(guild)
 
-            # If the queueing system is paused or non-existent, do not allow joining
-            # and move the member out of the queue channel
-            if not guild_settings or guild_settings.get('paused'):
-                await member.move_to(None, reason="Queueing system is paused.")
-                await member.send("The queueing system is currently paused. You cannot join the queue channel.")
-                return
-            
-            # Add member to queue dictionary
-            if not hasattr(self, "queue"):
-                self.queue = {}
-            if member.id not in self.queue:
-                self.queue[member.id] = {
-                    'member': member,
-                    'joined_at': discord.utils.utcnow()
-                }
-
-            # Save queue to JSON file or delete if empty
-            queue_file = f"queues/queue_{member.guild.id}.json"
-            if self.queue:
-                queue_data = {
-                    str(k): {
-                        'member_id': v['member'].id,
-                        'joined_at': v['joined_at'].isoformat() if hasattr(v['joined_at'], 'isoformat') else str(v['joined_at'])
-                    }
-                    for k, v in self.queue.items()
-                }
-                with open(queue_file, "w", encoding="utf-8") as f:
-                    json.dump(queue_data, f, indent=2)
-                    f.close()
-
-            # Log the join event
-            logging_channel = member.guild.get_channel(guild_settings['log_channel_id'])
-            if logging_channel:
-                log_message = (
-                    f"[Queue Join] {member.name}#{member.discriminator} ({member.id}) "
-                    f"joined the queue: {after.channel.mention}."
-                )
-                await logging_channel.send(log_message)
+    async def stop_guild_loop(self, guild: discord.Guild):
+        if guild.id in self.supervisor:
+            self.supervisor.remove(guild.id)
+            print(f"Loop stopped for {guild.name}")
 
-        # Check if the member has left a voice channel
-        elif (after.channel is None and before.channel) or before.channel.id == guild_settings['queue_channel_id']:
+    async def tick_guild(self, guild: discord.Guild):
+        """Run one pass of the queueing logic for a guild. Called every couple of seconds by the supervisor."""
+        guild_settings = await self.settings_cache.get(guild.id)
+        if not guild_settings:
+            return  # Skip the tick if settings are deleted
+        self.sweep_session_calls(guild)
+        handles = guild_settings.handles(guild)
+        amount_to_queue = self.effective_amount(guild.id, guild_settings.amount_to_queue)
+
+        # If the queueing system is paused or not set up, skip the tick
+        if (not handles.queue_channel or not amount_to_queue or not handles.admin_role or not handles.sessions_channel
+                or not handles.session_calls_category or guild_settings.paused):
+            return
 
-            queue_channel = member.guild.get_channel(guild_settings['queue_channel_id']) if guild_settings else None
+        # Voice updates for this guild wait until the tick is done with the queue
+        async with self.inbox.lock(guild.id):
+            queue_data = self.queue.setdefault(guild.id, {})
+            # Members waiting on a ready check already have a match
+            in_ready_check = self.ready_checks.get(guild.id, {})
+            amount_in_queue = len(queue_data) - len(in_ready_check)
+
+            if amount_in_queue >= amount_to_queue:
+                # Get the first `amount_to_queue` members from the queue
+                member_ids = [member_id for member_id in queue_data if member_id not in in_ready_check][:amount_to_queue]
+                members_to_move = [guild.get_member(member_id) for member_id in member_ids if guild.get_member(member_id)]
+
+                if members_to_move and guild.id in self.ready_check_settings:
+                    await self.start_ready_check(guild, [member.id for member in members_to_move], amount_to_queue)
+                elif members_to_move:
+                    await self.create_session(guild, guild_settings, members_to_move)
+            elif guild.id in self.federation_pools:
+                # Not enough members here, possibly none at all, so try to fill the session from the linked guilds
+                await self.create_federated_session(guild, guild_settings, amount_to_queue)
+
+    async def end_session(self, guild: discord.Guild, vc: discord.VoiceChannel, reason: str):
+        """Delete a session call and its thread, and post the session summary."""
+        guild_settings = await self.settings_cache.get(guild.id)
+        if not guild_settings:
+            return
+        handles = guild_settings.handles(guild)
+        sessions_channel = handles.sessions_channel
+        logging_channel = handles.log_channel if self.admission.admit('log', guild.id) else None
+        try:
+            await vc.delete(reason=f"Session call ended ({reason})")
+        except discord.NotFound:
+            return  # Already ended by someone else
+        if logging_channel:
+            await logging_channel.send(f"Deleted session call channel ({reason}): {vc.name}")
+        code = vc.name.split(" - ")[1].strip() if " - " in vc.name else vc.name
+        session = self.forget_session(code)
+        self.session_channels.pop(vc.id, None)
+        self.timers.cancel(self.idle_timers.pop(vc.id, None))
+        self.timers.cancel(self.max_timers.pop(vc.id, None))
+
+        thread = guild.get_thread(session['thread_id']) if session and session.get('thread_id') else None
+        threads = [thread] if thread else [t for t in (sessions_channel.threads if sessions_channel else []) if t.name == f"Session Chat - {code}"]
+        for thread in threads:
+            await thread.delete(reason=f"Session call thread ended ({reason})")
+            if logging_channel:
+                await logging_channel.send(f"Deleted session call thread: {thread.name}")
+        ended_at = discord.utils.utcnow()
+        if session:
+            duration = ended_at - session['started_at']
+            member_mentions = ', '.join(f"<@{m}>" for m in session['member_ids'])
+            session_end_embed = discord.Embed(
+                title="Session Ended",
+                description=f"{vc.name}",
+                color=random.randint(0, 0xFFFFFF)
+            )
+            session_end_embed.add_field(name="Duration", value=str(duration), inline=False)
+            session_end_embed.add_field(name="Members", value=member_mentions, inline=False)
+            session_end_embed.add_field(name="Started at", value=f"<t:{int(session['started_at'].timestamp())}:F>", inline=True)
+            session_end_embed.add_field(name="Ended at", value=f"<t:{int(ended_at.timestamp())}:F>", inline=True)
+            await utils.insert_session_history(
+                guild.id, code, vc.id, session['started_at'].timestamp(), ended_at.timestamp(),
+                session['member_ids'], session.get('remote_member_ids', ())
+            )
 
-            # If the member is not leaving the queue channel, do nothing
-            if not queue_channel or before.channel.id != queue_channel.id:
+        else:
+            duration = "Unknown"
+            member_mentions = "Unknown"
+            session_end_embed = discord.Embed(
+                title="Session Ended",
+                description=f"{vc.name}",
+                color=random.randint(0, 0xFFFFFF)
+            )
+            session_end_embed.add_field(name="Duration", value=duration, inline=False)
+            session_end_embed.add_field(name="Members", value=member_mentions, inline=False)
+            session_end_embed.add_field(name="Started at", value="Unknown", inline=True)
+            session_end_embed.add_field(name="Ended at", value=f"<t:{int(ended_at.timestamp())}:F>", inline=True)
+        session_end_embed.add_field(name="Reason", value=reason.capitalize(), inline=False)
+        if sessions_channel and self.admission.admit('embed', guild.id):
+            await sessions_channel.send(f"{member_mentions}", embed=session_end_embed)
+        self.audit.record(guild.id, 'session_end', f"Session {code} ended ({reason}): {vc.name} ({vc.id}). Duration: {duration}. Members: {member_mentions}")
+        if logging_channel:
+            await logging_channel.send(f"Session ended ({reason}): {vc.name} ({vc.id}). Duration: {duration}. Members: {member_mentions}")
+
+    async def start_ready_check(self, guild: discord.Guild, member_ids: list[int], size: int):
+        """Ask a group picked from the queue to confirm before their session is created. Runs under the guild's inbox lock."""
+        check = ReadyCheck(guild.id, size, member_ids)
+        self.ready_checks.setdefault(guild.id, {}).update(dict.fromkeys(member_ids, check))
+        await self.prompt_ready_check(guild, check)
+
+    async def prompt_ready_check(self, guild: discord.Guild, check: ReadyCheck):
+        """Start a round of a ready check: post the prompt and restart the timeout."""
+        timeout = self.ready_check_settings.get(guild.id, (60, 'requeue'))[0]
+        check.rounds += 1
+        check.deadline = int(time.time() + timeout)
+        self.timers.cancel(check.timer)
+        check.timer = self.timers.schedule(timeout, self.expire_ready_check, guild.id, check)
+
+        previous = check.message
+        if check.view:
+            check.view.stop()
+        check.view = ReadyCheckView(check, self.respond_ready_check)
+        guild_settings = await self.settings_cache.get(guild.id)
+        queue_channel = guild_settings.handles(guild).queue_channel if guild_settings else None
+        check.message = None
+        if queue_channel:
+            try:
+                check.message = await queue_channel.send(check.describe(), view=check.view)
+            except discord.HTTPException:
+                pass
+        # The new prompt pings the replacements, so the previous one goes
+        if previous:
+            with contextlib.suppress(discord.HTTPException):
+                await previous.delete()
+
+    async def respond_ready_check(self, check: ReadyCheck, interaction: discord.Interaction, ready: bool):
+        """Handle a press of a ready check prompt's Ready or Not now button."""
+        member_id = interaction.user.id
+        if check.state != PENDING or member_id not in check.members:
+            await interaction.response.send_message("This ready check is not for you.", ephemeral=True)
+            return
+        if ready:
+            check.confirm(member_id)
+            if not check.complete:
+                await interaction.response.edit_message(content=check.describe())
                 return
-
-            # If the queueing system is paused or non-existent, do not do anything
-            if not guild_settings or guild_settings.get('paused'):
+            await interaction.response.defer()
+        else:
+            action = self.ready_check_settings.get(check.guild_id, (0, 'requeue'))[1]
+            await interaction.response.send_message(
+                "You were moved to the back of the queue." if action == 'requeue' else "You were removed from the queue.",
+                ephemeral=True
+            )
+            async with self.inbox.lock(check.guild_id):
+                if check.state == PENDING and member_id in check.members:
+                    await self.release_from_ready_check(interaction.guild, check, member_id, action, "declined the ready check")
+        await self.advance_ready_check(check)
+
+    async def expire_ready_check(self, guild_id: int, check: ReadyCheck):
+        """Apply the guild's non-responder action to everyone who did not confirm in time, then replace them."""
+        check.timer = None
+        guild = self.bot.get_guild(guild_id)
+        guild_settings = await self.settings_cache.get(guild_id)
+        action = self.ready_check_settings.get(guild_id, (0, 'requeue'))[1]
+        async with self.inbox.lock(guild_id):
+            if check.state == PENDING and guild and guild_settings and not guild_settings.paused:
+                for member_id in check.waiting():
+                    member = await self.release_from_ready_check(guild, check, member_id, action, "did not respond to the ready check")
+                    if member:
+                        self.notifier.notify(
+                            member,
+                            f"You missed the ready check in **{guild.name}**. "
+                            + ("You were moved to the back of the queue." if action == 'requeue' else "You were removed from the queue.")
+                        )
+        await self.advance_ready_check(check)
+
+    async def release_from_ready_check(self, guild: discord.Guild, check: ReadyCheck, member_id: int, action: str,
+                                       reason: str) -> discord.Member | None:
+        """
+        Take a member out of a ready check, and move them to the back of the queue or remove them from it.
+        Runs under the guild's inbox lock.
+
+        Returns:
+            discord.Member | None: The member, or None if they were no longer queued.
+        """
+        check.remove(member_id)
+        self.ready_checks.get(guild.id, {}).pop(member_id, None)
+        entry = self.queue.get(guild.id, {}).get(member_id)
+        if not entry:
+            return None
+        member = entry['member']
+        self.dequeue(guild.id, member_id)
+        if action == 'requeue':
+            # They are still in the queue channel, so they simply go to the back
+            self.enqueue(guild.id, member)
+            outcome = "was moved to the back of the queue"
+        else:
+            with contextlib.suppress(discord.HTTPException):
+                await member.move_to(None, reason=f"Member {reason}")
+            outcome = "was removed from the queue"
+        self.save_queue(guild.id)
+
+        log_message = f"[Ready Check] {member.name}#{member.discriminator} ({member.id}) {reason} and {outcome}."
+        self.audit.record(guild.id, 'ready_check', log_message, member.id)
+        guild_settings = await self.settings_cache.get(guild.id)
+        log_channel = guild_settings.handles(guild).log_channel if guild_settings else None
+        if log_channel and self.admission.admit('log', guild.id):
+            await log_channel.send(log_message)
+        return member
+
+    async def advance_ready_check(self, check: ReadyCheck):
+        """
+        Move a ready check on after a confirmation, a timeout or a member leaving: create the session once
+        everyone is ready, or fill the gaps with the next members in the queue. The check is cancelled if the
+        queue can no longer fill it, and everyone keeps their place in the queue.
+        """
+        guild = self.bot.get_guild(check.guild_id)
+        guild_settings = await self.settings_cache.get(check.guild_id)
+        async with self.inbox.lock(check.guild_id):
+            if check.state != PENDING:
+                return
+            if not guild or not guild_settings or guild_settings.paused or check.guild_id not in self.ready_check_settings:
+                await self.close_ready_check(check, CANCELLED, "Ready check cancelled.")
                 return
 
-            # Remove member from queue dictionary
-            if hasattr(self, "queue") and member.id in self.queue:
-                del self.queue[member.id]
-
-            # Save queue to JSON file
-            queue_data = {
-                str(k): {
-                    'member_id': v['member'].id,
-                    'joined_at': v['joined_at'].isoformat() if hasattr(v['joined_at'], 'isoformat') else str(v['joined_at'])
-                }
-                for k, v in self.queue.items()
-            }
-            queue_file = f"queues/queue_{member.guild.id}.json"
-            with open(queue_file, "w", encoding="utf-8") as f:
-                json.dump(queue_data, f, indent=2)
-                f.close()
-
-            logging_channel = member.guild.get_channel(guild_settings['log_channel_id'])
-            if logging_channel:
-                log_message = (
-                    f"[Queue Left] {member.name}#{member.discriminator} ({member.id}) "
-                    f"left the queue: {before.channel.mention}."
-                )
-                await logging_channel.send(log_message)
+            queue = self.queue.get(guild.id, {})
+            in_ready_check = self.ready_checks.setdefault(guild.id, {})
+            for member_id in [member_id for member_id in check.members if member_id not in queue or not guild.get_member(member_id)]:
+                check.remove(member_id, exclude=False)
+                if in_ready_check.get(member_id) is check:
+                    del in_ready_check[member_id]
 
-    async def start_all_guild_loops(self):
-        await self.bot.wait_until_ready()
-        for guild in self.bot.guilds:
-            settings = await utils.get_queueing_settings(guild.id)
-            if settings and not settings.get("paused"):
-                await self.start_guild_loop(guild)
+            if check.complete:
+                await self.close_ready_check(check, STARTED, "Everyone is ready, the session is starting!")
+                await self.create_session(guild, guild_settings, [guild.get_member(member_id) for member_id in check.members])
+                return
+            if not check.missing:
+                return  # Still waiting for confirmations
+
+            backfill = [
+                member_id for member_id in queue if member_id not in in_ready_check and member_id not in check.excluded
+            ][:check.missing]
+            if len(backfill) < check.missing:
+                await self.close_ready_check(
+                    check, CANCELLED, "Ready check cancelled, not enough members are queued. Everyone keeps their place in the queue."
+                )
+                return
+            check.add(backfill)
+            in_ready_check.update(dict.fromkeys(backfill, check))
+            await self.prompt_ready_check(guild, check)
+
+    def finish_ready_check(self, check: ReadyCheck, state: str):
+        check.state = state
+        self.timers.cancel(check.timer)
+        check.timer = None
+        in_ready_check = self.ready_checks.get(check.guild_id, {})
+        for member_id in check.members:
+            if in_ready_check.get(member_id) is check:
+                del in_ready_check[member_id]
+        if check.view:
+            check.view.stop()
+
+    async def close_ready_check(self, check: ReadyCheck, state: str, content: str):
+        """End a ready check and replace its prompt with the outcome."""
+        self.finish_ready_check(check, state)
+        self.audit.record(check.guild_id, 'ready_check', f"Ready check {check.check_id} {state} after {check.rounds} round(s): {content}")
+        if check.message:
+            with contextlib.suppress(discord.HTTPException):
+                await check.message.edit(content=content, view=None)
+
+    async def create_session(self, guild: discord.Guild, guild_settings: GuildSettings, members_to_move: list[discord.Member],
+                             remote_members: list[discord.Member] = ()):
+        """
+        Create a session call and thread for a group of members and move them into it.
+
+        Members from other guilds of a federation are passed as ``remote_members``. They cannot be moved,
+        so they are sent an invite to the session call instead, and only leave their own guild's queue once
+        the invite is on its way.
+        """
+        handles = guild_settings.handles(guild)
+        moderation_role = handles.admin_role
+        sessions_channel = handles.sessions_channel
+        session_calls_category = handles.session_calls_category
+        all_members = [*members_to_move, *remote_members]
+
+        # Create a session call channel
+        # Make the name of the call based on the members' IDs and current timestamp
+        ids = 0
+        for member in members_to_move:
+            ids += int(member.id)
+        name = utils.number_to_id(((hash(tuple(sorted([m.id for m in all_members]))) & 0xFFFF) << 8) | (int(datetime.now(timezone.utc).timestamp()) & 0xFF))
+
+        # Create the session call channel
+        session_call_channel = await guild.create_voice_channel(
+            f"Session Call - {name}",
+            category=session_calls_category,
+            reason="Creating session call due to queue limit reached"
+        )
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=True, connect=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, connect=True),
+            moderation_role: discord.PermissionOverwrite(read_messages=True, connect=True)
+        }
+        for member in members_to_move:
+            overwrites[member] = discord.PermissionOverwrite(read_messages=True, connect=True)
+        # Invited members from other guilds may not be members here yet, so they are granted by user ID
+        for member in remote_members:
+            overwrites[discord.Object(id=member.id, type=discord.Member)] = discord.PermissionOverwrite(read_messages=True, connect=True)
 
-    async def start_guild_loop(self, guild: discord.Guild):
-        if guild.id in self.guild_loops:
-            return
+        thread = invite = None
+        try:
+            # Set permissions for the channel
+            if remote_members:
+                await session_call_channel.edit(overwrites=overwrites, user_limit=len(all_members))
+            else:
+                await session_call_channel.edit(overwrites=overwrites)
+
+            # Make a thread in the Sessions channel
+            thread = await sessions_channel.create_thread(
+                name=f"Session Chat - {name}",
+                auto_archive_duration=60,
+                reason="Creating thread for session call discussion"
+            )
 
+            # Members from other guilds get an invite, as they cannot be moved across guilds
+            if remote_members:
+                invite = await session_call_channel.create_invite(
+                    max_age=900, max_uses=len(remote_members), unique=True,
+                    reason="Inviting federated members to a session call"
+                )
+        except Exception:
+            # The supervisor retries the tick, which would otherwise leave an untracked call behind on every attempt
+            for channel in (thread, session_call_channel):
+                if channel:
+                    with contextlib.suppress(discord.HTTPException):
+                        await channel.delete(reason="Session setup failed")
+            raise
+
+        if invite:
+            remote_members = await self.invite_remote_members(guild, remote_members, invite)
+            all_members = [*members_to_move, *remote_members]
+
+        member_mentions = ', '.join(member.mention for member in all_members)
+        await thread.send(
+            f"Session call created! You can discuss here: {thread.mention}\n"
+            f"Members: {member_mentions}"
+        )
 
-        async def loop_body():
+        # Move members to the session call channel
+        for member in members_to_move:
             try:
-                print(f"Loop running for {guild.name}")
-                # Main loop
-                while True:
-                    guild_settings = await utils.get_queueing_settings(guild.id)
-                    if not guild_settings:
-                        continue  # Skip the loop if settings are deleted
-                    paused = guild_settings.get('paused', None)
-                    queue_channel = guild.get_channel(guild_settings.get('queue_channel_id', None))
-                    amount_to_queue = guild_settings.get('amount_to_queue', None)
-                    moderation_role = guild.get_role(guild_settings.get('admin_role_id', None))
-                    sessions_channel = guild.get_channel(guild_settings.get('sessions_channel_id', None))
-                    sessions_category = guild.get_channel(guild_settings.get('session_calls_category_id', None))
-
-                    # If the queueing system is paused or not set up, skip the loop
-                    if not queue_channel or not amount_to_queue or not moderation_role or not sessions_channel or not sessions_category or paused:
-                        await asyncio.sleep(2)
-                        continue
-
-                    with open(f"queues/queue_{guild.id}.json", "r", encoding="utf-8") as f:
-                        try:
-                            queue_data = json.load(f)
-                        except json.JSONDecodeError:
-                            queue_data = {}
-                        f.close()
-
-                    amount_in_queue = len(queue_data)
-
-                    if amount_in_queue:
-                        if amount_in_queue >= amount_to_queue:
-                            # Create a session call
-                            session_calls_category = guild.get_channel(guild_settings['session_calls_category_id'])
-                            if session_calls_category:
-                                # Get the first `amount_to_queue` members from the queue
-                                member_ids = list(queue_data.keys())[:amount_to_queue]
-                                members_to_move = [guild.get_member(int(member_id)) for member_id in member_ids if guild.get_member(int(member_id))]
-
-                                if members_to_move:
-                                    # Create a session call channel
-                                    # Make the name of the call based on the members' IDs and current timestamp
-                                    ids = 0
-                                    for member in members_to_move:
-                                        ids += int(member.id)
-                                    name = utils.number_to_id(((hash(tuple(sorted([m.id for m in members_to_move]))) & 0xFFFF) << 8) | (int(datetime.now(timezone.utc).timestamp()) & 0xFF))
-
-                                    # Create the session call channel
-                                    session_call_channel = await guild.create_voice_channel(
-                                        f"Session Call - {name}",
-                                        category=session_calls_category,
-                                        reason="Creating session call due to queue limit reached"
-                                    )
-                                    overwrites = {
-                                        guild.default_role: discord.PermissionOverwrite(view_channel=True, connect=False),
-                                        guild.me: discord.PermissionOverwrite(read_messages=True, connect=True),
-                                        moderation_role: discord.PermissionOverwrite(read_messages=True, connect=True)
-                                    }
-                                    for member in members_to_move:
-                                        overwrites[member] = discord.PermissionOverwrite(read_messages=True, connect=True)
-
-                                    # Set permissions for the channel
-                                    await session_call_channel.edit(overwrites=overwrites)
-
-                                    # Make a thread in the Sessions channel
-                                    thread = await sessions_channel.create_thread(
-                                        name=f"Session Chat - {name}",
-                                        auto_archive_duration=60,
-                                        reason="Creating thread for session call discussion"
-                                    )
-                                    member_mentions = ', '.join(member.mention for member in members_to_move)
-                                    await thread.send(
-                                        f"Session call created! You can discuss here: {thread.mention}\n"
-                                        f"Members: {member_mentions}"
-                                    )
-
-                                    # Move members to the session call channel
-                                    for member in members_to_move:
-                                        try:
-                                            await member.move_to(session_call_channel, reason="Moving to session call due to queue limit reached")
-                                            del queue_data[str(member.id)]
-                                        except Exception as e:
-                                            # Logging error
-                                            logging_channel = guild.get_channel(guild_settings['log_channel_id'])
-                                            if logging_channel:
-                                                await logging_channel.send(f"Error moving {member.mention} to session call: {str(e)}")
-                                    
-                                    with open(f"queues/queue_{guild.id}.json", "w", encoding="utf-8") as f:
-                                        json.dump(queue_data, f, indent=2)
-
-                                    self.session_info[name] = {
-                                        'channel_id': session_call_channel.id,
-                                        'member_ids': [member.id for member in members_to_move],
-                                        'started_at': discord.utils.utcnow(),
-                                        'thread_id': thread.id
-                                    }
-
-                                    session_start_embed = discord.Embed(
-                                        title="Session Started",
-                                        description=f"{session_call_channel.name}",
-                                        color=random.randint(0, 0xFFFFFF)
-                                    )
-                                    session_start_embed.add_field(name="Members", value=member_mentions, inline=False)
-                                    session_start_embed.add_field(name="Started at", value=f"<t:{int(self.session_info[name]['started_at'].timestamp())}:F>", inline=False)
-                                    await sessions_channel.send(f"{member_mentions}", embed=session_start_embed)
-
-                                    # Logging for session creation
-                                    logging_channel = guild.get_channel(guild_settings['log_channel_id'])
-                                    if logging_channel:
-                                        log_message = (
-                                            f"[Session Call Created] {len(members_to_move)} members moved to a new session call: "
-                                            f"{session_call_channel.mention}.\n"
-                                            f"Members: {member_mentions}\n"
-                                            f"Thread: {thread.mention if thread else 'N/A'}"
-                                        )
-                                        await logging_channel.send(log_message)
-                    else:
-                        logging_channel = guild.get_channel(guild_settings['log_channel_id'])
-                        for vc in sessions_category.voice_channels:
-                            if len(vc.members) == 0:
-                                await vc.delete(reason="Session call ended (empty)")
-                                if logging_channel:
-                                    await logging_channel.send(f"Deleted empty session call channel: {vc.name}")
-                                code = vc.name.split(" - ")[1].strip() if " - " in vc.name else vc.name
-                                for thread in sessions_channel.threads:
-                                    if thread.name == f"Session Chat - {code}":
-                                        await thread.delete(reason="Session call thread ended (empty)")
-                                        if logging_channel:
-                                            await logging_channel.send(f"Deleted empty session call thread: {thread.name}")
-                                ended_at = discord.utils.utcnow()
-                                session = self.session_info.get(code)
-                                if session:
-                                    duration = ended_at - session['started_at']
-                                    member_mentions = ', '.join(f"<@{m}>" for m in session['member_ids'])
-                                    session_end_embed = discord.Embed(
-                                        title="Session Ended",
-                                        description=f"{vc.name}",
-                                        color=random.randint(0, 0xFFFFFF)
-                                    )
-                                    session_end_embed.add_field(name="Duration", value=str(duration), inline=False)
-                                    session_end_embed.add_field(name="Members", value=member_mentions, inline=False)
-                                    session_end_embed.add_field(name="Started at", value=f"<t:{int(session['started_at'].timestamp())}:F>", inline=True)
-                                    session_end_embed.add_field(name="Ended at", value=f"<t:{int(ended_at.timestamp())}:F>", inline=True)
-
-                                else:
-                                    duration = "Unknown"
-                                    member_mentions = "Unknown"
-                                    session_end_embed = discord.Embed(
-                                        title="Session Ended",
-                                        description=f"{vc.name}",
-                                        color=random.randint(0, 0xFFFFFF)
-                                    )
-                                    session_end_embed.add_field(name="Duration", value=duration, inline=False)
-                                    session_end_embed.add_field(name="Members", value=member_mentions, inline=False)
-                                    session_end_embed.add_field(name="Started at", value="Unknown", inline=True)
-                                    session_end_embed.add_field(name="Ended at", value=f"<t:{int(ended_at.timestamp())}:F>", inline=True)
-                                await sessions_channel.send(f"{member_mentions}", embed=session_end_embed)
-                                self.session_info.pop(code, None)
-                                await logging_channel.send(f"Session ended: {vc.name} ({vc.id}). Duration: {duration}. Members: {member_mentions}")
-
-                    await asyncio.sleep(2)
-            except asyncio.CancelledError:
-                print(f"Loop stopped for {guild.name}")
-
-        task = asyncio.create_task(loop_body())
-        self.guild_loops[guild.id] = task
+                await member.move_to(session_call_channel, reason="Moving to session call due to queue limit reached")
+                self.dequeue(guild.id, member.id)
+            except Exception as e:
+                # Logging error
+                self.audit.record(guild.id, 'move_error', f"Error moving {member.mention} to session call {name}: {str(e)}", member.id)
+                logging_channel = guild_settings.handles(guild).log_channel
+                if logging_channel:
+                    await logging_channel.send(f"Error moving {member.mention} to session call: {str(e)}")
+
+        self.save_queue(guild.id)
+        self.eta.setdefault(guild.id, EtaEstimator()).record_session()
+
+        self.session_info[name] = {
+            'guild_id': guild.id,
+            'channel_id': session_call_channel.id,
+            'member_ids': [member.id for member in all_members],
+            'remote_member_ids': [member.id for member in remote_members],
+            'started_at': discord.utils.utcnow(),
+            'thread_id': thread.id
+        }
+        self.session_channels[session_call_channel.id] = name
+        # Give members (and invited members from other guilds) time to arrive before the call counts as idle
+        self.arm_idle_timer(guild.id, session_call_channel.id, grace=60)
+        self.arm_session_limit(guild.id, session_call_channel.id, self.session_info[name]['started_at'])
+        self.mark_changed(guild.id)
+
+        session_start_embed = discord.Embed(
+            title="Session Started",
+            description=f"{session_call_channel.name}",
+            color=random.randint(0, 0xFFFFFF)
+        )
+        session_start_embed.add_field(name="Members", value=member_mentions, inline=False)
+        session_start_embed.add_field(name="Started at", value=f"<t:{int(self.session_info[name]['started_at'].timestamp())}:F>", inline=False)
+        await sessions_channel.send(f"{member_mentions}", embed=session_start_embed)
 
-    async def stop_guild_loop(self, guild: discord.Guild):
-        task = self.guild_loops.get(guild.id)
-        if task:
-            task.cancel()
+        # Logging for session creation
+        log_message = (
+            f"[Session Call Created] {len(members_to_move)} members moved to a new session call: "
+            f"{session_call_channel.mention}.\n"
+            + (f"{len(remote_members)} members from linked servers invited.\n" if remote_members else "") +
+            f"Members: {member_mentions}\n"
+            f"Thread: {thread.mention if thread else 'N/A'}"
+        )
+        self.audit.record(guild.id, 'session_start', f"Session {name} started. {log_message}")
+        logging_channel = guild_settings.handles(guild).log_channel
+        if logging_channel and self.admission.admit('log', guild.id):
+            await logging_channel.send(log_message)
+
+    async def invite_remote_members(self, guild: discord.Guild, remote_members: list[discord.Member],
+                                    invite: discord.Invite) -> list[discord.Member]:
+        """
+        Send federated members the invite to a session call, and take those it is sent to out of their own queue.
+        Members the invite cannot be delivered to keep their place. Returns the members who were invited.
+        """
+        invited = []
+        async with contextlib.AsyncExitStack() as stack:
+            for member_guild_id in sorted({member.guild.id for member in remote_members}):
+                await stack.enter_async_context(self.inbox.lock(member_guild_id))
+            for member in remote_members:
+                if member.id not in self.queue.get(member.guild.id, {}):
+                    continue  # Left their queue while the session was being set up
+                if not self.notifier.notify(member, f"A cross-server session is ready in **{guild.name}**! Join the session call: {invite.url}", essential=True):
+                    continue
+                self.dequeue(member.guild.id, member.id)
+                invited.append(member)
+            for member_guild_id in {member.guild.id for member in invited}:
+                self.save_queue(member_guild_id)
+
+        for member in invited:
             try:
-                await task
-            except asyncio.CancelledError:
+                await member.move_to(None, reason="Joining a cross-server session")
+            except discord.HTTPException:
                 pass
-            del self.guild_loops[guild.id]
+        return invited
+
+    async def create_federated_session(self, guild: discord.Guild, guild_settings: GuildSettings, amount_to_queue: int):
+        """Fill a session for a federation host from the federation's shared pool. Runs under the host's inbox lock."""
+        pool = self.federation_pools[guild.id]
+        # Members of other guilds who opted out of DMs could not be sent the invite
+        selected = pool.select(amount_to_queue, skip=set().union(*self.ready_checks.values()), remote_skip=self.notifier.opted_out)
+        if not selected:
+            return
+
+        local = [guild.get_member(member_id) for member_guild_id, member_id in selected if member_guild_id == guild.id]
+        remote = [(member_guild_id, member_id) for member_guild_id, member_id in selected if member_guild_id != guild.id]
+        if None in local:
+            return
+
+        remote_members = []
+        for member_guild_id, member_id in remote:
+            entry = self.queue.get(member_guild_id, {}).get(member_id)
+            if not entry:
+                return  # Someone left since the pool was built, try again next tick
+            remote_members.append(entry['member'])
+        # Remote members stay queued in their own guild until their invite is sent, see invite_remote_members
+        await self.create_session(guild, guild_settings, local, remote_members)
+
+    async def load_federations(self):
+        """Build the federation pools from the database and the current queues."""
+        self.federation_pools = {}
+        self.guild_pools = {}
+        pools = {}
+        for federation_id, name, _, host_guild_id in await utils.get_federations():
+            pools[federation_id] = self.federation_pools[host_guild_id] = FederatedPool(federation_id, name, host_guild_id)
+        for guild_id, federation_id, contribution_limit in await utils.get_federation_members():
+            pool = pools.get(federation_id)
+            if pool is not None:
+                pool.link(guild_id, contribution_limit)
+                self.guild_pools[guild_id] = pool
+        for guild_id, pool in self.guild_pools.items():
+            for member_id in self.queue.get(guild_id, {}):
+                pool.add(guild_id, member_id)
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
-        settings = await utils.get_queueing_settings(guild.id)
+        settings = await self.settings_cache.get(guild.id)
         if settings and not settings.get("paused"):
             await self.start_guild_loop(guild)
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild):
         await self.stop_guild_loop(guild)
+        self.settings_cache.invalidate(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.settings_cache.object_deleted(channel.guild.id, channel.id)
+        # The session itself is left to end_session or the stale session eviction, which post its summary
+        self.possibly_empty.get(channel.guild.id, set()).discard(channel.id)
+        self.timers.cancel(self.idle_timers.pop(channel.id, None))
+        self.timers.cancel(self.max_timers.pop(channel.id, None))
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.settings_cache.object_deleted(role.guild.id, role.id)
 
 
 
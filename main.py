@@ -1,19 +1,18 @@
 from discord.ext import commands
 from settings import bot as settings
 from settings import utils
+from settings.status_api import StatusAPI
+from settings import migrations
 import discord
 import os
 import asyncio
 
 bot: commands.Bot = commands.Bot(command_prefix=settings.PREFIX, intents=settings.INTENTS)
+status_api = None
+background_migrations = None
 
 @bot.event
 async def on_ready():
-    for guild in bot.guilds:
-        with open(f'queues/queue_{guild.id}.json', 'a+', encoding='utf-8') as f:
-            f.seek(0)
-            if not f.read().strip():
-                f.write('{}')
     await utils.init_db()
     print('---')
     cogs = []
@@ -23,6 +22,14 @@ async def on_ready():
             await bot.load_extension(f'cogs.{name}')
             cogs.append(name)
     print(f'Loaded cogs: {", ".join(cogs)}')
+    # on_ready runs again after reconnects, so only start these once
+    global status_api, background_migrations
+    if background_migrations is None:
+        background_migrations = asyncio.create_task(migrations.run_background_migrations())
+    if settings.STATUS_API_PORT and status_api is None:
+        status_api = StatusAPI(bot, settings.STATUS_API_HOST, settings.STATUS_API_PORT)
+        await status_api.start()
+        print(f'Status API listening on http://{settings.STATUS_API_HOST}:{settings.STATUS_API_PORT}')
     print('---')
     print(f'Logged in as {bot.user.name} (ID: {bot.user.id})')
     print('------')
@@ -0,0 +1,126 @@
+"""
+Admission control for the queueing system.
+Measures event loop lag and per-guild voice traffic. While the loop is lagging, low-priority work (log
+lines, status embeds and direct messages) is shed so queue handling keeps up. Guilds producing a
+disproportionate share of the traffic or a large inbox backlog are "hot": their low-priority work is always
+shed, and their voice updates are processed with a delay so they cannot starve other guilds.
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Callable
+
+SHEDDABLE = ('log', 'embed', 'dm')
+
+
+class AdmissionControl:
+    """Decides which low-priority work to skip and which guilds to slow down."""
+
+    def __init__(self, backlog: Callable[[int], int], lag_threshold: float = 0.25, backlog_threshold: int = 200,
+                 hot_share: float = 0.5, hot_min_events: int = 100, interval: float = 0.5, window: float = 10.0) -> None:
+        self.backlog = backlog
+        self.lag_threshold = lag_threshold
+        self.backlog_threshold = backlog_threshold
+        self.hot_share = hot_share
+        self.hot_min_events = hot_min_events
+        self.interval = interval
+        self.window = window
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.overloads = 0
+        self.shed: Counter = Counter()
+        self.shed_guilds: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.events: Counter = Counter()
+        self.previous_events: Counter = Counter()
+        self.window_started = time.monotonic()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def overloaded(self) -> bool:
+        return self.lag > self.lag_threshold
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def record_event(self, guild_id: int) -> None:
+        """Count a voice state update for a guild."""
+        now = time.monotonic()
+        if now - self.window_started > self.window:
+            self.previous_events, self.events = self.events, Counter()
+            self.window_started = now
+        self.events[guild_id] += 1
+
+    def is_hot(self, guild_id: int) -> bool:
+        """Whether a guild has a large backlog or is producing most of the recent voice traffic."""
+        if self.backlog(guild_id) > self.backlog_threshold:
+            return True
+        recent = self.events + self.previous_events
+        total = recent.total()
+        # A guild cannot starve others if it is the only one with traffic
+        if total < self.hot_min_events or len(recent) < 2:
+            return False
+        return recent[guild_id] / total > self.hot_share
+
+    def admit(self, kind: str, guild_id: int | None = None) -> bool:
+        """
+        Decide whether a piece of low-priority work should run.
+
+        Args:
+            kind (str): One of ``SHEDDABLE``.
+            guild_id (int | None): The guild the work is for, if any.
+
+        Returns:
+            bool: False if the work should be skipped. Skipped work is counted for the owner report.
+        """
+        if not self.overloaded and (guild_id is None or not self.is_hot(guild_id)):
+            return True
+        self.shed[kind] += 1
+        if guild_id is not None:
+            self.shed_guilds[guild_id] += 1
+        return False
+
+    async def throttle(self, guild_id: int) -> None:
+        """Delay a hot guild's next batch of voice updates, letting other guilds run and its own updates coalesce."""
+        if self.is_hot(guild_id):
+            self.throttled[guild_id] += 1
+            await asyncio.sleep(min(max(self.lag, 0.05), 1.0))
+
+    def report(self) -> list[str]:
+        """Describe the current load and everything shed so far."""
+        lines = [
+            f"Loop lag: {self.lag * 1000:.0f} ms (max {self.max_lag * 1000:.0f} ms, threshold {self.lag_threshold * 1000:.0f} ms)",
+            f"State: {'SHEDDING' if self.overloaded else 'normal'}, {self.overloads} overload episodes",
+            "Shed: " + (", ".join(f"{kind} {self.shed[kind]}" for kind in SHEDDABLE)),
+        ]
+        recent = self.events + self.previous_events
+        if recent:
+            lines.append("Busiest guilds: " + ", ".join(
+                f"{guild_id} ({count} events, backlog {self.backlog(guild_id)}{', hot' if self.is_hot(guild_id) else ''})"
+                for guild_id, count in recent.most_common(5)
+            ))
+        if self.shed_guilds:
+            lines.append("Most shed: " + ", ".join(f"{guild_id} ({count})" for guild_id, count in self.shed_guilds.most_common(5)))
+        if self.throttled:
+            lines.append("Most throttled: " + ", ".join(f"{guild_id} ({count})" for guild_id, count in self.throttled.most_common(5)))
+        return lines
+
+    async def _monitor(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            was_overloaded = self.overloaded
+            # Smooth the measurement so one slow callback does not flip shedding on and off
+            self.lag = self.lag * 0.7 + lag * 0.3
+            self.max_lag = max(self.max_lag, lag)
+            if self.overloaded and not was_overloaded:
+                self.overloads += 1
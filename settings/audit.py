@@ -0,0 +1,104 @@
+"""
+Structured audit log for the queueing system.
+Events are buffered in memory and written to the 'audit_events' table in batches, so recording an event
+never waits on the database. Events are partitioned by day, and a background task deletes whole days
+once they fall out of the retention period.
+"""
+import asyncio
+import time
+import traceback
+
+from settings import utils
+
+EVENT_KINDS = ('join', 'leave', 'session_start', 'session_end', 'move_error', 'settings_change', 'ready_check')
+
+
+class AuditLog:
+    """Batched writer and retention compactor for audit events."""
+
+    def __init__(self, retention_days: int = 30, flush_interval: float = 5.0, batch_size: int = 200,
+                 compact_interval: float = 3600.0) -> None:
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compact_interval = compact_interval
+        self.buffer: list[tuple] = []
+        self.full = asyncio.Event()
+        self.tasks: list[asyncio.Task] = []
+
+    def record(self, guild_id: int, kind: str, details: str, member_id: int | None = None) -> None:
+        """
+        Record an audit event. The event is written to the database with the next batch.
+
+        Args:
+            guild_id (int): The Discord guild (server) ID.
+            kind (str): One of ``EVENT_KINDS``.
+            details (str): Free-text description, searchable with /queue-audit.
+            member_id (int | None): The member the event is about, if any.
+        """
+        now = time.time()
+        self.buffer.append((guild_id, int(now // 86400), now, kind, member_id, details))
+        if len(self.buffer) >= self.batch_size:
+            self.full.set()
+
+    def start(self) -> None:
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self._flush_loop()), asyncio.create_task(self._compact_loop())]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered event to the database."""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self.full.clear()
+        try:
+            await utils.insert_audit_events(batch)
+        except Exception:
+            # Keep the events for the next attempt rather than losing them
+            self.buffer[:0] = batch
+            raise
+
+    async def compact(self) -> int:
+        """
+        Delete every event older than the retention period, one batch at a time.
+
+        Returns:
+            int: The number of events deleted.
+        """
+        cutoff = int(time.time() // 86400) - self.retention_days
+        total = 0
+        while True:
+            deleted = await utils.compact_audit_events(cutoff)
+            total += deleted
+            if not deleted:
+                break
+            await asyncio.sleep(0)
+        if total:
+            await utils.optimize_audit_index()
+        return total
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                traceback.print_exc()
+
+    async def _compact_loop(self) -> None:
+        while True:
+            try:
+                await self.compact()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.compact_interval)
@@ -6,4 +6,10 @@ load_dotenv()
 
 TOKEN = os.getenv('DISCORD_TOKEN')
 INTENTS = discord.Intents.all()
-PREFIX = os.getenv('PREFIX', 'q!')
\ No newline at end of file
+PREFIX = os.getenv('PREFIX', 'q!')
+AUDIT_RETENTION_DAYS = int(os.getenv('AUDIT_RETENTION_DAYS', '30'))
+SESSION_INFO_MAX_AGE_HOURS = int(os.getenv('SESSION_INFO_MAX_AGE_HOURS', '24'))
+LAG_THRESHOLD_MS = int(os.getenv('LAG_THRESHOLD_MS', '250'))
+BACKLOG_THRESHOLD = int(os.getenv('BACKLOG_THRESHOLD', '200'))
+STATUS_API_HOST = os.getenv('STATUS_API_HOST', '127.0.0.1')
+STATUS_API_PORT = int(os.getenv('STATUS_API_PORT', '0'))
@@ -0,0 +1,80 @@
+"""
+Bulk operation executor for admin commands that touch many channels or members at once.
+Work items run concurrently under a fixed in-flight budget so discord.py's rate limiter is never
+flooded, and progress is reported by editing a single message instead of sending one per item.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import discord
+
+
+class BulkOperation:
+    """
+    A batch of independent Discord API calls executed concurrently.
+
+    Items are idempotent: an item whose target is already gone (``discord.NotFound``) counts as done,
+    so an interrupted operation can be resumed simply by building and running it again.
+    """
+
+    def __init__(self, title: str, concurrency: int = 5, progress_interval: float = 2.0) -> None:
+        self.title = title
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self.items: list[tuple[str, Callable[[], Awaitable]]] = []
+        self.done = 0
+        self.failures: list[tuple[str, Exception]] = []
+        self._last_progress = 0.0
+
+    def add(self, label: str, func: Callable[[], Awaitable]) -> None:
+        """
+        Queue a work item.
+
+        Args:
+            label (str): Human readable name used in failure reports.
+            func (Callable): Zero-argument coroutine function performing the API call.
+        """
+        self.items.append((label, func))
+
+    async def run(self, progress_message: discord.Message | None = None) -> list[tuple[str, Exception]]:
+        """
+        Run every queued item and wait for all of them to finish.
+
+        Args:
+            progress_message (discord.Message | None): Message to edit with progress updates.
+
+        Returns:
+            list: ``(label, exception)`` pairs for items that failed.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(label, func):
+            async with semaphore:
+                try:
+                    await func()
+                except discord.NotFound:
+                    pass
+                except Exception as e:
+                    self.failures.append((label, e))
+            self.done += 1
+            await self._report(progress_message)
+
+        await asyncio.gather(*(worker(label, func) for label, func in self.items))
+        await self._report(progress_message, force=True)
+        return self.failures
+
+    async def _report(self, progress_message: discord.Message | None, force: bool = False) -> None:
+        if progress_message is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        content = f"{self.title}: {self.done}/{len(self.items)} done"
+        if self.failures:
+            content += f", {len(self.failures)} failed"
+        try:
+            await progress_message.edit(content=content)
+        except discord.HTTPException:
+            pass
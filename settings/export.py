@@ -0,0 +1,160 @@
+"""
+Streaming export of session and queue history for the data warehouse.
+
+Rows are read with keyset pagination (``WHERE id > ? ORDER BY id LIMIT ?``) on a plain sqlite3 connection in
+a worker thread. Only one chunk is held in memory at a time, and no read transaction stays open between
+chunks, so an export of any size neither blocks the event loop nor holds up the bot's writes. A named
+checkpoint records the last exported row ID, so the next export with the same name only contains new rows.
+
+Usage:
+    python -m settings.export sessions [--format csv|jsonl] [--gzip] [--guild ID] [--checkpoint NAME] [-o FILE]
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Iterator
+
+from settings import utils
+
+# dataset: (table, ID column, exported columns)
+DATASETS = {
+    'sessions': ('session_history', 'session_id', ('session_id', 'guild_id', 'code', 'channel_id', 'started_at', 'ended_at', 'member_count')),
+    'session_members': ('session_members', 'row_id', ('row_id', 'session_id', 'guild_id', 'member_id', 'remote')),
+    'queue_events': ('audit_events', 'event_id', ('event_id', 'guild_id', 'created_at', 'kind', 'member_id', 'details')),
+}
+FORMATS = ('csv', 'jsonl')
+
+
+def iter_rows(dataset: str, guild_id: int | None = None, after_id: int = 0, chunk_size: int = 1000,
+              database: str = 'queueing_system.db') -> Iterator[list[tuple]]:
+    """
+    Yield a dataset's rows in ID order, one chunk at a time.
+
+    Rows added while the export runs are left for the next export, so a checkpoint never skips a row.
+
+    Args:
+        dataset (str): One of ``DATASETS``.
+        guild_id (int | None): Only export this guild's rows.
+        after_id (int): Only export rows with a greater ID.
+        chunk_size (int): The number of rows to read per query.
+        database (str): The database file.
+    """
+    table, id_column, columns = DATASETS[dataset]
+    where = f'{id_column} > ? AND {id_column} <= ?'
+    if guild_id is not None:
+        where += ' AND guild_id = ?'
+    query = f'SELECT {", ".join(columns)} FROM {table} WHERE {where} ORDER BY {id_column} LIMIT ?'
+    db = sqlite3.connect(database)
+    try:
+        last_id = db.execute(f'SELECT COALESCE(MAX({id_column}), 0) FROM {table}').fetchone()[0]
+        while True:
+            params = (after_id, last_id) + ((guild_id,) if guild_id is not None else ()) + (chunk_size,)
+            rows = db.execute(query, params).fetchall()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+    finally:
+        db.close()
+
+
+def write_export(out, dataset: str, fmt: str, guild_id: int | None = None, after_id: int = 0,
+                 database: str = 'queueing_system.db') -> tuple[int, int]:
+    """
+    Write a dataset to a text stream.
+
+    Args:
+        out: A writable text stream.
+        dataset (str): One of ``DATASETS``.
+        fmt (str): One of ``FORMATS``.
+        guild_id (int | None): Only export this guild's rows.
+        after_id (int): Only export rows with a greater ID.
+        database (str): The database file.
+
+    Returns:
+        tuple: The number of rows written and the last exported row ID (``after_id`` if there were none).
+    """
+    columns = DATASETS[dataset][2]
+    count, last_id = 0, after_id
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+    for rows in iter_rows(dataset, guild_id, after_id, database=database):
+        if fmt == 'csv':
+            writer.writerows(rows)
+        else:
+            out.writelines(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+        count += len(rows)
+        last_id = rows[-1][0]
+    return count, last_id
+
+
+def export_to_file(path: str, dataset: str, fmt: str, compress: bool = False, guild_id: int | None = None,
+                   after_id: int = 0, database: str = 'queueing_system.db') -> tuple[int, int]:
+    """Write a dataset to a file, gzipped if ``compress`` is set. Returns the same as write_export."""
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8', newline='') as out:
+        return write_export(out, dataset, fmt, guild_id, after_id, database)
+
+
+async def export(path: str, dataset: str, fmt: str = 'csv', compress: bool = False, guild_id: int | None = None,
+                 checkpoint: str | None = None) -> int:
+    """
+    Export a dataset to a file in a worker thread.
+
+    Args:
+        path (str): The output file.
+        dataset (str): One of ``DATASETS``.
+        fmt (str): One of ``FORMATS``.
+        compress (bool): Gzip the output.
+        guild_id (int | None): Only export this guild's rows.
+        checkpoint (str | None): Only export rows added since the last export with this name (and guild),
+            and advance the checkpoint once the file is written.
+
+    Returns:
+        int: The number of rows exported.
+    """
+    if checkpoint and guild_id is not None:
+        # A guild's export skips other guilds' rows, so it cannot share a checkpoint with a full export
+        checkpoint = f"{checkpoint}/guild-{guild_id}"
+    after_id = await utils.get_export_checkpoint(checkpoint, dataset) if checkpoint else 0
+    count, last_id = await asyncio.to_thread(export_to_file, path, dataset, fmt, compress, guild_id, after_id)
+    if checkpoint and last_id != after_id:
+        await utils.set_export_checkpoint(checkpoint, dataset, last_id, time.time())
+    return count
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m settings.export', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('dataset', choices=DATASETS)
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+    parser.add_argument('--guild', type=int, help='Only export one guild')
+    parser.add_argument('--checkpoint', help='Only export rows added since the last export with this name')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists('queueing_system.db'):
+        parser.error('queueing_system.db not found, run this from the bot directory')
+    if args.output:
+        count = asyncio.run(export(args.output, args.dataset, args.format, args.gzip, args.guild, args.checkpoint))
+        print(f"Exported {count} {args.dataset} rows to {args.output}", file=sys.stderr)
+        return
+    if args.checkpoint:
+        parser.error('--checkpoint requires --output, so the checkpoint only advances once the file is written')
+    if args.gzip:
+        with gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8', newline='') as out:
+            count, _ = write_export(out, args.dataset, args.format, args.guild)
+    else:
+        count, _ = write_export(sys.stdout, args.dataset, args.format, args.guild)
+    print(f"Exported {count} {args.dataset} rows", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Cross-guild matchmaking pool for federated queues.
+Every guild linked to a federation adds its queued members to the federation's pool, in global join order.
+The host guild's loop draws sessions from the pool when its own queue cannot fill one, taking at most
+each guild's contribution limit per session.
+"""
+
+
+class FederatedPool:
+    """The shared, join-ordered queue of one federation."""
+
+    def __init__(self, federation_id: int, name: str, host_guild_id: int) -> None:
+        self.federation_id = federation_id
+        self.name = name
+        self.host_guild_id = host_guild_id
+        self.limits: dict[int, int] = {}
+        self.members: dict[tuple[int, int], None] = {}
+        self.counts: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def link(self, guild_id: int, contribution_limit: int) -> None:
+        """Add a guild to the federation, or change its contribution limit."""
+        self.limits[guild_id] = contribution_limit
+        self.counts.setdefault(guild_id, 0)
+
+    def unlink(self, guild_id: int) -> None:
+        """Remove a guild and all of its queued members from the federation."""
+        self.limits.pop(guild_id, None)
+        self.counts.pop(guild_id, None)
+        for key in [key for key in self.members if key[0] == guild_id]:
+            del self.members[key]
+
+    def add(self, guild_id: int, member_id: int) -> None:
+        """Append a queued member to the back of the pool."""
+        key = (guild_id, member_id)
+        if guild_id in self.limits and key not in self.members:
+            self.members[key] = None
+            self.counts[guild_id] += 1
+
+    def remove(self, guild_id: int, member_id: int) -> None:
+        """Remove a member from the pool."""
+        key = (guild_id, member_id)
+        if key in self.members:
+            del self.members[key]
+            self.counts[guild_id] -= 1
+
+    def contributing_guilds(self) -> int:
+        """Number of guilds that currently have members in the pool."""
+        return sum(1 for count in self.counts.values() if count)
+
+    def select(self, size: int, skip: set[int] = frozenset(), remote_skip: set[int] = frozenset()) -> list[tuple[int, int]] | None:
+        """
+        Pick the longest-waiting members for one session, respecting each guild's contribution limit.
+
+        Args:
+            size (int): The number of members the session needs.
+            skip (set[int]): Member IDs that must not be picked.
+            remote_skip (set[int]): Member IDs that must not be picked from guilds other than the host.
+
+        Returns:
+            list: ``(guild_id, member_id)`` pairs, or None if the pool cannot fill a session.
+        """
+        # The pool can only fill a session if the capped contributions add up
+        if sum(min(count, self.limits[guild_id]) for guild_id, count in self.counts.items()) < size:
+            return None
+        taken: dict[int, int] = {}
+        selected = []
+        for guild_id, member_id in self.members:
+            if member_id in skip or taken.get(guild_id, 0) >= self.limits[guild_id]:
+                continue
+            if guild_id != self.host_guild_id and member_id in remote_skip:
+                continue
+            taken[guild_id] = taken.get(guild_id, 0) + 1
+            selected.append((guild_id, member_id))
+            if len(selected) == size:
+                return selected
+        return None
@@ -0,0 +1,108 @@
+"""
+Cached, immutable queueing settings for each guild.
+Settings are read from the database once and kept as a ``GuildSettings`` record until a command changes them.
+Each change gives the guild a new version and a new record. The channels and role the settings point at are
+resolved once per record and cached on it. A channel or role delete event drops the cached handles, so they
+are resolved again on the next use.
+"""
+import discord
+
+from settings import utils
+
+FIELDS = (
+    'guild_id', 'admin_role_id', 'queue_category_id', 'queue_channel_id', 'session_calls_category_id',
+    'log_channel_id', 'sessions_channel_id', 'amount_to_queue', 'paused',
+)
+
+
+class Handles:
+    """The channels and role a guild's settings point at. Any of them is None if it no longer exists."""
+
+    __slots__ = ('guild', 'admin_role', 'queue_category', 'queue_channel', 'session_calls_category',
+                 'log_channel', 'sessions_channel')
+
+    def __init__(self, guild: discord.Guild, settings: 'GuildSettings') -> None:
+        self.guild = guild
+        self.admin_role = guild.get_role(settings.admin_role_id)
+        self.queue_category = guild.get_channel(settings.queue_category_id)
+        self.queue_channel = guild.get_channel(settings.queue_channel_id)
+        self.session_calls_category = guild.get_channel(settings.session_calls_category_id)
+        self.log_channel = guild.get_channel(settings.log_channel_id)
+        self.sessions_channel = guild.get_channel(settings.sessions_channel_id)
+
+
+class GuildSettings:
+    """
+    One version of a guild's queueing settings.
+
+    Fields are read as attributes, or by key like the dict returned by ``utils.get_queueing_settings``.
+    """
+
+    __slots__ = FIELDS + ('version', '_handles')
+
+    def __init__(self, row: dict, version: int) -> None:
+        for field in FIELDS:
+            object.__setattr__(self, field, row[field])
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, '_handles', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GuildSettings is immutable, save new settings and invalidate the cache instead")
+
+    def __getitem__(self, key: str):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in FIELDS else default
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def channel_ids(self) -> tuple[int, ...]:
+        return (self.queue_category_id, self.queue_channel_id, self.session_calls_category_id,
+                self.log_channel_id, self.sessions_channel_id)
+
+    def handles(self, guild: discord.Guild) -> Handles:
+        """Get the resolved channels and role, resolving them if they are not cached."""
+        handles = self._handles
+        # discord.py builds a new guild object when a guild becomes available again, with new channel objects
+        if handles is None or handles.guild is not guild:
+            handles = Handles(guild, self)
+            object.__setattr__(self, '_handles', handles)
+        return handles
+
+    def forget_handles(self) -> None:
+        object.__setattr__(self, '_handles', None)
+
+
+class SettingsCache:
+    """The current GuildSettings of every guild, loaded from the database on first use."""
+
+    def __init__(self) -> None:
+        # None marks a guild known to have no settings, so unconfigured guilds do not query the database either
+        self.entries: dict[int, GuildSettings | None] = {}
+        self.versions: dict[int, int] = {}
+
+    async def get(self, guild_id: int) -> GuildSettings | None:
+        if guild_id in self.entries:
+            return self.entries[guild_id]
+        version = self.versions.get(guild_id, 0)
+        row = await utils.get_queueing_settings(guild_id)
+        settings = GuildSettings(row, version) if row else None
+        # Keep the result only if the settings did not change while it was being read
+        if self.versions.get(guild_id, 0) == version:
+            self.entries[guild_id] = settings
+        return settings
+
+    def invalidate(self, guild_id: int) -> None:
+        """Call after changing a guild's settings in the database."""
+        self.versions[guild_id] = self.versions.get(guild_id, 0) + 1
+        self.entries.pop(guild_id, None)
+
+    def object_deleted(self, guild_id: int, object_id: int) -> None:
+        """Drop the cached handles of a guild whose settings point at a deleted channel or role."""
+        settings = self.entries.get(guild_id)
+        if settings and (object_id == settings.admin_role_id or object_id in settings.channel_ids()):
+            settings.forget_handles()
@@ -0,0 +1,90 @@
+"""
+Per-guild inbox for voice state updates.
+Updates are collected per guild and drained by a single consumer task, so a guild's queue is only ever
+modified by one coroutine at a time. Updates for the same member within one batch are collapsed into a
+single transition from the first known channel to the last one.
+"""
+import asyncio
+import traceback
+from typing import Awaitable, Callable
+
+import discord
+
+
+class VoiceUpdate:
+    """The net voice transition of one member within a batch."""
+
+    __slots__ = ('member', 'before_id', 'after_id')
+
+    def __init__(self, member: discord.Member, before_id: int | None, after_id: int | None) -> None:
+        self.member = member
+        self.before_id = before_id
+        self.after_id = after_id
+
+    def joined(self, channel_id: int) -> bool:
+        return self.before_id != channel_id and self.after_id == channel_id
+
+    def left(self, channel_id: int) -> bool:
+        return self.before_id == channel_id and self.after_id != channel_id
+
+
+class GuildInbox:
+    """Serializes and coalesces voice state updates per guild."""
+
+    def __init__(self, handler: Callable[[int, list[VoiceUpdate]], Awaitable]) -> None:
+        self.handler = handler
+        # Awaited before each batch, so admission control can slow down a guild that floods the bot
+        self.throttle: Callable[[int], Awaitable] | None = None
+        self.pending: dict[int, dict[int, VoiceUpdate]] = {}
+        self.consumers: dict[int, asyncio.Task] = {}
+        self.locks: dict[int, asyncio.Lock] = {}
+
+    def lock(self, guild_id: int) -> asyncio.Lock:
+        """
+        Get the lock guarding a guild's queue state.
+
+        Anything else that reads and writes the guild's queue must hold this lock while doing so.
+        """
+        if guild_id not in self.locks:
+            self.locks[guild_id] = asyncio.Lock()
+        return self.locks[guild_id]
+
+    def put(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
+        """Add a voice state update to the guild's inbox without waiting for it to be processed."""
+        guild_id = member.guild.id
+        batch = self.pending.setdefault(guild_id, {})
+        after_id = after.channel.id if after.channel else None
+        update = batch.get(member.id)
+        if update:
+            update.member = member
+            update.after_id = after_id
+        else:
+            batch[member.id] = VoiceUpdate(member, before.channel.id if before.channel else None, after_id)
+        if guild_id not in self.consumers:
+            self.consumers[guild_id] = asyncio.create_task(self._consume(guild_id))
+
+    def backlog(self, guild_id: int) -> int:
+        """Number of members with unprocessed updates in the guild's inbox."""
+        return len(self.pending.get(guild_id, ()))
+
+    async def stop(self) -> None:
+        """Cancel every consumer. Unprocessed updates are discarded."""
+        for task in self.consumers.values():
+            task.cancel()
+        await asyncio.gather(*self.consumers.values(), return_exceptions=True)
+        self.consumers.clear()
+        self.pending.clear()
+
+    async def _consume(self, guild_id: int) -> None:
+        try:
+            while self.pending.get(guild_id):
+                if self.throttle:
+                    await self.throttle(guild_id)
+                batch = self.pending.pop(guild_id)
+                async with self.lock(guild_id):
+                    try:
+                        await self.handler(guild_id, list(batch.values()))
+                    except Exception:
+                        traceback.print_exc()
+        finally:
+            self.consumers.pop(guild_id, None)
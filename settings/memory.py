@@ -0,0 +1,51 @@
+"""
+Memory accounting helpers used by the owner diagnostics commands.
+"""
+import sys
+import tracemalloc
+
+
+def deep_sizeof(obj, seen: set | None = None) -> int:
+    """
+    Approximate the memory held by an object and everything it references.
+
+    Discord models are counted shallowly, since they live in discord.py's cache regardless of whether we
+    hold a reference to them. Objects reachable more than once are only counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))) or type(obj).__module__.startswith('discord'):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == 'deque':
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), seen)
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def snapshot_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int = 10) -> list[str]:
+    """Describe the source lines whose allocations grew the most between two snapshots."""
+    stats = after.compare_to(before, 'lineno')
+    lines = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"{format_bytes(stat.size_diff):>10} ({stat.count_diff:+}) {frame.filename}:{frame.lineno}")
+    return lines
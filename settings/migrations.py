@@ -0,0 +1,382 @@
+"""
+Versioned schema migrations for queueing_system.db.
+
+The schema version is kept in SQLite's ``user_version``. At startup every migration newer than it is applied
+in order, each in its own transaction together with the version bump, so a failed migration leaves the
+database at the previous version. After migrating, the schema is checked against a checksum of what the
+migrations produce on an empty database, which catches tables or indexes that were changed by hand.
+
+Migrations that move a lot of data can also register a background step. Background steps run after the bot
+is ready, one small batch per transaction, and store their progress in 'data_migrations' so they resume
+where they left off after a restart.
+
+To change the schema, append a migration to ``MIGRATIONS``. Never edit a migration that has been released.
+"""
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import traceback
+from datetime import datetime
+from typing import Awaitable, Callable
+
+import aiosqlite
+
+DATABASE = "queueing_system.db"
+
+# The tables created by init_db before the schema was versioned. Every statement is idempotent, so existing
+# databases at user_version 0 are brought to version 1 without changes.
+BASELINE = [
+    '''
+        CREATE TABLE IF NOT EXISTS queueing_settings (
+            guild_id INTEGER PRIMARY KEY,
+            admin_role_id INTEGER NOT NULL,
+            queue_category_id INTEGER NOT NULL,
+            queue_channel_id INTEGER NOT NULL,
+            session_calls_category_id INTEGER NOT NULL,
+            log_channel_id INTEGER NOT NULL,
+            sessions_channel_id INTEGER NOT NULL,
+            amount_to_queue INTEGER NOT NULL DEFAULT 0,
+            paused BOOLEAN NOT NULL DEFAULT 0
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS dm_opt_out (
+            user_id INTEGER PRIMARY KEY
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS queue_status_messages (
+            guild_id INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS queue_windows (
+            window_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            days TEXT NOT NULL,
+            start_minute INTEGER NOT NULL,
+            end_minute INTEGER NOT NULL
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_queue_windows_guild ON queue_windows (guild_id)',
+    '''
+        CREATE TABLE IF NOT EXISTS queue_autoscale (
+            guild_id INTEGER PRIMARY KEY,
+            target_wait_seconds INTEGER NOT NULL,
+            min_size INTEGER NOT NULL,
+            max_size INTEGER NOT NULL
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS queue_timeouts (
+            guild_id INTEGER PRIMARY KEY,
+            idle_seconds INTEGER NOT NULL DEFAULT 0,
+            max_session_seconds INTEGER NOT NULL DEFAULT 0,
+            queue_expiry_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS audit_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            kind TEXT NOT NULL,
+            member_id INTEGER,
+            details TEXT NOT NULL
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_audit_events_guild ON audit_events (guild_id, event_id)',
+    'CREATE INDEX IF NOT EXISTS idx_audit_events_kind ON audit_events (guild_id, kind, event_id)',
+    'CREATE INDEX IF NOT EXISTS idx_audit_events_day ON audit_events (day)',
+    '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS audit_events_fts USING fts5 (
+            details, content='audit_events', content_rowid='event_id'
+        )
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS audit_events_ai AFTER INSERT ON audit_events BEGIN
+            INSERT INTO audit_events_fts (rowid, details) VALUES (new.event_id, new.details);
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS audit_events_ad AFTER DELETE ON audit_events BEGIN
+            INSERT INTO audit_events_fts (audit_events_fts, rowid, details) VALUES ('delete', old.event_id, old.details);
+        END
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS federations (
+            federation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            join_code TEXT NOT NULL UNIQUE,
+            host_guild_id INTEGER NOT NULL UNIQUE
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS federation_members (
+            guild_id INTEGER PRIMARY KEY,
+            federation_id INTEGER NOT NULL,
+            contribution_limit INTEGER NOT NULL
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS session_history (
+            session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            code TEXT NOT NULL,
+            channel_id INTEGER NOT NULL,
+            started_at REAL NOT NULL,
+            ended_at REAL NOT NULL,
+            member_count INTEGER NOT NULL
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_session_history_guild ON session_history (guild_id, session_id)',
+    '''
+        CREATE TABLE IF NOT EXISTS session_members (
+            row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            member_id INTEGER NOT NULL,
+            remote INTEGER NOT NULL DEFAULT 0
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_session_members_guild ON session_members (guild_id, row_id)',
+    '''
+        CREATE TABLE IF NOT EXISTS export_checkpoints (
+            name TEXT NOT NULL,
+            dataset TEXT NOT NULL,
+            last_id INTEGER NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (name, dataset)
+        )
+    ''',
+]
+
+
+async def _baseline(db: aiosqlite.Connection) -> None:
+    for statement in BASELINE:
+        await db.execute(statement)
+
+
+async def _queue_entries(db: aiosqlite.Connection) -> None:
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS queue_entries (
+            guild_id INTEGER NOT NULL,
+            member_id INTEGER NOT NULL,
+            joined_at REAL NOT NULL,
+            PRIMARY KEY (guild_id, member_id)
+        )
+    ''')
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS data_migrations (
+            name TEXT PRIMARY KEY,
+            position TEXT,
+            done INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+async def _import_legacy_queues(db: aiosqlite.Connection, position: str | None, batch_size: int) -> str | None:
+    """
+    Import up to ``batch_size`` of the old queues/queue_<guild>.json files into 'queue_entries'.
+
+    Guilds listed in 'legacy_queue_imports' were already imported, or their queue was saved by the running bot
+    and is newer than their file, so they are skipped. A guild's rows are deleted whenever its queue empties,
+    so whether it has rows cannot tell the two apart.
+    """
+    paths = sorted(glob.glob(os.path.join('queues', 'queue_*.json')))
+    paths = [path for path in paths if position is None or path > position][:batch_size]
+    for path in paths:
+        try:
+            guild_id = int(os.path.basename(path)[len('queue_'):-len('.json')])
+        except ValueError:
+            print(f"Skipping unreadable legacy queue file {path}")
+            continue
+        await _import_legacy_queue(db, guild_id, path)
+    return paths[-1] if paths else None
+
+
+async def _import_legacy_queue(db: aiosqlite.Connection, guild_id: int, path: str) -> None:
+    """Import one guild's legacy queue file, unless the guild is listed in 'legacy_queue_imports'."""
+    async with db.execute('SELECT 1 FROM legacy_queue_imports WHERE guild_id = ?', (guild_id,)) as cursor:
+        if await cursor.fetchone():
+            return
+    try:
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+    except (ValueError, OSError):
+        print(f"Skipping unreadable legacy queue file {path}")
+        return
+    rows = []
+    for member_id, entry in entries.items():
+        try:
+            joined_at = datetime.fromisoformat(entry['joined_at']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        rows.append((guild_id, int(member_id), joined_at))
+    await db.executemany('INSERT OR IGNORE INTO queue_entries (guild_id, member_id, joined_at) VALUES (?, ?, ?)', rows)
+    await db.execute('INSERT OR IGNORE INTO legacy_queue_imports (guild_id) VALUES (?)', (guild_id,))
+
+
+async def import_legacy_queue(guild_id: int, database: str = DATABASE) -> None:
+    """
+    Import a guild's legacy queue file now instead of waiting for the background migration to reach it.
+
+    Called before a guild's queue is loaded, as saving the loaded queue marks the guild as imported and its
+    file would then be skipped.
+    """
+    path = os.path.join('queues', f'queue_{guild_id}.json')
+    if not os.path.exists(path):
+        return
+    async with aiosqlite.connect(database, isolation_level=None) as db:
+        await db.execute('BEGIN IMMEDIATE')
+        try:
+            await _import_legacy_queue(db, guild_id, path)
+        except Exception:
+            await db.execute('ROLLBACK')
+            raise
+        await db.execute('COMMIT')
+
+
+async def _ready_checks(db: aiosqlite.Connection) -> None:
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS ready_check_settings (
+            guild_id INTEGER PRIMARY KEY,
+            timeout_seconds INTEGER NOT NULL,
+            non_responders TEXT NOT NULL DEFAULT 'requeue'
+        )
+    ''')
+
+
+async def _legacy_queue_imports(db: aiosqlite.Connection) -> None:
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS legacy_queue_imports (
+            guild_id INTEGER PRIMARY KEY
+        )
+    ''')
+    # Guilds whose queue is already in the database must not get their old file imported over it
+    await db.execute('INSERT OR IGNORE INTO legacy_queue_imports (guild_id) SELECT DISTINCT guild_id FROM queue_entries')
+
+
+class Migration:
+    """One schema version."""
+
+    def __init__(self, version: int, description: str, schema: Callable[[aiosqlite.Connection], Awaitable],
+                 background: Callable[[aiosqlite.Connection, str | None, int], Awaitable[str | None]] | None = None) -> None:
+        """
+        Args:
+            version (int): The schema version this migration produces.
+            description (str): What the migration does.
+            schema (Callable): Applies the schema change. Runs inside the migration's transaction.
+            background (Callable | None): An optional data migration, called as ``background(db, position, batch_size)``
+                with the position returned by its previous batch (None at first). It returns the new position,
+                or None once there is nothing left to do. Each batch runs in its own transaction.
+        """
+        self.version = version
+        self.description = description
+        self.schema = schema
+        self.background = background
+
+    @property
+    def name(self) -> str:
+        return f"{self.version:04d}_{self.schema.__name__.strip('_')}"
+
+
+MIGRATIONS = [
+    Migration(1, "Tables created before schema versioning", _baseline),
+    Migration(2, "Store queues in the database instead of queues/*.json", _queue_entries, _import_legacy_queues),
+    Migration(3, "Ready check settings", _ready_checks),
+    Migration(4, "Track which guilds' legacy queue files were imported", _legacy_queue_imports),
+]
+
+
+async def schema_checksum(db: aiosqlite.Connection) -> str:
+    """Hash the definition of every table, index and trigger, ignoring whitespace."""
+    digest = hashlib.sha256()
+    query = "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+    async with db.execute(query) as cursor:
+        async for kind, name, sql in cursor:
+            digest.update(f"{kind}:{name}:{' '.join((sql or '').split())};".encode())
+    return digest.hexdigest()
+
+
+async def apply_migrations(db: aiosqlite.Connection) -> list[Migration]:
+    """
+    Apply every pending migration to an open connection, each in its own transaction.
+
+    Returns:
+        list[Migration]: The migrations that were applied.
+
+    Raises:
+        RuntimeError: If the database is newer than this version of the bot.
+    """
+    async with db.execute('PRAGMA user_version') as cursor:
+        current = (await cursor.fetchone())[0]
+    if current > MIGRATIONS[-1].version:
+        raise RuntimeError(f"{DATABASE} is at schema version {current}, but this bot only knows up to {MIGRATIONS[-1].version}")
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        await db.execute('BEGIN IMMEDIATE')
+        try:
+            await migration.schema(db)
+            await db.execute(f'PRAGMA user_version = {migration.version}')
+        except Exception:
+            await db.execute('ROLLBACK')
+            raise
+        await db.execute('COMMIT')
+        applied.append(migration)
+    return applied
+
+
+async def migrate(database: str = DATABASE) -> None:
+    """Bring the database up to the latest schema version and verify its schema."""
+    async with aiosqlite.connect(database, isolation_level=None) as db:
+        for migration in await apply_migrations(db):
+            print(f"Applied migration {migration.name}: {migration.description}")
+        actual = await schema_checksum(db)
+    async with aiosqlite.connect(':memory:', isolation_level=None) as reference:
+        await apply_migrations(reference)
+        expected = await schema_checksum(reference)
+    if actual != expected:
+        print(f"WARNING: the schema of {database} does not match schema version {MIGRATIONS[-1].version}. "
+              f"Was a table or index changed outside of a migration?")
+
+
+async def run_background_migrations(database: str = DATABASE, batch_size: int = 50, pause: float = 0.1) -> None:
+    """Run the background steps of every applied migration to completion, one batch at a time."""
+    for migration in MIGRATIONS:
+        if not migration.background:
+            continue
+        try:
+            async with aiosqlite.connect(database, isolation_level=None) as db:
+                async with db.execute('SELECT position, done FROM data_migrations WHERE name = ?', (migration.name,)) as cursor:
+                    row = await cursor.fetchone()
+                position, done = row if row else (None, 0)
+                if done:
+                    continue
+                while not done:
+                    await db.execute('BEGIN IMMEDIATE')
+                    try:
+                        new_position = await migration.background(db, position, batch_size)
+                        done = int(new_position is None)
+                        position = new_position if new_position is not None else position
+                        await db.execute(
+                            'INSERT OR REPLACE INTO data_migrations (name, position, done) VALUES (?, ?, ?)',
+                            (migration.name, position, done)
+                        )
+                    except Exception:
+                        await db.execute('ROLLBACK')
+                        raise
+                    await db.execute('COMMIT')
+                    # Leave the database to the bot between batches
+                    await asyncio.sleep(pause)
+            print(f"Finished background migration {migration.name}")
+        except Exception:
+            # Try again on the next start; the batches done so far are kept
+            traceback.print_exc()
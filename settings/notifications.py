@@ -0,0 +1,103 @@
+"""
+Direct message fan-out for the queueing system.
+Callers hand messages to a bounded queue and return immediately; a small pool of workers delivers them.
+Repeat messages are deduplicated per member, opted-out users are skipped, and members with closed DMs
+are remembered for a while so we stop hitting the API for them.
+"""
+import asyncio
+import time
+from typing import Callable
+
+import discord
+
+from settings import utils
+
+
+class Notifier:
+    """Background DM delivery with deduplication, opt-out and closed-DM caching."""
+
+    def __init__(self, workers: int = 4, max_pending: int = 1000, dedup_window: float = 60.0, closed_ttl: float = 3600.0) -> None:
+        self.worker_count = workers
+        self.dedup_window = dedup_window
+        self.closed_ttl = closed_ttl
+        self.pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.opted_out: set[int] = set()
+        self.recent: dict[tuple[int, str], float] = {}
+        self.closed: dict[int, float] = {}
+        self.workers: list[asyncio.Task] = []
+        self.dropped = 0
+        # Consulted before queueing a message, so admission control can shed direct messages under load
+        self.admit: Callable[[discord.abc.User], bool] | None = None
+
+    async def start(self) -> None:
+        """Load opt-outs from the database and start the worker pool."""
+        self.opted_out = await utils.get_dm_opt_outs()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        """Stop the worker pool. Undelivered messages are discarded."""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def notify(self, member: discord.abc.User, content: str, essential: bool = False) -> bool:
+        """
+        Schedule a direct message without waiting for it to be delivered.
+
+        Args:
+            member (discord.abc.User): The recipient.
+            content (str): The message to send.
+            essential (bool): Deliver the message even while direct messages are being shed.
+
+        Returns:
+            bool: True if the message was queued, False if it was skipped or the queue is full.
+        """
+        now = time.monotonic()
+        if member.id in self.opted_out:
+            return False
+        if self.closed.get(member.id, 0) > now:
+            return False
+        key = (member.id, content)
+        if self.recent.get(key, 0) > now:
+            return False
+        if not essential and self.admit and not self.admit(member):
+            return False
+        try:
+            self.pending.put_nowait((member, content))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.recent[key] = now + self.dedup_window
+        if len(self.recent) > 10000:
+            self.recent = {k: v for k, v in self.recent.items() if v > now}
+        return True
+
+    async def set_opt_out(self, user_id: int, opted_out: bool) -> None:
+        """
+        Persist a user's DM preference.
+
+        Args:
+            user_id (int): The Discord user ID.
+            opted_out (bool): True to stop direct messages, False to allow them again.
+        """
+        await utils.set_dm_opt_out(user_id, opted_out)
+        if opted_out:
+            self.opted_out.add(user_id)
+        else:
+            self.opted_out.discard(user_id)
+
+    async def _worker(self) -> None:
+        while True:
+            member, content = await self.pending.get()
+            try:
+                await member.send(content)
+            except discord.Forbidden:
+                now = time.monotonic()
+                self.closed[member.id] = now + self.closed_ttl
+                if len(self.closed) > 10000:
+                    self.closed = {k: v for k, v in self.closed.items() if v > now}
+            except discord.HTTPException:
+                pass
+            finally:
+                self.pending.task_done()
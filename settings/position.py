@@ -0,0 +1,124 @@
+"""
+Queue position lookups and wait time estimates.
+QueueIndex is a Fenwick tree over join order, so a member's position is a prefix sum instead of a scan
+of the whole queue. EtaEstimator turns recent session formation times into a rough wait estimate.
+"""
+import math
+import time
+from collections import deque
+
+
+class QueueIndex:
+    """Order-statistics index over a guild's queue with O(log n) add, remove and position lookups."""
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self.tree = [0] * (capacity + 1)
+        self.slots: dict[int, int] = {}
+        self.next_slot = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self.slots
+
+    def add(self, member_id: int) -> None:
+        """Append a member to the back of the queue."""
+        if member_id in self.slots:
+            return
+        if self.next_slot >= self.capacity:
+            self._rebuild()
+        self.slots[member_id] = self.next_slot
+        self._update(self.next_slot, 1)
+        self.next_slot += 1
+
+    def remove(self, member_id: int) -> None:
+        """Remove a member from wherever they are in the queue."""
+        slot = self.slots.pop(member_id, None)
+        if slot is not None:
+            self._update(slot, -1)
+
+    def position(self, member_id: int) -> int | None:
+        """
+        Get a member's 1-based position in the queue.
+
+        Returns:
+            int: The position, or None if the member is not queued.
+        """
+        slot = self.slots.get(member_id)
+        if slot is None:
+            return None
+        i = slot + 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _update(self, slot: int, delta: int) -> None:
+        i = slot + 1
+        while i <= self.capacity:
+            self.tree[i] += delta
+            i += i & -i
+
+    def _rebuild(self) -> None:
+        # Slots are never reused, so compact the live members to the front once we run out
+        members = sorted(self.slots, key=self.slots.get)
+        self.capacity = max(64, len(members) * 2)
+        self.tree = [0] * (self.capacity + 1)
+        self.slots = {}
+        self.next_slot = 0
+        for member_id in members:
+            self.slots[member_id] = self.next_slot
+            self._update(self.next_slot, 1)
+            self.next_slot += 1
+
+
+class EtaEstimator:
+    """Estimates queue wait times from the rate at which recent sessions were formed."""
+
+    def __init__(self, samples: int = 20, max_age: float = 3600.0) -> None:
+        self.max_age = max_age
+        self.sessions: deque[float] = deque(maxlen=samples)
+
+    def record_session(self) -> None:
+        """Record that a session was just formed."""
+        self.sessions.append(time.monotonic())
+
+    def sessions_per_second(self) -> float | None:
+        now = time.monotonic()
+        while self.sessions and now - self.sessions[0] > self.max_age:
+            self.sessions.popleft()
+        if len(self.sessions) < 2:
+            return None
+        span = now - self.sessions[0]
+        return (len(self.sessions) - 1) / span if span > 0 else None
+
+    def eta(self, position: int, amount_to_queue: int) -> float | None:
+        """
+        Estimate how long a member at the given position will wait.
+
+        Args:
+            position (int): The member's 1-based queue position.
+            amount_to_queue (int): The number of members per session.
+
+        Returns:
+            float: The estimated wait in seconds, or None if there is not enough history yet.
+        """
+        rate = self.sessions_per_second()
+        if not rate or amount_to_queue <= 0:
+            return None
+        return math.ceil(position / amount_to_queue) / rate
+
+
+def format_eta(seconds: float | None) -> str:
+    """Format an ETA for display."""
+    if seconds is None:
+        return "Unknown"
+    if seconds < 60:
+        return "less than a minute"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"~{minutes}m"
+    return f"~{minutes // 60}h {minutes % 60}m"
@@ -0,0 +1,101 @@
+"""
+Ready checks that run before a session is created.
+When a guild enables them, the members picked for a session are first asked to confirm with a button in the
+queue channel. Each pending match is a small state machine: it stays pending while members confirm, members
+who decline, leave the queue or do not answer in time are replaced from the queue, and it ends as started
+once everyone is ready or as cancelled once the queue cannot fill it. Timeouts run on the shared timer wheel
+and the prompt's view has no timeout of its own, so a pending check costs no task.
+"""
+import itertools
+from typing import Awaitable, Callable
+
+import discord
+
+from settings.timers import Timer
+
+NON_RESPONDER_ACTIONS = ('requeue', 'drop')
+
+PENDING = 'pending'
+STARTED = 'started'
+CANCELLED = 'cancelled'
+
+_ids = itertools.count(1)
+
+
+class ReadyCheck:
+    """One match waiting for its members to confirm they are ready."""
+
+    __slots__ = ('check_id', 'guild_id', 'size', 'members', 'excluded', 'state', 'rounds', 'deadline', 'timer',
+                 'message', 'view')
+
+    def __init__(self, guild_id: int, size: int, member_ids: list[int]) -> None:
+        self.check_id = next(_ids)
+        self.guild_id = guild_id
+        self.size = size
+        # Member ID to whether they confirmed, in queue order
+        self.members: dict[int, bool] = dict.fromkeys(member_ids, False)
+        # Members who declined or did not answer are not picked again for this match
+        self.excluded: set[int] = set()
+        self.state = PENDING
+        self.rounds = 0
+        self.deadline = 0
+        self.timer: Timer | None = None
+        self.message: discord.Message | None = None
+        self.view: ReadyCheckView | None = None
+
+    @property
+    def complete(self) -> bool:
+        return len(self.members) == self.size and all(self.members.values())
+
+    @property
+    def missing(self) -> int:
+        return self.size - len(self.members)
+
+    def waiting(self) -> list[int]:
+        """Members who have not confirmed yet."""
+        return [member_id for member_id, ready in self.members.items() if not ready]
+
+    def confirm(self, member_id: int) -> bool:
+        """Mark a member as ready. Returns False if they are not part of the pending match."""
+        if self.state != PENDING or member_id not in self.members:
+            return False
+        self.members[member_id] = True
+        return True
+
+    def add(self, member_ids: list[int]) -> None:
+        for member_id in member_ids:
+            self.members[member_id] = False
+
+    def remove(self, member_id: int, exclude: bool = True) -> None:
+        self.members.pop(member_id, None)
+        if exclude:
+            self.excluded.add(member_id)
+
+    def describe(self) -> str:
+        """The prompt text, mentioning everyone still to confirm."""
+        waiting = self.waiting()
+        lines = [
+            f"**Ready check** for the next session: {self.size - len(waiting)}/{self.size} ready.",
+            f"{' '.join(f'<@{member_id}>' for member_id in waiting)} press **Ready** <t:{self.deadline}:R> to keep your spot.",
+        ]
+        if self.rounds > 1:
+            lines.append("Some members did not confirm and were replaced from the queue.")
+        return "\n".join(lines)
+
+
+class ReadyCheckView(discord.ui.View):
+    """The Ready and Not now buttons of a ready check prompt."""
+
+    def __init__(self, check: ReadyCheck, respond: Callable[[ReadyCheck, discord.Interaction, bool], Awaitable]) -> None:
+        # The check's timeout runs on the timer wheel, so the view does not need a timeout task of its own
+        super().__init__(timeout=None)
+        self.check = check
+        self.respond = respond
+
+    @discord.ui.button(label="Ready", style=discord.ButtonStyle.success)
+    async def ready(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.respond(self.check, interaction, True)
+
+    @discord.ui.button(label="Not now", style=discord.ButtonStyle.secondary)
+    async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.respond(self.check, interaction, False)
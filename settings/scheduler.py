@@ -0,0 +1,181 @@
+"""
+Scheduled queue windows and automatic session sizing.
+A guild with windows configured has its queue opened and closed at the window boundaries (UTC). Every
+guild's next boundary is a single timer on the shared TimerWheel, so nothing sleeps per guild.
+The Autoscaler picks a session size from the recent arrival rate so the first member of a session is not
+kept waiting longer than the target.
+"""
+import math
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from settings import utils
+from settings.timers import Timer, TimerWheel
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def parse_days(spec: str) -> str:
+    """
+    Normalize a day specification such as ``mon-fri``, ``sat,sun`` or ``*``.
+
+    Raises:
+        ValueError: If the specification contains an unknown day.
+    """
+    spec = spec.strip().lower()
+    if spec in ('*', 'all', 'daily'):
+        return ','.join(DAYS)
+    days = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = (DAYS.index(d.strip()[:3]) for d in part.split('-', 1))
+            day = first
+            while True:
+                days.add(day)
+                if day == last:
+                    break
+                day = (day + 1) % 7
+        else:
+            days.add(DAYS.index(part[:3]))
+    return ','.join(DAYS[d] for d in sorted(days))
+
+
+def parse_time(value: str) -> int:
+    """
+    Parse an ``HH:MM`` time into minutes after midnight.
+
+    Raises:
+        ValueError: If the time is not valid.
+    """
+    hours, minutes = value.strip().split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hours * 60 + minutes
+
+
+class QueueWindow:
+    """A recurring period during which a guild's queue is open. Windows may cross midnight."""
+
+    __slots__ = ('window_id', 'days', 'start', 'end')
+
+    def __init__(self, window_id: int, days: str, start: int, end: int) -> None:
+        self.window_id = window_id
+        self.days = {DAYS.index(d) for d in days.split(',')}
+        self.start = start
+        self.end = end
+
+    def occurrences(self, now: datetime):
+        """Yield ``(opens_at, closes_at)`` for every occurrence from yesterday to a week from now."""
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        length = (self.end - self.start) % 1440 or 1440
+        for offset in range(-1, 8):
+            day = midnight + timedelta(days=offset)
+            if day.weekday() in self.days:
+                opens_at = day + timedelta(minutes=self.start)
+                yield opens_at, opens_at + timedelta(minutes=length)
+
+
+def is_open(windows: list[QueueWindow], now: datetime) -> bool:
+    """Whether any window is open at ``now``."""
+    return any(opens_at <= now < closes_at for window in windows for opens_at, closes_at in window.occurrences(now))
+
+
+def next_change(windows: list[QueueWindow], now: datetime) -> datetime | None:
+    """The next time a window opens or closes, or None if there are no windows."""
+    boundaries = [
+        boundary
+        for window in windows
+        for occurrence in window.occurrences(now)
+        for boundary in occurrence
+        if boundary > now
+    ]
+    return min(boundaries, default=None)
+
+
+class QueueScheduler:
+    """Opens and closes guild queues on their configured windows."""
+
+    def __init__(self, timers: TimerWheel, on_change: Callable[[int, bool], Awaitable]) -> None:
+        self.timers = timers
+        self.on_change = on_change
+        self.windows: dict[int, list[QueueWindow]] = {}
+        self.pending: dict[int, Timer] = {}
+
+    async def start(self) -> None:
+        """Load every guild's windows, bring each queue in line with them and schedule their next boundaries."""
+        windows = {}
+        for window_id, guild_id, days, start, end in await utils.get_queue_windows():
+            windows.setdefault(guild_id, []).append(QueueWindow(window_id, days, start, end))
+        for guild_id, guild_windows in windows.items():
+            self.set_windows(guild_id, guild_windows)
+            # Boundaries that passed while the bot was offline have no timer, so apply the current state now
+            try:
+                await self.on_change(guild_id, self.is_open(guild_id))
+            except Exception:
+                # One guild's missing permissions must not keep the other guilds' schedules from loading
+                traceback.print_exc()
+
+    async def reload(self, guild_id: int) -> None:
+        """Reload a guild's windows after they were changed."""
+        rows = await utils.get_queue_windows(guild_id)
+        self.set_windows(guild_id, [QueueWindow(window_id, days, start, end) for window_id, _, days, start, end in rows])
+
+    def set_windows(self, guild_id: int, windows: list[QueueWindow]) -> None:
+        self.timers.cancel(self.pending.pop(guild_id, None))
+        if windows:
+            self.windows[guild_id] = windows
+            self._schedule(guild_id)
+        else:
+            self.windows.pop(guild_id, None)
+
+    def is_open(self, guild_id: int) -> bool | None:
+        """Whether the guild's queue should be open now, or None if it has no windows."""
+        windows = self.windows.get(guild_id)
+        if not windows:
+            return None
+        return is_open(windows, datetime.now(timezone.utc))
+
+    def _schedule(self, guild_id: int) -> None:
+        now = datetime.now(timezone.utc)
+        change = next_change(self.windows[guild_id], now)
+        if change:
+            self.pending[guild_id] = self.timers.schedule((change - now).total_seconds(), self._fire, guild_id)
+
+    async def _fire(self, guild_id: int) -> None:
+        self.pending.pop(guild_id, None)
+        if guild_id not in self.windows:
+            return
+        self._schedule(guild_id)
+        await self.on_change(guild_id, self.is_open(guild_id))
+
+
+class Autoscaler:
+    """Chooses a session size from the recent arrival rate of a guild's queue."""
+
+    def __init__(self, window: float = 900.0) -> None:
+        self.window = window
+        self.arrivals: deque[float] = deque()
+
+    def record_arrival(self) -> None:
+        """Record that a member just joined the queue."""
+        self.arrivals.append(time.monotonic())
+
+    def arrivals_per_second(self) -> float:
+        now = time.monotonic()
+        while self.arrivals and now - self.arrivals[0] > self.window:
+            self.arrivals.popleft()
+        return len(self.arrivals) / self.window
+
+    def session_size(self, target_wait: int, min_size: int, max_size: int) -> int:
+        """
+        Get the largest session size that can be filled within ``target_wait`` seconds.
+
+        With members arriving at rate r, the first member of a session of size n waits about (n - 1) / r.
+        """
+        size = math.floor(self.arrivals_per_second() * target_wait) + 1
+        return max(min_size, min(max_size, size))
@@ -0,0 +1,154 @@
+"""
+Optional read-only HTTP/JSON status API for external dashboards.
+Every response is served from an immutable, pre-encoded snapshot that is only rebuilt after the cog flags
+the guild as changed, and carries an ETag so polling clients mostly get an empty 304 back. The API only
+runs if STATUS_API_PORT is set. It uses the aiohttp server that ships with discord.py's own dependency.
+
+Endpoints:
+    GET /guilds                      Guilds with the queueing system running
+    GET /guilds/{guild_id}           Queue, sessions and settings of a guild
+    GET /guilds/{guild_id}/queue     Queued members in order
+    GET /guilds/{guild_id}/sessions  Active sessions
+    GET /guilds/{guild_id}/settings  Queueing settings
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+from discord.ext import commands
+
+
+PARTS = ('queue', 'sessions', 'settings')
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag, or is ``*``. Weak tags (``W/"..."``) compare by their value."""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class Snapshot:
+    """An encoded response body and the state version it was built from."""
+
+    __slots__ = ('etag', 'body')
+
+    def __init__(self, etag: str, body: bytes) -> None:
+        self.etag = etag
+        self.body = body
+
+
+class StatusAPI:
+    """Serves QueueingCog state over HTTP."""
+
+    def __init__(self, bot: commands.Bot, host: str, port: int) -> None:
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.snapshots: dict[tuple[int, str], Snapshot] = {}
+        self.building: dict[tuple[int, str], asyncio.Task] = {}
+        self.runner = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/guilds', self.guilds)
+        app.router.add_get('/guilds/{guild_id:\\d+}', self.guild)
+        app.router.add_get('/guilds/{guild_id:\\d+}/{part:queue|sessions|settings}', self.guild)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    @property
+    def cog(self):
+        # Looked up per request, so the API follows the cog across reloads
+        return self.bot.get_cog('QueueingCog')
+
+    def respond(self, request, snapshot: Snapshot):
+        if etag_matches(request.headers.get('If-None-Match', ''), snapshot.etag):
+            return web.Response(status=304, headers={'ETag': snapshot.etag})
+        return web.Response(body=snapshot.body, content_type='application/json', headers={'ETag': snapshot.etag})
+
+    async def guilds(self, request):
+        cog = self.cog
+        if cog is None:
+            raise web.HTTPServiceUnavailable()
+        guild_ids = sorted(cog.supervisor.guilds)
+        etag = f'"{cog.state_epoch}-{cog.state_version}-{len(guild_ids)}"'
+        snapshot = self.snapshots.get((0, 'guilds'))
+        if snapshot is None or snapshot.etag != etag:
+            guilds = []
+            for guild_id in guild_ids:
+                guild = self.bot.get_guild(guild_id)
+                guilds.append({
+                    'guild_id': str(guild_id),
+                    'name': guild.name if guild else None,
+                    'queued': len(cog.queue.get(guild_id, {})),
+                })
+            snapshot = self.snapshots[(0, 'guilds')] = Snapshot(etag, json.dumps({'guilds': guilds}).encode())
+        return self.respond(request, snapshot)
+
+    async def guild(self, request):
+        cog = self.cog
+        if cog is None:
+            raise web.HTTPServiceUnavailable()
+        guild_id = int(request.match_info['guild_id'])
+        if self.bot.get_guild(guild_id) is None:
+            raise web.HTTPNotFound()
+        part = request.match_info.get('part', 'all')
+        key = (guild_id, part)
+        etag = f'"{cog.state_epoch}-{cog.state_versions.get(guild_id, 0)}-{part}"'
+        snapshot = self.snapshots.get(key)
+        if snapshot is None or snapshot.etag != etag:
+            # Concurrent requests for a stale snapshot share one rebuild
+            if key not in self.building:
+                self.building[key] = asyncio.create_task(self.build(cog, guild_id, part, etag))
+            try:
+                snapshot = await asyncio.shield(self.building[key])
+            finally:
+                if key in self.building and self.building[key].done():
+                    del self.building[key]
+        return self.respond(request, snapshot)
+
+    async def build(self, cog, guild_id: int, part: str, etag: str) -> Snapshot:
+        data = {'guild_id': str(guild_id), 'generated_at': time.time()}
+        for name in (PARTS if part == 'all' else (part,)):
+            if name == 'queue':
+                data['queue'] = [
+                    {
+                        'position': position,
+                        'member_id': str(member_id),
+                        'name': str(entry['member']),
+                        'joined_at': entry['joined_at'].isoformat() if hasattr(entry['joined_at'], 'isoformat') else str(entry['joined_at']),
+                    }
+                    for position, (member_id, entry) in enumerate(cog.queue.get(guild_id, {}).items(), start=1)
+                ]
+            elif name == 'sessions':
+                data['sessions'] = [
+                    {
+                        'code': code,
+                        'channel_id': str(session['channel_id']),
+                        'thread_id': str(session['thread_id']) if session.get('thread_id') else None,
+                        'member_ids': [str(member_id) for member_id in session['member_ids']],
+                        'started_at': session['started_at'].isoformat(),
+                    }
+                    for code, session in list(cog.session_info.items()) if session.get('guild_id') == guild_id
+                ]
+            elif name == 'settings':
+                guild_settings = await cog.settings_cache.get(guild_id)
+                if guild_settings:
+                    # IDs are strings, as they do not fit in a JavaScript number
+                    guild_settings = {
+                        key: str(value) if key.endswith('_id') else value for key, value in guild_settings.as_dict().items()
+                    }
+                    guild_settings['paused'] = bool(guild_settings['paused'])
+                data['settings'] = guild_settings
+        snapshot = self.snapshots[(guild_id, part)] = Snapshot(etag, json.dumps(data).encode())
+        return snapshot
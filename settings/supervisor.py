@@ -0,0 +1,150 @@
+"""
+Supervised worker pool that runs the per-guild queueing loop.
+Guilds are sharded over a fixed number of worker tasks instead of getting a task each. A failing guild
+is isolated and retried with backoff, a guild whose ticks overrun the budget is ticked on its own until it
+is fast again, a crashed worker is restarted, and every guild's health and tick latency is tracked for display.
+"""
+import asyncio
+import time
+import traceback
+from typing import Awaitable, Callable
+
+import discord
+
+
+class GuildHealth:
+    """Health of one guild's queueing loop."""
+
+    __slots__ = ('last_tick', 'latency', 'failures', 'total_failures', 'last_error', 'retry_at')
+
+    def __init__(self) -> None:
+        self.last_tick: float | None = None
+        self.latency: float | None = None
+        self.failures = 0
+        self.total_failures = 0
+        self.last_error: str | None = None
+        self.retry_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.failures == 0
+
+    def describe(self) -> str:
+        """Summarize the guild's health for display."""
+        if self.last_tick is None:
+            return "Waiting for first tick"
+        ago = time.monotonic() - self.last_tick
+        summary = f"Last tick {ago:.1f}s ago, took {self.latency * 1000:.0f} ms"
+        if not self.healthy:
+            summary = f"Failing ({self.failures} in a row): {self.last_error}\n{summary}"
+        elif self.total_failures:
+            summary += f"\n{self.total_failures} failures since start, last: {self.last_error}"
+        return summary
+
+
+class GuildSupervisor:
+    """Runs ``tick(guild)`` for every registered guild about every ``interval`` seconds."""
+
+    def __init__(self, tick: Callable[[discord.Guild], Awaitable], workers: int = 4, interval: float = 2.0, max_backoff: float = 60.0,
+                 budget: float = 1.0) -> None:
+        self.tick = tick
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.shards: list[dict[int, discord.Guild]] = [{} for _ in range(workers)]
+        self.health: dict[int, GuildHealth] = {}
+        self.workers: list[asyncio.Task] = []
+        # Guilds whose ticks overran the budget, ticked by a task of their own until they are fast again
+        self.detached: dict[int, asyncio.Task] = {}
+        self.restarts = 0
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self.health
+
+    @property
+    def guilds(self) -> list[int]:
+        return list(self.health)
+
+    def add(self, guild: discord.Guild) -> None:
+        self.shards[guild.id % len(self.shards)][guild.id] = guild
+        self.health.setdefault(guild.id, GuildHealth())
+
+    def remove(self, guild_id: int) -> None:
+        self.shards[guild_id % len(self.shards)].pop(guild_id, None)
+        self.health.pop(guild_id, None)
+
+    def start(self) -> None:
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._supervise(shard)) for shard in self.shards]
+
+    async def stop(self) -> None:
+        tasks = [*self.workers, *self.detached.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self.detached = {}
+
+    async def _supervise(self, shard: dict[int, discord.Guild]) -> None:
+        backoff = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._work(shard)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Per-guild errors are caught in _tick, so this is a bug in the worker itself
+                traceback.print_exc()
+                self.restarts += 1
+                # A worker that ran fine for a while before crashing starts over with a short backoff
+                if time.monotonic() - started > self.max_backoff:
+                    backoff = 1.0
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _work(self, shard: dict[int, discord.Guild]) -> None:
+        while True:
+            started = time.monotonic()
+            for guild_id, guild in list(shard.items()):
+                if guild_id in self.detached:
+                    continue
+                tick_started = time.monotonic()
+                await self._tick(guild)
+                if time.monotonic() - tick_started > self.budget and guild_id in shard:
+                    # Keep the slow guild from holding up the rest of the shard on every round
+                    self.detached[guild_id] = asyncio.create_task(self._work_alone(shard, guild_id))
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def _work_alone(self, shard: dict[int, discord.Guild], guild_id: int, recovery_rounds: int = 3) -> None:
+        """Tick a slow guild on its own and hand it back to its shard once its ticks fit the budget again."""
+        fast_rounds = 0
+        try:
+            while fast_rounds < recovery_rounds:
+                await asyncio.sleep(self.interval)
+                guild = shard.get(guild_id)
+                if guild is None:
+                    return
+                tick_started = time.monotonic()
+                await self._tick(guild)
+                fast_rounds = fast_rounds + 1 if time.monotonic() - tick_started <= self.budget else 0
+        finally:
+            self.detached.pop(guild_id, None)
+
+    async def _tick(self, guild: discord.Guild) -> None:
+        health = self.health.get(guild.id)
+        if health is None or health.retry_at > time.monotonic():
+            return
+        started = time.monotonic()
+        try:
+            await self.tick(guild)
+        except Exception as e:
+            health.failures += 1
+            health.total_failures += 1
+            health.last_error = f"{type(e).__name__}: {e}"
+            health.retry_at = time.monotonic() + min(self.interval * 2 ** health.failures, self.max_backoff)
+            traceback.print_exc()
+        else:
+            health.failures = 0
+        health.last_tick = time.monotonic()
+        health.latency = health.last_tick - started
@@ -0,0 +1,130 @@
+"""
+A hierarchical timer wheel shared by everything in the bot that needs to run something later.
+One task advances the wheel once per tick, so hundreds of thousands of pending timers cost one sleep instead
+of one sleeping task each. Scheduling and cancelling a timer are O(1).
+
+The wheel has a fine inner level with one slot per tick and coarser outer levels whose slots each span a whole
+revolution of the level inside them. A timer is placed on the finest level that can hold its delay, and when
+an inner level wraps around, the next slot of the level outside it is cascaded down. Each timer is therefore
+only touched a handful of times however long its delay, instead of once per revolution.
+"""
+import asyncio
+import inspect
+import traceback
+from typing import Callable
+
+# Bits of the tick counter covered by each level: 256 ticks, then 64 revolutions of the level below, and so on.
+# With one-second ticks the outermost level spans about 776 days, and longer delays simply cascade again.
+LEVEL_BITS = (8, 6, 6, 6)
+
+
+class Timer:
+    """A handle to a scheduled callback."""
+
+    __slots__ = ('callback', 'args', 'expires', 'bucket', 'cancelled')
+
+    def __init__(self, callback: Callable, args: tuple, expires: int) -> None:
+        self.callback = callback
+        self.args = args
+        self.expires = expires
+        self.bucket: dict | None = None
+        self.cancelled = False
+
+
+class TimerWheel:
+    """Runs callbacks after a delay, with a resolution of one tick."""
+
+    def __init__(self, tick: float = 1.0) -> None:
+        self.tick = tick
+        self.levels: list[list[dict[Timer, None]]] = [[{} for _ in range(1 << bits)] for bits in LEVEL_BITS]
+        # The tick counter bit each level starts at
+        self.shifts = [sum(LEVEL_BITS[:level]) for level in range(len(LEVEL_BITS))]
+        self.span = 1 << sum(LEVEL_BITS)
+        self.now = 0
+        self.task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for level in self.levels for bucket in level)
+
+    def schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        """
+        Run ``callback(*args)`` after ``delay`` seconds. Coroutine functions are run as tasks.
+
+        Returns:
+            Timer: A handle that can be passed to ``cancel``.
+        """
+        timer = Timer(callback, args, self.now + max(1, round(delay / self.tick)))
+        self._insert(timer)
+        return timer
+
+    def cancel(self, timer: Timer | None) -> None:
+        """Cancel a timer. Cancelling a timer that already fired does nothing."""
+        if timer is None or timer.cancelled:
+            return
+        timer.cancelled = True
+        if timer.bucket is not None:
+            timer.bucket.pop(timer, None)
+            timer.bucket = None
+
+    def _insert(self, timer: Timer) -> None:
+        # Delays beyond the outermost level wait in its last slot and are placed again when it cascades
+        expires = min(timer.expires, self.now + self.span - 1)
+        delta = expires - self.now
+        for level, shift in enumerate(self.shifts):
+            if delta < 1 << (shift + LEVEL_BITS[level]) or level == len(self.shifts) - 1:
+                bucket = self.levels[level][(expires >> shift) & ((1 << LEVEL_BITS[level]) - 1)]
+                break
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def advance(self) -> None:
+        """Move the wheel forward one tick and fire every timer that is due."""
+        self.now += 1
+        # Whenever a level wraps around, bring the next slot of the level outside it down
+        for level in range(1, len(self.levels)):
+            if self.now & ((1 << self.shifts[level]) - 1):
+                break
+            index = (self.now >> self.shifts[level]) & ((1 << LEVEL_BITS[level]) - 1)
+            bucket = self.levels[level][index]
+            self.levels[level][index] = {}
+            for timer in bucket:
+                self._insert(timer)
+
+        index = self.now & ((1 << LEVEL_BITS[0]) - 1)
+        due = self.levels[0][index]
+        self.levels[0][index] = {}
+        for timer in due:
+            timer.bucket = None
+            timer.cancelled = True
+            self._fire(timer)
+
+    def _fire(self, timer: Timer) -> None:
+        try:
+            result = timer.callback(*timer.args)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+        except Exception:
+            traceback.print_exc()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while True:
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            # Catch up on ticks missed while the loop was busy
+            while next_tick <= loop.time():
+                self.advance()
+                next_tick += self.tick
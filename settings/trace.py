@@ -0,0 +1,413 @@
+"""
+Capture and replay of voice state traffic for regression benchmarks.
+
+TraceRecorder appends every voice state update of a traced guild to a compact binary file. The replayer
+feeds such a file through a real QueueingCog backed by stub Discord objects and a scratch database, and
+reports throughput and latency, so matchmaking or storage changes can be compared on real traffic.
+
+Usage:
+    python -m settings.trace info traces/trace_<guild>_<time>.bin
+    python -m settings.trace replay traces/trace_<guild>_<time>.bin [--paced] [--amount N]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+
+MAGIC = b'SQTR'
+VERSION = 1
+# magic, version, guild ID, queue channel ID, amount to queue
+HEADER = struct.Struct('<4sBQQI')
+# seconds since the trace started, member ID, channel before (0 for none), channel after (0 for none)
+RECORD = struct.Struct('<dQQQ')
+# Seconds between flushes of a trace file, so a crash loses at most this much of the trace
+FLUSH_INTERVAL = 5.0
+
+
+class TraceRecorder:
+    """Records voice state updates of opted-in guilds to trace files."""
+
+    def __init__(self, directory: str = 'traces', flush_interval: float = FLUSH_INTERVAL) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.active: dict[int, tuple] = {}
+        self.flushed: dict[int, float] = {}
+
+    def start(self, guild_id: int, queue_channel_id: int, amount_to_queue: int) -> str:
+        """
+        Start tracing a guild.
+
+        Returns:
+            str: The path of the new trace file.
+        """
+        self.stop(guild_id)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"trace_{guild_id}_{int(time.time())}.bin")
+        f = open(path, 'wb')
+        f.write(HEADER.pack(MAGIC, VERSION, guild_id, queue_channel_id, amount_to_queue))
+        self.active[guild_id] = (f, time.monotonic(), path)
+        self.flushed[guild_id] = time.monotonic()
+        return path
+
+    def stop(self, guild_id: int) -> str | None:
+        """
+        Stop tracing a guild.
+
+        Returns:
+            str: The path of the finished trace file, or None if the guild was not being traced.
+        """
+        entry = self.active.pop(guild_id, None)
+        self.flushed.pop(guild_id, None)
+        if not entry:
+            return None
+        f, _, path = entry
+        f.close()
+        return path
+
+    def stop_all(self) -> None:
+        for guild_id in list(self.active):
+            self.stop(guild_id)
+
+    def flush_all(self) -> None:
+        """Write every buffered record to disk, keeping the traces open."""
+        now = time.monotonic()
+        for guild_id, (f, _, _) in self.active.items():
+            f.flush()
+            self.flushed[guild_id] = now
+
+    def record(self, member, before, after) -> None:
+        """Append a voice state update to the guild's trace, if it is being traced."""
+        entry = self.active.get(member.guild.id)
+        if not entry:
+            return
+        f, started, _ = entry
+        now = time.monotonic()
+        f.write(RECORD.pack(
+            now - started,
+            member.id,
+            before.channel.id if before.channel else 0,
+            after.channel.id if after.channel else 0
+        ))
+        if now - self.flushed[member.guild.id] >= self.flush_interval:
+            f.flush()
+            self.flushed[member.guild.id] = now
+
+
+def read_trace(path: str) -> tuple[tuple, list[tuple]]:
+    """
+    Read a trace file.
+
+    Returns:
+        tuple: The ``(guild_id, queue_channel_id, amount_to_queue)`` header and the list of
+            ``(offset, member_id, before_id, after_id)`` records.
+
+    Raises:
+        ValueError: If the file is not a trace.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, guild_id, queue_channel_id, amount_to_queue = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} trace file")
+    body = data[HEADER.size:]
+    body = body[:len(body) - len(body) % RECORD.size]
+    return (guild_id, queue_channel_id, amount_to_queue), list(RECORD.iter_unpack(body))
+
+
+# A minimal stand-in for the parts of discord.py that QueueingCog touches, used for replays.
+
+_ids = itertools.count(1)
+
+
+class _StubVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class _StubChannel:
+    def __init__(self, guild, channel_id, name, kind):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.kind = kind
+        self.mention = f"<#{channel_id}>"
+        self.category = None
+        self.parent = None
+        self.children = []
+
+    @property
+    def category_id(self):
+        return self.category.id if self.category else None
+
+    @property
+    def members(self):
+        return [m for m in self.guild.members.values() if m.channel is self]
+
+    @property
+    def voice_channels(self):
+        return [c for c in self.guild.channels.values() if c.kind == 'voice' and c.category is self]
+
+    @property
+    def channels(self):
+        return [c for c in self.guild.channels.values() if c.category is self]
+
+    @property
+    def threads(self):
+        return list(self.children)
+
+    async def edit(self, **kwargs):
+        pass
+
+    async def delete(self, **kwargs):
+        self.guild.channels.pop(self.id, None)
+        if self.parent:
+            self.parent.children.remove(self)
+
+    async def send(self, *args, **kwargs):
+        pass
+
+    async def create_thread(self, name, **kwargs):
+        thread = _StubChannel(self.guild, next(_ids), name, 'thread')
+        thread.parent = self
+        self.children.append(thread)
+        return thread
+
+
+class _StubMember:
+    def __init__(self, guild, member_id):
+        self.guild = guild
+        self.id = member_id
+        self.name = f"member{member_id}"
+        self.discriminator = '0'
+        self.mention = f"<@{member_id}>"
+        self.channel = None
+
+    async def move_to(self, channel, **kwargs):
+        before = _StubVoiceState(self.channel)
+        self.channel = channel
+        await self.guild.dispatch(self, before, _StubVoiceState(channel))
+
+    async def send(self, *args, **kwargs):
+        pass
+
+
+class _StubGuild:
+    def __init__(self, guild_id, cog):
+        self.id = guild_id
+        self.name = f"replay-{guild_id}"
+        self.cog = cog
+        self.members = {}
+        self.channels = {}
+        self.roles = {}
+        self.default_role = object()
+        self.me = object()
+        self.session_channels = 0
+
+    def add_channel(self, channel_id, name, kind, category=None):
+        channel = _StubChannel(self, channel_id, name, kind)
+        channel.category = category
+        self.channels[channel_id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_thread(self, thread_id):
+        return next((t for c in self.channels.values() for t in c.children if t.id == thread_id), None)
+
+    def member(self, member_id):
+        if member_id not in self.members:
+            self.members[member_id] = _StubMember(self, member_id)
+        return self.members[member_id]
+
+    def channel(self, channel_id):
+        if not channel_id:
+            return None
+        return self.channels.get(channel_id) or self.add_channel(channel_id, f"channel-{channel_id}", 'voice')
+
+    async def dispatch(self, member, before, after):
+        self.cog.trace_sent[member.id] = time.perf_counter()
+        await self.cog.on_voice_state_update(member, before, after)
+
+    async def create_voice_channel(self, name, category=None, **kwargs):
+        self.session_channels += 1
+        return self.add_channel(next(_ids), name, 'voice', category)
+
+
+class _StubBot:
+    def __init__(self):
+        self.guilds = []
+        self.cog_handoff = {}
+        self.loop = self
+
+    def create_task(self, coro):
+        coro.close()
+
+    def get_guild(self, guild_id):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+
+async def replay(path: str, paced: bool = False, amount: int | None = None) -> dict:
+    """
+    Replay a trace through QueueingCog and report how it performed.
+
+    Must be run from a scratch directory, as the cog writes its database and queue files to the
+    current working directory.
+
+    Args:
+        path (str): The trace file.
+        paced (bool): Replay at the original pace instead of as fast as possible.
+        amount (int | None): Override the amount to queue recorded in the trace.
+
+    Returns:
+        dict: The replay report.
+    """
+    from cogs.queueing import QueueingCog
+    from settings import utils
+
+    (guild_id, queue_channel_id, recorded_amount), records = read_trace(path)
+    amount = amount or recorded_amount
+
+    await utils.init_db()
+    bot = _StubBot()
+    cog = QueueingCog(bot)
+    guild = _StubGuild(guild_id, cog)
+    bot.guilds.append(guild)
+
+    queue_category = guild.add_channel(next(_ids), 'Queue', 'category')
+    guild.add_channel(queue_channel_id, 'Queue', 'voice', queue_category)
+    session_calls = guild.add_channel(next(_ids), 'Session Calls', 'category')
+    log_channel = guild.add_channel(next(_ids), 'queue-logs', 'text', queue_category)
+    sessions_channel = guild.add_channel(next(_ids), 'sessions', 'text', session_calls)
+    role_id = next(_ids)
+    guild.roles[role_id] = object()
+    await utils.set_queueing_settings(guild_id, {
+        'admin_role_id': role_id,
+        'queue_category_id': queue_category.id,
+        'queue_channel_id': queue_channel_id,
+        'session_calls_category_id': session_calls.id,
+        'log_channel_id': log_channel.id,
+        'sessions_channel_id': sessions_channel.id,
+        'amount_to_queue': amount,
+        'paused': False,
+    })
+
+    # Measure from the moment an update is dispatched to the end of the batch that handled it
+    latencies = []
+    batch_sizes = []
+    cog.trace_sent = {}
+    handler = cog.process_voice_updates
+
+    async def timed_handler(handler_guild_id, updates):
+        await handler(handler_guild_id, updates)
+        done = time.perf_counter()
+        batch_sizes.append(len(updates))
+        for update in updates:
+            sent = cog.trace_sent.pop(update.member.id, None)
+            if sent is not None:
+                latencies.append(done - sent)
+
+    cog.inbox.handler = timed_handler
+
+    tick_interval = cog.supervisor.interval
+    next_tick = tick_interval
+    tick_times = []
+
+    async def tick():
+        # Advance the cog's timers by the replayed time, as the wheel's own task is not running
+        for _ in range(round(tick_interval / cog.timers.tick)):
+            cog.timers.advance()
+        started = time.perf_counter()
+        await cog.tick_guild(guild)
+        tick_times.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for offset, member_id, before_id, after_id in records:
+        if paced:
+            await asyncio.sleep(max(0.0, offset - (time.perf_counter() - started)))
+        while offset >= next_tick:
+            await tick()
+            next_tick += tick_interval
+        member = guild.member(member_id)
+        before, after = guild.channel(before_id), guild.channel(after_id)
+        member.channel = after
+        await guild.dispatch(member, _StubVoiceState(before), _StubVoiceState(after))
+        await asyncio.sleep(0)
+
+    # Let the inbox drain and give the queue one last tick
+    while cog.inbox.consumers:
+        await asyncio.sleep(0)
+    await tick()
+    while cog.inbox.consumers:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    # Finish the background writes before the scratch directory and its database are removed
+    while cog.queue_writer and not cog.queue_writer.done():
+        await cog.queue_writer
+    await cog.audit.stop()
+    await cog.notifier.stop()
+    await cog.inbox.stop()
+
+    def percentile(values, q):
+        return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else (values[0] * 1000 if values else 0.0)
+
+    return {
+        'events': len(records),
+        'trace_seconds': records[-1][0] if records else 0.0,
+        'elapsed_seconds': elapsed,
+        'events_per_second': len(records) / elapsed if elapsed else 0.0,
+        'batches': len(batch_sizes),
+        'mean_batch_size': statistics.fmean(batch_sizes) if batch_sizes else 0.0,
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p95_ms': percentile(latencies, 95),
+        'latency_p99_ms': percentile(latencies, 99),
+        'ticks': len(tick_times),
+        'tick_mean_ms': statistics.fmean(tick_times) * 1000 if tick_times else 0.0,
+        'sessions_created': guild.session_channels,
+        'left_in_queue': len(cog.queue.get(guild_id, {})),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m settings.trace', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help='Summarize a trace file')
+    info.add_argument('trace')
+    run = commands.add_parser('replay', help='Replay a trace through QueueingCog')
+    run.add_argument('trace')
+    run.add_argument('--paced', action='store_true', help='Replay at the original pace')
+    run.add_argument('--amount', type=int, help='Override the amount to queue')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        (guild_id, queue_channel_id, amount), records = read_trace(args.trace)
+        print(f"Guild: {guild_id}\nQueue channel: {queue_channel_id}\nAmount to queue: {amount}")
+        print(f"Events: {len(records)}\nDuration: {records[-1][0] if records else 0:.1f}s")
+        print(f"Members: {len({r[1] for r in records})}")
+        return
+
+    trace = os.path.abspath(args.trace)
+    # The cog reads and writes relative paths, so run it somewhere disposable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        report = asyncio.run(replay(trace, paced=args.paced, amount=args.amount))
+    width = max(map(len, report))
+    for key, value in report.items():
+        print(f"{key.ljust(width)}  {value:.3f}" if isinstance(value, float) else f"{key.ljust(width)}  {value}")
+
+
+if __name__ == '__main__':
+    main()
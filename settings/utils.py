@@ -4,28 +4,16 @@ All functions are asynchronous and use aiosqlite for non-blocking DB access.
 """
 import aiosqlite
 
+from settings import migrations
+
 async def init_db() -> None:
     """
-    Initialize the SQLite database for the queueing system.
-    Creates the 'queueing_settings' table if it does not already exist. This table stores all configuration
-    settings for each guild (server), including role and channel IDs required for the queueing system.
+    Initialize the SQLite database for the queueing system by applying any pending schema migrations.
+    See settings/migrations.py for the tables and their history.
     This function should be called before any other database operations.
     """
-    async with aiosqlite.connect("queueing_system.db") as db:
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS queueing_settings (
-                guild_id INTEGER PRIMARY KEY,
-                admin_role_id INTEGER NOT NULL,
-                queue_category_id INTEGER NOT NULL,
-                queue_channel_id INTEGER NOT NULL,
-                session_calls_category_id INTEGER NOT NULL,
-                log_channel_id INTEGER NOT NULL,
-                sessions_channel_id INTEGER NOT NULL,
-                amount_to_queue INTEGER NOT NULL DEFAULT 0,
-                paused BOOLEAN NOT NULL DEFAULT 0
-            )
-        ''')
-        await db.commit()
+    await migrations.migrate()
+
 
 async def get_queueing_settings(guild_id: int) -> dict | None:
     """
@@ -101,6 +89,28 @@ async def delete_queueing_settings(guild_id: int) -> None:
     async with aiosqlite.connect("queueing_system.db") as db:
         await db.execute('DELETE FROM queueing_settings WHERE guild_id = ?', (guild_id,))
         await db.commit()
+
+async def delete_guild_data(guild_id: int) -> None:
+    """
+    Delete everything configured for a guild besides its queueing settings.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+
+    This removes the guild's status message record, queue windows, autoscale, timeout and ready check settings,
+    stored queue and federation membership. A federation the guild hosts is disbanded. Session history and
+    audit events are kept.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        for table in ('queue_status_messages', 'queue_windows', 'queue_autoscale', 'queue_timeouts',
+                      'ready_check_settings', 'queue_entries', 'federation_members'):
+            await db.execute(f'DELETE FROM {table} WHERE guild_id = ?', (guild_id,))
+        async with db.execute('SELECT federation_id FROM federations WHERE host_guild_id = ?', (guild_id,)) as cursor:
+            hosted = await cursor.fetchone()
+        if hosted:
+            await db.execute('DELETE FROM federation_members WHERE federation_id = ?', hosted)
+            await db.execute('DELETE FROM federations WHERE federation_id = ?', hosted)
+        await db.commit()
     
 async def get_admin_role_id(guild_id: int) -> int | None:
     """
@@ -332,7 +342,531 @@ async def set_paused_status(guild_id: int, paused: bool) -> bool:
         cursor = await db.execute('UPDATE queueing_settings SET paused = ? WHERE guild_id = ?', (paused, guild_id))
         await db.commit()
         return cursor.rowcount > 0
-    
+
+
+async def replace_queue_entries(guild_id: int, entries: list[tuple[int, float]]) -> None:
+    """
+    Replace the stored queue of a guild in a single transaction.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        entries (list[tuple]): ``(member_id, joined_at)`` rows, with ``joined_at`` as a Unix timestamp.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM queue_entries WHERE guild_id = ?', (guild_id,))
+        await db.executemany(
+            'INSERT INTO queue_entries (guild_id, member_id, joined_at) VALUES (?, ?, ?)',
+            [(guild_id, member_id, joined_at) for member_id, joined_at in entries]
+        )
+        # The saved queue is newer than any legacy queue file of the guild, which must no longer be imported
+        await db.execute('INSERT OR IGNORE INTO legacy_queue_imports (guild_id) VALUES (?)', (guild_id,))
+        await db.commit()
+
+async def get_queue_entries(guild_id: int) -> list[tuple[int, float]]:
+    """
+    Get the stored queue of a guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+
+    Returns:
+        list[tuple]: ``(member_id, joined_at)`` rows in queue order, with ``joined_at`` as a Unix timestamp.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        # replace_queue_entries inserts the rows in queue order
+        async with db.execute('SELECT member_id, joined_at FROM queue_entries WHERE guild_id = ? ORDER BY rowid', (guild_id,)) as cursor:
+            return list(await cursor.fetchall())
+
+async def get_dm_opt_outs() -> set[int]:
+    """
+    Get every user who has opted out of direct messages.
+
+    Returns:
+        set[int]: The IDs of all opted-out users.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT user_id FROM dm_opt_out') as cursor:
+            return {row[0] for row in await cursor.fetchall()}
+
+async def set_dm_opt_out(user_id: int, opted_out: bool) -> None:
+    """
+    Set whether a user has opted out of direct messages.
+
+    Args:
+        user_id (int): The Discord user ID.
+        opted_out (bool): True to stop direct messages, False to allow them again.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        if opted_out:
+            await db.execute('INSERT OR IGNORE INTO dm_opt_out (user_id) VALUES (?)', (user_id,))
+        else:
+            await db.execute('DELETE FROM dm_opt_out WHERE user_id = ?', (user_id,))
+        await db.commit()
+
+
+async def get_status_messages() -> dict[int, tuple[int, int]]:
+    """
+    Get the live queue status message of every guild that has one.
+
+    Returns:
+        dict: Maps guild ID to a ``(channel_id, message_id)`` tuple.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT guild_id, channel_id, message_id FROM queue_status_messages') as cursor:
+            return {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+async def set_status_message(guild_id: int, channel_id: int, message_id: int) -> None:
+    """
+    Set the live queue status message for a specific guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        channel_id (int): The channel the status message is in.
+        message_id (int): The status message ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute(
+            'INSERT OR REPLACE INTO queue_status_messages (guild_id, channel_id, message_id) VALUES (?, ?, ?)',
+            (guild_id, channel_id, message_id)
+        )
+        await db.commit()
+
+async def delete_status_message(guild_id: int) -> None:
+    """
+    Delete the live queue status message record for a specific guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM queue_status_messages WHERE guild_id = ?', (guild_id,))
+        await db.commit()
+
+
+async def get_queue_windows(guild_id: int | None = None) -> list[tuple]:
+    """
+    Get the queue windows of one guild, or of every guild.
+
+    Args:
+        guild_id (int | None): The Discord guild (server) ID, or None for all guilds.
+
+    Returns:
+        list[tuple]: ``(window_id, guild_id, days, start_minute, end_minute)`` rows.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        if guild_id is None:
+            cursor = await db.execute('SELECT window_id, guild_id, days, start_minute, end_minute FROM queue_windows')
+        else:
+            cursor = await db.execute(
+                'SELECT window_id, guild_id, days, start_minute, end_minute FROM queue_windows WHERE guild_id = ?',
+                (guild_id,)
+            )
+        async with cursor:
+            return list(await cursor.fetchall())
+
+async def add_queue_window(guild_id: int, days: str, start_minute: int, end_minute: int) -> int:
+    """
+    Add a queue window for a specific guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        days (str): Comma separated days the window opens on, e.g. 'mon,tue'.
+        start_minute (int): Minutes after midnight UTC at which the window opens.
+        end_minute (int): Minutes after midnight UTC at which the window closes.
+
+    Returns:
+        int: The new window's ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        cursor = await db.execute(
+            'INSERT INTO queue_windows (guild_id, days, start_minute, end_minute) VALUES (?, ?, ?, ?)',
+            (guild_id, days, start_minute, end_minute)
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+async def delete_queue_window(guild_id: int, window_id: int) -> bool:
+    """
+    Delete a queue window from a specific guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        window_id (int): The window ID.
+
+    Returns:
+        bool: True if a window was deleted, False otherwise.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        cursor = await db.execute('DELETE FROM queue_windows WHERE guild_id = ? AND window_id = ?', (guild_id, window_id))
+        await db.commit()
+        return cursor.rowcount > 0
+
+async def get_autoscale_settings() -> dict[int, tuple[int, int, int]]:
+    """
+    Get the automatic session sizing settings of every guild that has them.
+
+    Returns:
+        dict: Maps guild ID to a ``(target_wait_seconds, min_size, max_size)`` tuple.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT guild_id, target_wait_seconds, min_size, max_size FROM queue_autoscale') as cursor:
+            return {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+
+async def set_autoscale_settings(guild_id: int, target_wait_seconds: int, min_size: int, max_size: int) -> None:
+    """
+    Enable automatic session sizing for a specific guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        target_wait_seconds (int): The longest a member should wait for a session to fill.
+        min_size (int): The smallest session size to use.
+        max_size (int): The largest session size to use.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute(
+            'INSERT OR REPLACE INTO queue_autoscale (guild_id, target_wait_seconds, min_size, max_size) VALUES (?, ?, ?, ?)',
+            (guild_id, target_wait_seconds, min_size, max_size)
+        )
+        await db.commit()
+
+async def delete_autoscale_settings(guild_id: int) -> None:
+    """
+    Disable automatic session sizing for a specific guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM queue_autoscale WHERE guild_id = ?', (guild_id,))
+        await db.commit()
+
+
+async def get_timeout_settings() -> dict[int, tuple[int, int, int]]:
+    """
+    Get the timeout settings of every guild that has them.
+
+    Returns:
+        dict: Maps guild IDs to ``(idle_seconds, max_session_seconds, queue_expiry_seconds)``. 0 means disabled.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT guild_id, idle_seconds, max_session_seconds, queue_expiry_seconds FROM queue_timeouts') as cursor:
+            return {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+
+async def set_timeout_settings(guild_id: int, idle_seconds: int, max_session_seconds: int, queue_expiry_seconds: int) -> None:
+    """
+    Insert or update a guild's timeout settings.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        idle_seconds (int): How long a session call may stay empty before it ends.
+        max_session_seconds (int): How long a session may last, or 0 for no limit.
+        queue_expiry_seconds (int): How long a member may stay queued, or 0 for no limit.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute(
+            'INSERT OR REPLACE INTO queue_timeouts (guild_id, idle_seconds, max_session_seconds, queue_expiry_seconds) VALUES (?, ?, ?, ?)',
+            (guild_id, idle_seconds, max_session_seconds, queue_expiry_seconds)
+        )
+        await db.commit()
+
+async def delete_timeout_settings(guild_id: int) -> None:
+    """
+    Remove a guild's timeout settings, going back to the defaults.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM queue_timeouts WHERE guild_id = ?', (guild_id,))
+        await db.commit()
+
+async def get_ready_check_settings() -> dict[int, tuple[int, str]]:
+    """
+    Get the ready check settings of every guild that has ready checks enabled.
+
+    Returns:
+        dict: Maps guild IDs to ``(timeout_seconds, non_responders)``.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT guild_id, timeout_seconds, non_responders FROM ready_check_settings') as cursor:
+            return {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+
+async def set_ready_check_settings(guild_id: int, timeout_seconds: int, non_responders: str) -> None:
+    """
+    Enable ready checks for a guild, or change its ready check settings.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        timeout_seconds (int): How long members have to confirm they are ready.
+        non_responders (str): 'requeue' to move members who do not confirm to the back of the queue, 'drop' to remove them.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute(
+            'INSERT OR REPLACE INTO ready_check_settings (guild_id, timeout_seconds, non_responders) VALUES (?, ?, ?)',
+            (guild_id, timeout_seconds, non_responders)
+        )
+        await db.commit()
+
+async def delete_ready_check_settings(guild_id: int) -> None:
+    """
+    Disable ready checks for a guild.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM ready_check_settings WHERE guild_id = ?', (guild_id,))
+        await db.commit()
+
+async def insert_audit_events(events: list[tuple]) -> None:
+    """
+    Insert a batch of audit events in a single transaction.
+
+    Args:
+        events (list[tuple]): ``(guild_id, day, created_at, kind, member_id, details)`` rows.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.executemany(
+            'INSERT INTO audit_events (guild_id, day, created_at, kind, member_id, details) VALUES (?, ?, ?, ?, ?, ?)',
+            events
+        )
+        await db.commit()
+
+async def search_audit_events(guild_id: int, query: str | None = None, kind: str | None = None,
+                              member_id: int | None = None, limit: int = 10, offset: int = 0) -> list[tuple]:
+    """
+    Search a guild's audit events, newest first.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        query (str | None): Full-text search over event details. Each word must appear.
+        kind (str | None): Only return events of this kind.
+        member_id (int | None): Only return events about this member.
+        limit (int): The maximum number of events to return.
+        offset (int): The number of matching events to skip.
+
+    Returns:
+        list[tuple]: ``(event_id, created_at, kind, member_id, details)`` rows.
+    """
+    conditions = ['e.guild_id = ?']
+    params = [guild_id]
+    if kind:
+        conditions.append('e.kind = ?')
+        params.append(kind)
+    if member_id:
+        conditions.append('e.member_id = ?')
+        params.append(member_id)
+    if query:
+        source = 'audit_events_fts f JOIN audit_events e ON e.event_id = f.rowid'
+        conditions.append('audit_events_fts MATCH ?')
+        # Quote every word so user input is never parsed as FTS syntax
+        params.append(' '.join('"' + word.replace('"', '""') + '"' for word in query.split()))
+    else:
+        source = 'audit_events e'
+    params += [limit, offset]
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute(
+            f'SELECT e.event_id, e.created_at, e.kind, e.member_id, e.details FROM {source} '
+            f'WHERE {" AND ".join(conditions)} ORDER BY e.event_id DESC LIMIT ? OFFSET ?',
+            params
+        ) as cursor:
+            return list(await cursor.fetchall())
+
+async def compact_audit_events(before_day: int, batch_size: int = 1000) -> int:
+    """
+    Delete one batch of audit events older than a given day.
+
+    Args:
+        before_day (int): Events from days (since the Unix epoch) before this one are deleted.
+        batch_size (int): The maximum number of events to delete.
+
+    Returns:
+        int: The number of events deleted. Call again until this is 0.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        cursor = await db.execute(
+            'DELETE FROM audit_events WHERE event_id IN (SELECT event_id FROM audit_events WHERE day < ? LIMIT ?)',
+            (before_day, batch_size)
+        )
+        await db.commit()
+        return cursor.rowcount
+
+async def optimize_audit_index() -> None:
+    """
+    Merge the audit event full-text index into as few segments as possible.
+    Worth running after a large number of events were deleted.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute("INSERT INTO audit_events_fts (audit_events_fts) VALUES ('optimize')")
+        await db.commit()
+
+
+async def get_federations() -> list[tuple]:
+    """
+    Get every federation.
+
+    Returns:
+        list[tuple]: ``(federation_id, name, join_code, host_guild_id)`` rows.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT federation_id, name, join_code, host_guild_id FROM federations') as cursor:
+            return list(await cursor.fetchall())
+
+async def get_federation_by_code(join_code: str) -> tuple | None:
+    """
+    Find a federation by its join code.
+
+    Args:
+        join_code (str): The code shared by the federation's host.
+
+    Returns:
+        tuple: The ``(federation_id, name, join_code, host_guild_id)`` row, or None if not found.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute(
+            'SELECT federation_id, name, join_code, host_guild_id FROM federations WHERE join_code = ?', (join_code,)
+        ) as cursor:
+            return await cursor.fetchone()
+
+async def create_federation(name: str, join_code: str, host_guild_id: int, contribution_limit: int) -> int:
+    """
+    Create a federation hosted by a guild, and link the host guild to it.
+
+    Args:
+        name (str): The federation's display name.
+        join_code (str): The code other guilds use to join.
+        host_guild_id (int): The guild that hosts the federation's sessions.
+        contribution_limit (int): The most members the host contributes to one session.
+
+    Returns:
+        int: The new federation's ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        cursor = await db.execute(
+            'INSERT INTO federations (name, join_code, host_guild_id) VALUES (?, ?, ?)',
+            (name, join_code, host_guild_id)
+        )
+        await db.execute(
+            'INSERT OR REPLACE INTO federation_members (guild_id, federation_id, contribution_limit) VALUES (?, ?, ?)',
+            (host_guild_id, cursor.lastrowid, contribution_limit)
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+async def delete_federation(federation_id: int) -> None:
+    """
+    Delete a federation and unlink all of its guilds.
+
+    Args:
+        federation_id (int): The federation ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM federation_members WHERE federation_id = ?', (federation_id,))
+        await db.execute('DELETE FROM federations WHERE federation_id = ?', (federation_id,))
+        await db.commit()
+
+async def get_federation_members() -> list[tuple]:
+    """
+    Get every guild linked to a federation.
+
+    Returns:
+        list[tuple]: ``(guild_id, federation_id, contribution_limit)`` rows.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT guild_id, federation_id, contribution_limit FROM federation_members') as cursor:
+            return list(await cursor.fetchall())
+
+async def set_federation_member(guild_id: int, federation_id: int, contribution_limit: int) -> None:
+    """
+    Link a guild to a federation, or change its contribution limit.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        federation_id (int): The federation ID.
+        contribution_limit (int): The most members the guild contributes to one session.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute(
+            'INSERT OR REPLACE INTO federation_members (guild_id, federation_id, contribution_limit) VALUES (?, ?, ?)',
+            (guild_id, federation_id, contribution_limit)
+        )
+        await db.commit()
+
+async def delete_federation_member(guild_id: int) -> None:
+    """
+    Unlink a guild from its federation.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute('DELETE FROM federation_members WHERE guild_id = ?', (guild_id,))
+        await db.commit()
+
+
+async def insert_session_history(guild_id: int, code: str, channel_id: int, started_at: float, ended_at: float,
+                                 member_ids: list[int], remote_member_ids: list[int] = ()) -> int:
+    """
+    Store a session that has ended, along with its members.
+
+    Args:
+        guild_id (int): The Discord guild (server) ID.
+        code (str): The session code.
+        channel_id (int): The session call channel ID.
+        started_at (float): Unix timestamp of the start of the session.
+        ended_at (float): Unix timestamp of the end of the session.
+        member_ids (list[int]): Every member of the session.
+        remote_member_ids (list[int]): The members that joined from another guild of a federation.
+
+    Returns:
+        int: The ID of the new session_history row.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        cursor = await db.execute(
+            'INSERT INTO session_history (guild_id, code, channel_id, started_at, ended_at, member_count) VALUES (?, ?, ?, ?, ?, ?)',
+            (guild_id, code, channel_id, started_at, ended_at, len(member_ids))
+        )
+        session_id = cursor.lastrowid
+        remote = set(remote_member_ids)
+        await db.executemany(
+            'INSERT INTO session_members (session_id, guild_id, member_id, remote) VALUES (?, ?, ?, ?)',
+            [(session_id, guild_id, member_id, member_id in remote) for member_id in member_ids]
+        )
+        await db.commit()
+        return session_id
+
+async def get_export_checkpoint(name: str, dataset: str) -> int:
+    """
+    Get the last row ID a named export has read from a dataset.
+
+    Args:
+        name (str): The checkpoint name.
+        dataset (str): The exported dataset.
+
+    Returns:
+        int: The last exported row ID, or 0 if the export has never run.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        async with db.execute('SELECT last_id FROM export_checkpoints WHERE name = ? AND dataset = ?', (name, dataset)) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+async def set_export_checkpoint(name: str, dataset: str, last_id: int, updated_at: float) -> None:
+    """
+    Record how far a named export has read a dataset.
+
+    Args:
+        name (str): The checkpoint name.
+        dataset (str): The exported dataset.
+        last_id (int): The last exported row ID.
+        updated_at (float): Unix timestamp of the export.
+    """
+    async with aiosqlite.connect("queueing_system.db") as db:
+        await db.execute(
+            'INSERT OR REPLACE INTO export_checkpoints (name, dataset, last_id, updated_at) VALUES (?, ?, ?, ?)',
+            (name, dataset, last_id, updated_at)
+        )
+        await db.commit()
 
 
 # I did not write these 2 functions, AI did. I'm not smart enough to write this.
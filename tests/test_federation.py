@@ -0,0 +1,67 @@
+from settings.federation import FederatedPool
+
+HOST = 1
+
+
+def pool_with(*members, limits=None):
+    """A pool hosted by guild 1, with ``(guild_id, member_id)`` members added in order."""
+    pool = FederatedPool(7, "test", HOST)
+    for guild_id, limit in (limits or {HOST: 10, 2: 10, 3: 10}).items():
+        pool.link(guild_id, limit)
+    for guild_id, member_id in members:
+        pool.add(guild_id, member_id)
+    return pool
+
+
+def test_empty_pool_is_falsy_but_exists():
+    pool = pool_with()
+    assert len(pool) == 0
+    assert pool.select(1) is None
+
+
+def test_selects_in_join_order():
+    pool = pool_with((2, 20), (HOST, 10), (3, 30), (2, 21))
+    assert pool.select(3) == [(2, 20), (HOST, 10), (3, 30)]
+
+
+def test_not_enough_members():
+    pool = pool_with((2, 20), (HOST, 10))
+    assert pool.select(3) is None
+
+
+def test_contribution_limits():
+    pool = pool_with((2, 20), (2, 21), (2, 22), (HOST, 10), (3, 30), limits={HOST: 10, 2: 2, 3: 10})
+    assert pool.select(4) == [(2, 20), (2, 21), (HOST, 10), (3, 30)]
+    # Capped contributions cannot add up to five
+    assert pool.select(5) is None
+
+
+def test_skip_applies_to_every_guild():
+    pool = pool_with((HOST, 10), (2, 20), (3, 30), (2, 21))
+    assert pool.select(3, skip={10, 20}) is None
+    assert pool.select(2, skip={10, 20}) == [(3, 30), (2, 21)]
+
+
+def test_remote_skip_only_applies_to_other_guilds():
+    pool = pool_with((HOST, 10), (2, 20), (3, 30))
+    # Member 10 is the host's own member, so opting out of DMs does not keep them out of a session
+    assert pool.select(2, remote_skip={10, 20}) == [(HOST, 10), (3, 30)]
+    assert pool.select(3, remote_skip={10, 20}) is None
+
+
+def test_add_and_remove_keep_counts():
+    pool = pool_with((HOST, 10), (2, 20))
+    pool.add(2, 20)
+    pool.add(4, 40)  # Not linked
+    assert len(pool) == 2 and pool.contributing_guilds() == 2
+    pool.remove(2, 20)
+    pool.remove(2, 20)
+    assert len(pool) == 1 and pool.contributing_guilds() == 1
+
+
+def test_unlink_drops_the_guilds_members():
+    pool = pool_with((HOST, 10), (2, 20), (2, 21))
+    pool.unlink(2)
+    assert list(pool.members) == [(HOST, 10)]
+    pool.add(2, 22)
+    assert len(pool) == 1
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import aiosqlite
+import pytest
+
+from settings import migrations
+from settings.migrations import MIGRATIONS, apply_migrations, schema_checksum
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def migrated_checksum(*statements: str) -> str:
+    async with aiosqlite.connect(':memory:', isolation_level=None) as db:
+        await apply_migrations(db)
+        for statement in statements:
+            await db.execute(statement)
+        return await schema_checksum(db)
+
+
+def test_versions_are_sequential_and_names_unique():
+    assert [migration.version for migration in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
+    assert len({migration.name for migration in MIGRATIONS}) == len(MIGRATIONS)
+
+
+def test_migrates_a_new_database_to_the_latest_version():
+    async def check():
+        async with aiosqlite.connect(':memory:', isolation_level=None) as db:
+            applied = await apply_migrations(db)
+            async with db.execute('PRAGMA user_version') as cursor:
+                version = (await cursor.fetchone())[0]
+            assert await apply_migrations(db) == []
+        return applied, version
+    applied, version = run(check())
+    assert applied == MIGRATIONS
+    assert version == MIGRATIONS[-1].version
+
+
+def test_refuses_a_newer_database():
+    async def check():
+        async with aiosqlite.connect(':memory:', isolation_level=None) as db:
+            await db.execute(f'PRAGMA user_version = {MIGRATIONS[-1].version + 1}')
+            await apply_migrations(db)
+    with pytest.raises(RuntimeError):
+        run(check())
+
+
+def test_checksum_is_stable():
+    assert run(migrated_checksum()) == run(migrated_checksum())
+
+
+def test_checksum_ignores_indentation():
+    # Runs of whitespace count as one space, so reindenting a migration's SQL does not change the checksum
+    assert (run(migrated_checksum('CREATE TABLE extra ( a INTEGER, b TEXT )'))
+            == run(migrated_checksum('CREATE TABLE extra (\n        a INTEGER,\n        b TEXT\n    )')))
+
+
+def test_checksum_changes_with_the_schema():
+    base = run(migrated_checksum())
+    assert run(migrated_checksum('CREATE TABLE extra (a INTEGER)')) != base
+    assert run(migrated_checksum('CREATE INDEX idx_extra ON queue_entries (joined_at)')) != base
+    # Data does not count
+    assert run(migrated_checksum("INSERT INTO dm_opt_out (user_id) VALUES (1)")) == base
+
+
+def test_legacy_queue_import(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'queues').mkdir()
+    (tmp_path / 'queues' / 'queue_1.json').write_text(json.dumps({
+        '11': {'joined_at': '2024-01-01T00:00:00+00:00'},
+        '12': {'joined_at': 'not a time'},
+        '13': {'joined_at': '2024-01-01T00:01:00+00:00'},
+    }))
+    (tmp_path / 'queues' / 'queue_2.json').write_text(json.dumps({'21': {'joined_at': '2024-01-01T00:00:00+00:00'}}))
+    (tmp_path / 'queues' / 'queue_3.json').write_text('{broken')
+    database = str(tmp_path / 'test.db')
+
+    async def check():
+        await migrations.migrate(database)
+        async with aiosqlite.connect(database) as db:
+            # Guild 2 already saved its queue from the running bot, so its file is older and must be skipped
+            await db.execute('INSERT INTO legacy_queue_imports (guild_id) VALUES (2)')
+            await db.commit()
+        # Guild 1 is loaded before the background migration reaches it
+        await migrations.import_legacy_queue(1, database)
+        await migrations.run_background_migrations(database, batch_size=1, pause=0)
+        async with aiosqlite.connect(database) as db:
+            async with db.execute('SELECT guild_id, member_id FROM queue_entries ORDER BY rowid') as cursor:
+                entries = await cursor.fetchall()
+            async with db.execute('SELECT guild_id FROM legacy_queue_imports ORDER BY guild_id') as cursor:
+                imported = [row[0] for row in await cursor.fetchall()]
+        return entries, imported
+
+    entries, imported = run(check())
+    assert entries == [(1, 11), (1, 13)]
+    assert imported == [1, 2]
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from settings import position
+from settings.position import EtaEstimator, QueueIndex, format_eta
+
+
+def test_positions_follow_join_order():
+    index = QueueIndex()
+    for member_id in (30, 10, 20):
+        index.add(member_id)
+    assert [index.position(m) for m in (30, 10, 20)] == [1, 2, 3]
+    assert index.position(99) is None
+    assert len(index) == 3 and 10 in index
+
+
+def test_adding_twice_keeps_the_first_place():
+    index = QueueIndex()
+    index.add(1)
+    index.add(2)
+    index.add(1)
+    assert index.position(1) == 1
+    assert len(index) == 2
+
+
+def test_remove_moves_everyone_behind_up():
+    index = QueueIndex()
+    for member_id in range(1, 6):
+        index.add(member_id)
+    index.remove(2)
+    index.remove(2)
+    index.remove(99)
+    assert [index.position(m) for m in (1, 3, 4, 5)] == [1, 2, 3, 4]
+    assert index.position(2) is None
+
+
+def test_matches_a_list_under_random_operations():
+    rng = random.Random(42)
+    # A small capacity forces many rebuilds
+    index = QueueIndex(capacity=4)
+    queue = []
+    next_id = 0
+    for _ in range(5000):
+        if queue and rng.random() < 0.45:
+            member_id = rng.choice(queue)
+            queue.remove(member_id)
+            index.remove(member_id)
+        else:
+            next_id += 1
+            queue.append(next_id)
+            index.add(next_id)
+        if rng.random() < 0.05:
+            assert [index.position(m) for m in queue] == list(range(1, len(queue) + 1))
+    assert [index.position(m) for m in queue] == list(range(1, len(queue) + 1))
+    assert len(index) == len(queue)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(position.time, 'monotonic', clock)
+    return clock
+
+
+def test_eta_needs_two_sessions(clock):
+    estimator = EtaEstimator()
+    assert estimator.eta(1, 4) is None
+    estimator.record_session()
+    assert estimator.eta(1, 4) is None
+
+
+def test_eta_from_session_rate(clock):
+    estimator = EtaEstimator()
+    for _ in range(3):
+        estimator.record_session()
+        clock.now += 60
+    # Three sessions a minute apart, measured up to now: two intervals over the 180 seconds since the first
+    assert estimator.sessions_per_second() == pytest.approx(2 / 180)
+    assert estimator.eta(1, 4) == pytest.approx(90)
+    assert estimator.eta(5, 4) == pytest.approx(180)
+    assert estimator.eta(1, 0) is None
+
+
+def test_eta_forgets_old_sessions(clock):
+    estimator = EtaEstimator(max_age=100)
+    estimator.record_session()
+    clock.now += 10
+    estimator.record_session()
+    clock.now += 200
+    assert estimator.eta(1, 4) is None
+
+
+@pytest.mark.parametrize('seconds, text', [
+    (None, "Unknown"),
+    (30, "less than a minute"),
+    (90, "~2m"),
+    (3600, "~1h 0m"),
+    (5400, "~1h 30m"),
+])
+def test_format_eta(seconds, text):
+    assert format_eta(seconds) == text
@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from settings import scheduler
+from settings.scheduler import Autoscaler, QueueWindow, is_open, next_change, parse_days, parse_time
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    """A UTC time in the week of Monday 2024-01-01, with ``day`` 0 for Monday."""
+    return datetime(2024, 1, 1 + day, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('spec, days', [
+    ('*', 'mon,tue,wed,thu,fri,sat,sun'),
+    ('Daily', 'mon,tue,wed,thu,fri,sat,sun'),
+    ('mon-fri', 'mon,tue,wed,thu,fri'),
+    ('sat,sun', 'sat,sun'),
+    ('sun,sat', 'sat,sun'),
+    ('fri-mon', 'mon,fri,sat,sun'),
+    ('Monday, wed', 'mon,wed'),
+    ('mon-mon', 'mon'),
+])
+def test_parse_days(spec, days):
+    assert parse_days(spec) == days
+
+
+@pytest.mark.parametrize('spec', ['funday', 'mon-xyz', ''])
+def test_parse_days_rejects_unknown_days(spec):
+    with pytest.raises(ValueError):
+        parse_days(spec)
+
+
+@pytest.mark.parametrize('value, minutes', [('00:00', 0), ('18:30', 1110), (' 23:59 ', 1439), ('7:05', 425)])
+def test_parse_time(value, minutes):
+    assert parse_time(value) == minutes
+
+
+@pytest.mark.parametrize('value', ['24:00', '12:60', '-1:00', '1200', 'ab:cd', '1:2:3'])
+def test_parse_time_rejects_invalid_times(value):
+    with pytest.raises(ValueError):
+        parse_time(value)
+
+
+def test_window_within_a_day():
+    windows = [QueueWindow(1, 'mon,tue,wed,thu,fri', 18 * 60, 22 * 60)]
+    assert not is_open(windows, at(0, 17, 59))
+    assert is_open(windows, at(0, 18))
+    assert is_open(windows, at(0, 21, 59))
+    assert not is_open(windows, at(0, 22))
+    assert not is_open(windows, at(5, 19))  # Saturday
+    assert next_change(windows, at(0, 12)) == at(0, 18)
+    assert next_change(windows, at(0, 18)) == at(0, 22)
+    assert next_change(windows, at(4, 23)) == at(7, 18)  # Friday night to next Monday
+
+
+def test_window_across_midnight():
+    # Opens Friday 22:00 and closes Saturday 02:00
+    windows = [QueueWindow(1, 'fri', 22 * 60, 2 * 60)]
+    assert not is_open(windows, at(4, 21, 59))
+    assert is_open(windows, at(4, 23))
+    assert is_open(windows, at(5, 1, 59))
+    assert not is_open(windows, at(5, 2))
+    # Only the day it opens on counts, so Friday early morning is closed
+    assert not is_open(windows, at(4, 1))
+    assert next_change(windows, at(5, 0)) == at(5, 2)
+
+
+def test_window_across_midnight_at_the_end_of_the_week():
+    windows = [QueueWindow(1, 'sun', 23 * 60, 60)]
+    assert is_open(windows, at(7, 0, 30))  # Monday of the next week
+    assert not is_open(windows, at(7, 1))
+
+
+def test_window_with_equal_start_and_end_lasts_a_whole_day():
+    windows = [QueueWindow(1, 'wed', 9 * 60, 9 * 60)]
+    assert is_open(windows, at(2, 9))
+    assert is_open(windows, at(3, 8, 59))
+    assert not is_open(windows, at(3, 9))
+
+
+def test_overlapping_windows():
+    windows = [QueueWindow(1, 'mon', 8 * 60, 12 * 60), QueueWindow(2, 'mon', 11 * 60, 14 * 60)]
+    assert is_open(windows, at(0, 11, 30))
+    assert is_open(windows, at(0, 13))
+    assert next_change(windows, at(0, 11, 30)) == at(0, 12)
+
+
+def test_no_windows():
+    assert not is_open([], at(0, 12))
+    assert next_change([], at(0, 12)) is None
+
+
+def test_autoscaler_without_arrivals_uses_the_smallest_size():
+    assert Autoscaler().session_size(300, 2, 10) == 2
+
+
+def test_autoscaler_sizes_sessions_from_the_arrival_rate(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(scheduler.time, 'monotonic', lambda: now[0])
+    autoscaler = Autoscaler(window=600)
+    for _ in range(60):
+        autoscaler.record_arrival()
+    # Six members a minute: a five minute target wait fits 31 members, capped at the largest size
+    assert autoscaler.session_size(300, 2, 10) == 10
+    assert autoscaler.session_size(30, 2, 10) == 4
+    now[0] = 601
+    assert autoscaler.session_size(300, 2, 10) == 2
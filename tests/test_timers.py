@@ -0,0 +1,95 @@
+import random
+
+from settings.timers import LEVEL_BITS, TimerWheel
+
+
+def run(wheel: TimerWheel, ticks: int) -> None:
+    for _ in range(ticks):
+        wheel.advance()
+
+
+def test_fires_on_the_scheduled_tick():
+    wheel = TimerWheel()
+    fired = []
+    wheel.schedule(5, fired.append, 'a')
+    run(wheel, 4)
+    assert fired == []
+    run(wheel, 1)
+    assert fired == ['a']
+    assert len(wheel) == 0
+
+
+def test_short_delays_fire_after_one_tick():
+    wheel = TimerWheel()
+    fired = []
+    wheel.schedule(0, fired.append, 'now')
+    wheel.schedule(-3, fired.append, 'past')
+    run(wheel, 1)
+    assert sorted(fired) == ['now', 'past']
+
+
+def test_cancel():
+    wheel = TimerWheel()
+    fired = []
+    timer = wheel.schedule(300, fired.append, 'a')
+    wheel.cancel(timer)
+    wheel.cancel(timer)
+    wheel.cancel(None)
+    run(wheel, 400)
+    assert fired == []
+    assert len(wheel) == 0
+
+
+def test_cancel_after_firing_does_nothing():
+    wheel = TimerWheel()
+    fired = []
+    timer = wheel.schedule(1, fired.append, 'a')
+    run(wheel, 1)
+    wheel.cancel(timer)
+    assert fired == ['a']
+
+
+def test_cascades_through_every_level():
+    wheel = TimerWheel()
+    fired = {}
+    # Delays on each side of every level boundary
+    delays = []
+    total = 0
+    for bits in LEVEL_BITS[:-1]:
+        total += bits
+        delays += [(1 << total) - 1, 1 << total, (1 << total) + 1]
+    for delay in delays:
+        wheel.schedule(delay, lambda d=delay: fired.setdefault(d, wheel.now))
+    run(wheel, max(delays))
+    assert fired == {delay: delay for delay in delays}
+
+
+def test_random_delays_fire_exactly_on_time():
+    rng = random.Random(1234)
+    wheel = TimerWheel()
+    fired = {}
+    expected = {}
+    timers = {}
+    # Start part-way through a revolution so the outer levels are not aligned with the delays
+    run(wheel, rng.randrange(100_000))
+    for n in range(2000):
+        delay = rng.choice((rng.randrange(1, 300), rng.randrange(1, 20_000), rng.randrange(1, 300_000)))
+        expected[n] = wheel.now + delay
+        timers[n] = wheel.schedule(delay, lambda n=n: fired.setdefault(n, wheel.now))
+    last = max(expected.values())
+    for n in rng.sample(range(2000), 200):
+        wheel.cancel(timers[n])
+        del expected[n]
+    run(wheel, last - wheel.now)
+    assert fired == expected
+    assert len(wheel) == 0
+
+
+def test_tick_resolution():
+    wheel = TimerWheel(tick=0.5)
+    fired = []
+    wheel.schedule(2, fired.append, 'a')
+    run(wheel, 3)
+    assert fired == []
+    run(wheel, 1)
+    assert fired == ['a']